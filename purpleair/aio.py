@@ -0,0 +1,508 @@
+"""
+Asynchronous PurpleAir and ThingSpeak clients
+
+Requires `aiohttp`, installed with `pip install purpleair[async]`.
+"""
+
+import asyncio
+import json
+from datetime import datetime, timedelta
+from functools import partial
+from typing import (Any, AsyncIterator, Dict, List, Optional, Tuple, Union,
+                    cast)
+
+import pandas as pd
+
+from .api_data import API_ROOT
+from .channel import Channel, LazyChannel
+from .chunking import ChunkedDownload
+from .geocode import Geocoder
+from .network import RefreshResult, SensorList
+from .sensor import Sensor
+from .sources import DataSource, HTTPSource
+from .store import HistoricalStore, TimeRange
+from .transport import Transport
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None  # type: ignore
+
+
+class AsyncTransport(Transport):
+    """
+    Transport that can also make requests with `aiohttp` from an event loop
+
+    At most `max_concurrency` asynchronous requests are in flight at once. Synchronous
+    requests still go through the pooled, cached session of `Transport`.
+    """
+
+    def __init__(self, max_concurrency: int = 16, **kwargs: Any):
+        if aiohttp is None:
+            raise ImportError(
+                'aiohttp is required for async support: pip install purpleair[async]')
+        super().__init__(**kwargs)
+        self.max_concurrency = max_concurrency
+        self._aio_session: Optional[Any] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def _get_aio_session(self) -> Any:
+        """
+        Get the `aiohttp` session for the running event loop, creating it if needed
+
+        A session only works in the loop it was created in, so the session of a previous
+        loop is closed, along with its connections, and replaced.
+        """
+        loop = asyncio.get_running_loop()
+        if self._aio_session is None or self._aio_session.closed or self._loop is not loop:
+            if self._aio_session is not None and not self._aio_session.closed:
+                await self._aio_session.close()
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+            self._aio_session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout))
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._aio_session
+
+    async def _request(self, url: str, raise_for_status: bool) -> bytes:
+        """
+        Make a GET request and return the response body
+        """
+        session = await self._get_aio_session()
+        async with cast(asyncio.Semaphore, self._semaphore):
+            with self.metrics.timer('http_request_seconds'):
+                async with session.get(url) as response:
+                    if raise_for_status:
+                        response.raise_for_status()
+                    content = await response.read()
+        self._record_response(content)
+        return content
+
+    async def get_async(self, url: str) -> bytes:
+        """
+        Make a GET request from the event loop and return the response body
+        """
+        return await self._request(url, raise_for_status=False)
+
+    async def read_csv_async(self, url: str, **kwargs: Any) -> pd.DataFrame:
+        """
+        Download CSV data into a DataFrame, raising `aiohttp.ClientResponseError` for errors
+        """
+        content = await self._request(url, raise_for_status=True)
+        return self._parse_csv(content, **kwargs)
+
+    async def aclose(self) -> None:
+        """
+        Close the `aiohttp` session and all pooled connections
+        """
+        if self._aio_session is not None:
+            await self._aio_session.close()
+            self._aio_session = None
+        self.close()
+
+    async def __aenter__(self) -> 'AsyncTransport':
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+
+def _resolve_transport(transport: Optional[Transport]) -> AsyncTransport:
+    """
+    Use `transport` if it supports async requests, otherwise create an async transport
+    """
+    if isinstance(transport, AsyncTransport):
+        return transport
+    return AsyncTransport()
+
+
+class AsyncChannel(Channel):
+    """
+    Representation of sensor channel data with asynchronous ThingSpeak downloads
+    """
+
+    def __init__(self,
+                 channel_data: dict,
+                 transport: Optional[Transport] = None,
+                 compact: bool = False,
+                 *,
+                 store: Optional[HistoricalStore] = None):
+        super().__init__(channel_data, _resolve_transport(transport), compact, store=store)
+        self.aio_transport = cast(AsyncTransport, self.transport)
+
+    @property
+    def created_date(self):
+        """
+        Gets the date the channel was created; must be awaited
+        """
+        return self._get_created_date()
+
+    async def _get_created_date(self) -> datetime:
+        """
+        Download the channel metadata and read the creation date
+        """
+        content = await self.aio_transport.get_async(self._get_created_date_url())
+        return self._parse_created_date(content)
+
+    async def _read_csvs_async(self,
+                               downloads: List[Tuple[str, str]],
+                               max_workers: int = 16) -> List[pd.DataFrame]:
+        """
+        Download each `(thingspeak_field, url)` pair concurrently, in the same order
+        """
+        if max_workers < 1:
+            raise ValueError(
+                f'Invalid max_workers: {max_workers}. Must be at least 1')
+        semaphore = asyncio.Semaphore(max_workers)
+
+        async def read_csv(thingspeak_field: str, url: str) -> pd.DataFrame:
+            async with semaphore:
+                return await self.aio_transport.read_csv_async(
+                    url, **self._csv_options(thingspeak_field))
+
+        return list(await asyncio.gather(*(read_csv(*download) for download in downloads)))
+
+    async def _run_download_async(self,
+                                  download: ChunkedDownload,
+                                  max_workers: int = 16) -> Dict[str, List[pd.DataFrame]]:
+        """
+        Download the raw data of a planned download
+
+        Each round of requests is made concurrently, until no response was truncated.
+        """
+        while not download.done:
+            chunks = download.take()
+            data = await self._read_csvs_async(
+                [(chunk.thingspeak_field, url) for chunk, url in chunks], max_workers)
+            for (chunk, _), chunk_data in zip(chunks, data):
+                download.receive(chunk, chunk_data)
+        return download.frames()
+
+    async def _download_async(self,
+                              windows: List[TimeRange],
+                              thingspeak_args: Optional[Dict[str, Any]],
+                              field_columns: Dict[str, Optional[List[str]]],
+                              max_workers: int = 16) -> Dict[str, List[pd.DataFrame]]:
+        """
+        Download the raw data for each window for each ThingSpeak field in `field_columns`
+        """
+        return await self._run_download_async(
+            self._plan_download(windows, thingspeak_args, field_columns), max_workers)
+
+    async def _get_windows_async(self,
+                                 windows: List[TimeRange],
+                                 thingspeak_args: Optional[Dict[str, Any]],
+                                 field_columns: Dict[str, Optional[List[str]]],
+                                 resolution: Optional[pd.Timedelta],
+                                 max_workers: int = 16) -> pd.DataFrame:
+        """
+        Download and combine each window, or read them from `store` if the channel has one
+
+        With a store, only the days it is missing are downloaded. The store is read and
+        written in a worker thread, so its file access does not block the event loop.
+        """
+        if not self._uses_store(thingspeak_args):
+            weekly_data = await self._download_async(
+                windows, thingspeak_args, field_columns, max_workers)
+            return self._combine_all_weeks(weekly_data, field_columns, resolution)
+
+        start_date = min(start for start, _ in windows)
+        end_date = max(end for _, end in windows)
+        weekly_data = await self._run_download_async(
+            self._plan_stored_download(start_date, end_date, tuple(field_columns)), max_workers)
+        return await asyncio.get_running_loop().run_in_executor(None, partial(
+            self._store_download, start_date, end_date, field_columns, resolution, weekly_data))
+
+    # pylint: disable=invalid-overridden-method
+    async def get_all_historical(self,  # type: ignore[override]
+                                 weeks_to_get: int,
+                                 start_date: datetime = datetime.now(),
+                                 thingspeak_args: Optional[Dict[str, Any]] = None,
+                                 *,
+                                 max_workers: int = 16,
+                                 fields: Optional[List[str]] = None,
+                                 resolution: Optional[Union[str, timedelta]] = None
+                                 ) -> pd.DataFrame:
+        """
+        Get all data (both primary and secondary) from the ThingSpeak API in weekly increments
+        """
+        field_columns = self._get_field_columns(fields)
+        local_resolution, thingspeak_args = self._get_resolution(resolution, thingspeak_args)
+        return await self._get_windows_async(
+            self._get_weekly_windows(weeks_to_get, start_date), thingspeak_args, field_columns,
+            local_resolution, max_workers)
+
+    # pylint: disable=invalid-overridden-method
+    async def get_all_historical_between(self,  # type: ignore[override]
+                                         start_date: datetime,
+                                         end_date: datetime = datetime.now(),
+                                         thingspeak_args: Optional[Dict[str, Any]] = None,
+                                         *,
+                                         max_workers: int = 16,
+                                         fields: Optional[List[str]] = None,
+                                         resolution: Optional[Union[str, timedelta]] = None
+                                         ) -> pd.DataFrame:
+        """
+        Get all data (both primary and secondary) from the ThingSpeak API between two dates
+        """
+        field_columns = self._get_field_columns(fields)
+        local_resolution, thingspeak_args = self._get_resolution(resolution, thingspeak_args)
+        windows = self._get_range_windows(start_date, end_date) if resolution is not None \
+            else [(start_date, end_date)]
+        return await self._get_windows_async(
+            windows, thingspeak_args, field_columns, local_resolution, max_workers)
+
+    # pylint: disable=invalid-overridden-method
+    async def get_historical_between(self,  # type: ignore[override]
+                                     thingspeak_field: str,
+                                     start_date: datetime,
+                                     end_date: datetime = datetime.now(),
+                                     thingspeak_args=None,
+                                     *,
+                                     fields: Optional[List[str]] = None,
+                                     resolution: Optional[Union[str, timedelta]] = None
+                                     ) -> pd.DataFrame:
+        """
+        Get data from the ThingSpeak API in one go between two dates.
+        """
+        field_columns = self._get_field_columns(fields, (thingspeak_field,))
+        local_resolution, thingspeak_args = self._get_resolution(resolution, thingspeak_args)
+        windows = self._get_range_windows(start_date, end_date) if resolution is not None \
+            else [(start_date, end_date)]
+        return await self._get_windows_async(
+            windows, thingspeak_args, field_columns, local_resolution)
+
+    # pylint: disable=invalid-overridden-method
+    async def get_historical(self,  # type: ignore[override]
+                             weeks_to_get: int,
+                             thingspeak_field: str,
+                             start_date: datetime = datetime.now(),
+                             thingspeak_args: Optional[Dict[str, Any]] = None,
+                             *,
+                             max_workers: int = 16,
+                             fields: Optional[List[str]] = None,
+                             resolution: Optional[Union[str, timedelta]] = None
+                             ) -> pd.DataFrame:
+        """
+        Get data from the ThingSpeak API one week at a time up to weeks_to_get weeks in the past.
+        """
+        field_columns = self._get_field_columns(fields, (thingspeak_field,))
+        local_resolution, thingspeak_args = self._get_resolution(resolution, thingspeak_args)
+        return await self._get_windows_async(
+            self._get_weekly_windows(weeks_to_get, start_date), thingspeak_args, field_columns,
+            local_resolution, max_workers)
+
+    async def get_historical_range(self,
+                                   start_date: datetime,
+                                   end_date: datetime,
+                                   thingspeak_field: Optional[str] = None,
+                                   *,
+                                   thingspeak_args: Optional[Dict[str, Any]] = None,
+                                   fields: Optional[List[str]] = None,
+                                   resolution: Optional[Union[str, timedelta]] = None
+                                   ) -> pd.DataFrame:
+        """
+        Get data between two dates one week at a time, with every week downloaded concurrently
+
+        If `thingspeak_field` is `None`, primary and secondary data are merged. If `fields`
+        is given, only those columns are kept, along with `created_at`. If `resolution`
+        is given, the data is averaged over windows of that length.
+        """
+        field_columns = self._get_field_columns(
+            fields, ('primary', 'secondary') if thingspeak_field is None else (thingspeak_field,))
+        local_resolution, thingspeak_args = self._get_resolution(resolution, thingspeak_args)
+        return await self._get_windows_async(
+            self._get_range_windows(start_date, end_date), thingspeak_args, field_columns,
+            local_resolution, self.aio_transport.max_concurrency)
+
+
+class LazyAsyncChannel(LazyChannel, AsyncChannel):
+    """
+    Asynchronous channel that parses each attribute the first time it is read
+    """
+
+    __slots__ = ()
+
+
+class AsyncSensor(Sensor):
+    """
+    Representation of a single PurpleAir sensor with asynchronous channels
+
+    Create with `await AsyncSensor.create(identifier)` to fetch the sensor data without blocking.
+    """
+
+    channel_class = AsyncChannel
+    lazy_channel_class = LazyAsyncChannel
+
+    def __init__(
+            self,
+            identifier: int,
+            json_data: Optional[list] = None,
+            parse_location=False,
+            *,
+            transport: Optional[Transport] = None,
+            geocoder: Optional[Geocoder] = None,
+            compact: bool = False,
+            lazy: bool = False,
+            store: Optional[HistoricalStore] = None):
+        super().__init__(identifier, json_data, parse_location,
+                         transport=_resolve_transport(transport), geocoder=geocoder,
+                         compact=compact, lazy=lazy, store=store)
+
+    @classmethod
+    async def create(cls,
+                     identifier: int,
+                     parse_location=False,
+                     transport: Optional[Transport] = None,
+                     geocoder: Optional[Geocoder] = None,
+                     *,
+                     store: Optional[HistoricalStore] = None) -> 'AsyncSensor':
+        """
+        Fetch the data for a sensor without blocking the event loop
+        """
+        # Sanitize ID
+        if not isinstance(identifier, int):
+            raise ValueError(f'Invalid sensor ID: {identifier}')
+        aio_transport = _resolve_transport(transport)
+
+        content = await aio_transport.get_async(f'{API_ROOT}?show={identifier}')
+        channel_data, parent_id = cls.parse_results(
+            identifier, json.loads(content))
+        if parent_id is not None:
+            content = await aio_transport.get_async(f'{API_ROOT}?show={parent_id}')
+            channel_data = json.loads(content).get('results')
+        return cls(identifier, json_data=channel_data,
+                   parse_location=parse_location, transport=aio_transport,
+                   geocoder=geocoder, store=store)
+
+
+class AsyncSensorList(SensorList):
+    """
+    PurpleAir Sensor Network Representation with asynchronous I/O
+
+    Create with `await AsyncSensorList.create()`.
+    """
+
+    sensor_class = AsyncSensor
+
+    # pylint: disable=super-init-not-called
+    def __init__(self,
+                 parse_location=False,
+                 *,
+                 columnar=False,
+                 transport: Optional[Transport] = None,
+                 geocoder: Optional[Geocoder] = None,
+                 compact=False,
+                 lazy=False,
+                 source: Optional[DataSource] = None,
+                 store: Optional[HistoricalStore] = None):
+        # Does not fetch any data, since that has to be awaited
+        self._initialize(parse_location, columnar,
+                         _resolve_transport(transport), geocoder=geocoder, compact=compact,
+                         lazy=lazy, source=source, store=store)
+        self.aio_transport = cast(AsyncTransport, self.transport)
+
+    @classmethod
+    async def create(cls,
+                     parse_location=False,
+                     *,
+                     columnar=False,
+                     transport: Optional[Transport] = None,
+                     geocoder: Optional[Geocoder] = None,
+                     compact=False,
+                     lazy=False,
+                     source: Optional[DataSource] = None,
+                     store: Optional[HistoricalStore] = None) -> 'AsyncSensorList':
+        """
+        Fetch the network data without blocking the event loop
+        """
+        sensor_list = cls(parse_location, columnar=columnar, transport=transport,
+                          geocoder=geocoder, compact=compact, lazy=lazy, source=source,
+                          store=store)
+        await sensor_list.get_all_data()
+        sensor_list._generate()  # pylint: disable=protected-access
+        return sensor_list
+
+    # pylint: disable=invalid-overridden-method
+    async def get_all_data(self) -> None:  # type: ignore[override]
+        """
+        Get all data from the data source, which is the API unless another source was given
+
+        The API is requested from the event loop when the source's transport supports it.
+        Other sources are read in a worker thread, so reading them does not block the loop.
+        """
+        with self.transport.metrics.timer('network_read_seconds'):
+            if isinstance(self.source, HTTPSource) and \
+                    isinstance(self.source.transport, AsyncTransport):
+                content = await self.source.transport.get_async(self.source.url)
+            else:
+                content = await asyncio.get_running_loop().run_in_executor(
+                    None, self.source.read)
+        self.load_payload(content)
+
+    # pylint: disable=invalid-overridden-method
+    async def refresh(self) -> RefreshResult:  # type: ignore[override]
+        """
+        Get the current network data and update the existing sensors in place
+        """
+        built = self._built_sensors()
+        previous: Dict[int, List[dict]] = {s[0]['ID']: s for s in self.data}
+        await self.get_all_data()  # Replace `data`
+        return self._apply_refresh(built, previous)
+
+    # pylint: disable=invalid-overridden-method,arguments-differ
+    async def get_historical_bulk(self,  # type: ignore[override]
+                                  sensor_filter: str,
+                                  channel: str,
+                                  start_date: datetime,
+                                  end_date: Optional[datetime] = None,
+                                  *,
+                                  thingspeak_field: Optional[str] = None,
+                                  thingspeak_args: Optional[Dict[str, Any]] = None,
+                                  stream: bool = False,
+                                  fields: Optional[List[str]] = None,
+                                  resolution: Optional[Union[str, timedelta]] = None
+                                  ) -> Union[pd.DataFrame,
+                                             AsyncIterator[Tuple[Optional[int], pd.DataFrame]]]:
+        """
+        Get historical ThingSpeak data for every sensor in `sensor_filter` between two dates
+
+        Every request is made from the event loop, limited by the transport's `max_concurrency`.
+        If `stream` is true, returns an async iterator of `(sensor_id, DataFrame)` pairs in the
+        order the sensors finish downloading. Child channels are keyed by the ID of their sensor.
+        """
+        end_date = end_date if end_date is not None else datetime.now()
+        if start_date >= end_date:
+            raise ValueError(
+                f'Invalid date range: {start_date} is not before {end_date}')
+        channels = cast(List[AsyncChannel],
+                        self._historical_channels(sensor_filter, channel))
+
+        async def download(sensor_channel: AsyncChannel) -> Tuple[Optional[int], pd.DataFrame]:
+            return sensor_channel.sensor_id, await sensor_channel.get_historical_range(
+                start_date, end_date, thingspeak_field=thingspeak_field,
+                thingspeak_args=thingspeak_args, fields=fields, resolution=resolution)
+
+        if stream:
+            return self._stream(download(c) for c in channels)
+
+        frames = dict(await asyncio.gather(*(download(c) for c in channels)))
+        if len(frames) == 0:
+            raise ValueError(
+                f'No sensors with ThingSpeak data for filter: {sensor_filter}')
+        return pd.concat(frames, names=['sensor_id'])
+
+    @staticmethod
+    async def _stream(downloads) -> AsyncIterator[Tuple[Optional[int], pd.DataFrame]]:
+        """
+        Yield each download as soon as it finishes
+        """
+        tasks = [asyncio.ensure_future(d) for d in downloads]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield await finished
+        finally:
+            for task in tasks:
+                task.cancel()
@@ -5,6 +5,13 @@ Constants for PurpleAir API
 
 API_ROOT = 'https://www.purpleair.com/json'
 THINGSPEAK_API_URL = "https://thingspeak.com/channels/{channel}/feed.{dataformat}?"
+THINGSPEAK_FIELD_URL = "https://thingspeak.com/channels/{channel}/fields/{field}.{dataformat}?"
+
+# Most rows ThingSpeak sends in one response
+THINGSPEAK_ROW_LIMIT = 8000
+
+# Windows ThingSpeak can average data over with its `average` argument, in minutes
+THINGSPEAK_AVERAGES = (10, 15, 20, 30, 60, 240, 720, 1440)
 
 PARENT_PRIMARY_COLS = {
     'created_at': 'created_at',
@@ -57,3 +64,28 @@ CHILD_SECONDARY_COLS = {
     'field7': 'PM1.0 (CF=ATM) ug/m3',
     'field8': 'PM10 (CF=ATM) ug/m3'
 }
+
+# Type of each ThingSpeak column; float32 keeps about 7 significant digits, which is
+# enough for readings but not for large particle counts or uptimes. The type of
+# `entry_id` is inferred, since it is empty in averaged data.
+COLUMN_DTYPES = {
+    'PM1.0 (CF=1) ug/m3': 'float32',
+    'PM2.5 (CF=1) ug/m3': 'float32',
+    'PM10.0 (CF=1) ug/m3': 'float32',
+    'UptimeMinutes': 'float64',
+    'ADC': 'float32',
+    'Temperature_F': 'float32',
+    'Humidity_%': 'float32',
+    'PM2.5 (CF=ATM) ug/m3': 'float32',
+    'RSSI_dbm': 'float32',
+    'Atmospheric Pressure': 'float32',
+    'gas_sensor': 'float32',
+    '0.3um/dl': 'float64',
+    '0.5um/dl': 'float64',
+    '1.0um/dl': 'float64',
+    '2.5um/dl': 'float64',
+    '5.0um/dl': 'float64',
+    '10.0um/dl': 'float64',
+    'PM1.0 (CF=ATM) ug/m3': 'float32',
+    'PM10 (CF=ATM) ug/m3': 'float32',
+}
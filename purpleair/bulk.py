@@ -0,0 +1,189 @@
+"""
+Bulk historical data downloads for many sensors at once
+"""
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+import pandas as pd
+from requests import ConnectionError as RequestsConnectionError
+from requests import HTTPError, Timeout
+
+from .channel import Channel
+from .chunking import Chunk, ChunkedDownload
+from .transport import Transport
+
+# HTTP status codes that are worth retrying
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+# pylint: disable=too-few-public-methods
+class RateLimiter():
+    """
+    Thread safe limiter that spaces requests to each host at least `1 / requests_per_second` apart
+    """
+
+    def __init__(self, requests_per_second: float):
+        if requests_per_second <= 0:
+            raise ValueError(
+                f'Invalid rate limit: {requests_per_second}. Must be greater than 0')
+        self.interval = 1 / requests_per_second
+        self._next_slot: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def wait(self, host: str) -> None:
+        """
+        Block until the next request to `host` is allowed
+        """
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        # Sleep outside of the lock so other hosts are not blocked
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class BulkDownloader():
+    """
+    Downloads ThingSpeak data for many channels through a shared, bounded worker pool
+
+    Every request for every channel, field and week is scheduled on the same pool,
+    limited to `requests_per_second` per host, and retried up to `retries` times with
+    exponential backoff when ThingSpeak is unavailable or rate limits us.
+    """
+
+    def __init__(self,
+                 max_workers: int = 8,
+                 requests_per_second: float = 4.0,
+                 retries: int = 3,
+                 backoff: float = 1.0,
+                 transport: Optional[Transport] = None):
+        if max_workers < 1:
+            raise ValueError(
+                f'Invalid max_workers: {max_workers}. Must be at least 1')
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter(requests_per_second)
+        self.retries = retries
+        self.backoff = backoff
+        self.transport: Transport = transport if transport is not None \
+            else Transport()
+
+    def fetch(self, url: str, **kwargs: Any) -> pd.DataFrame:
+        """
+        Download the CSV data at `url`, retrying transient failures
+
+        Keyword arguments are passed to `pd.read_csv()`.
+        """
+        host = urlparse(url).netloc
+        attempt = 0
+        while True:
+            self.rate_limiter.wait(host)
+            try:
+                return self.transport.read_csv(url, **kwargs)
+            except HTTPError as err:
+                status = err.response.status_code if err.response is not None else None
+                if status not in RETRY_STATUS_CODES or attempt >= self.retries:
+                    raise
+            except (RequestsConnectionError, Timeout):
+                if attempt >= self.retries:
+                    raise
+            time.sleep(self.backoff * 2 ** attempt)
+            attempt += 1
+
+    def download(self,
+                 channels: List[Channel],
+                 start_date: datetime,
+                 end_date: Optional[datetime] = None,
+                 *,
+                 thingspeak_field: Optional[str] = None,
+                 thingspeak_args: Optional[Dict[str, Any]] = None,
+                 fields: Optional[List[str]] = None,
+                 resolution: Optional[Union[str, timedelta]] = None
+                 ) -> Iterator[Tuple[Optional[int], pd.DataFrame]]:
+        """
+        Yield `(sensor_id, DataFrame)` for each channel as soon as all of its data is downloaded
+
+        If `thingspeak_field` is `None`, primary and secondary data are merged like
+        `Channel.get_all_historical()`; otherwise only that field is downloaded. If `fields`
+        is given, only those columns are kept, along with `created_at`, and if
+        `resolution` is given, the data is averaged over windows of that length. For
+        channels with a `store`, only the days it is missing are downloaded, and the data
+        is read back from it. The arguments are checked and every download is
+        planned before this returns.
+        """
+        end_date = end_date if end_date is not None else datetime.now()
+        if start_date >= end_date:
+            raise ValueError(
+                f'Invalid date range: {start_date} is not before {end_date}')
+        thingspeak_fields = ('primary', 'secondary') if thingspeak_field is None else (
+            thingspeak_field,)
+
+        # pylint: disable=protected-access
+        local_resolution, thingspeak_args = Channel._get_resolution(resolution, thingspeak_args)
+        # Chunked download of each channel's data, and what turns it into the channel's DataFrame
+        plans: Dict[int, ChunkedDownload] = {}
+        finishers: Dict[int, Callable[[Dict[str, List[pd.DataFrame]]], pd.DataFrame]] = {}
+        for index, channel in enumerate(channels):
+            field_columns = channel._get_field_columns(fields, thingspeak_fields)
+            if channel._uses_store(thingspeak_args):
+                # Only the days the store is missing are downloaded, then read back from it
+                plans[index] = channel._plan_stored_download(
+                    start_date, end_date, thingspeak_fields)
+                finishers[index] = partial(channel._store_download, start_date, end_date,
+                                           field_columns, local_resolution)
+            else:
+                plans[index] = channel._plan_download(
+                    channel._get_range_windows(start_date, end_date), thingspeak_args,
+                    field_columns)
+                finishers[index] = partial(channel._combine_all_weeks,
+                                           field_columns=field_columns,
+                                           resolution=local_resolution)
+        return self._run(channels, plans, finishers)
+
+    def _run(self,
+             channels: List[Channel],
+             plans: Dict[int, ChunkedDownload],
+             finishers: Dict[int, Callable[[Dict[str, List[pd.DataFrame]]], pd.DataFrame]]
+             ) -> Iterator[Tuple[Optional[int], pd.DataFrame]]:
+        """
+        Yield the finished data of each planned channel download as soon as it is downloaded
+        """
+        jobs: Dict[Future, Tuple[int, Chunk]] = {}
+
+        def finish(index: int) -> Tuple[Optional[int], pd.DataFrame]:
+            return channels[index].sensor_id, finishers.pop(index)(plans.pop(index).frames())
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+
+            def submit(index: int) -> None:
+                for chunk, url in plans[index].take():
+                    # pylint: disable=protected-access
+                    options = channels[index]._csv_options(chunk.thingspeak_field)
+                    jobs[executor.submit(self.fetch, url, **options)] = (index, chunk)
+
+            try:
+                for index in list(plans):
+                    submit(index)
+                    # Channels with everything already stored have nothing to download
+                    if plans[index].done:
+                        yield finish(index)
+
+                while jobs:
+                    finished, _ = wait(jobs, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        index, chunk = jobs.pop(future)
+                        plans[index].receive(chunk, future.result())
+                        # Truncated responses are split into more requests for the channel
+                        submit(index)
+                        if plans[index].done:
+                            yield finish(index)
+            finally:
+                # Stop scheduling work if the caller stops early or a request failed
+                for future in jobs:
+                    future.cancel()
@@ -1,30 +1,246 @@
 """
 Representation of sensor channel data
 """
+# pylint: disable=too-many-lines
 
 import json
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
-from typing import Any, Dict, Optional
+from typing import (Any, Callable, Dict, Iterator, List, Optional, Tuple, Union,
+                    cast)
 from urllib.parse import urlencode
 
 import pandas as pd
 import thingspeak
-from requests_cache import CachedSession
 
 from .api_data import (CHILD_PRIMARY_COLS, CHILD_SECONDARY_COLS,
-                       PARENT_PRIMARY_COLS, PARENT_SECONDARY_COLS,
-                       THINGSPEAK_API_URL)
+                       COLUMN_DTYPES, PARENT_PRIMARY_COLS,
+                       PARENT_SECONDARY_COLS, THINGSPEAK_API_URL,
+                       THINGSPEAK_AVERAGES, THINGSPEAK_FIELD_URL)
+from .chunking import Chunk, ChunkedDownload, expected_rows_per_day, rows_in_range
+from .store import HistoricalStore, TimeRange, floor_day
+from .transport import Transport
+
+# Raw keys kept by compact channels, which are needed to detect changes
+COMPACT_KEYS = ('ID', 'ParentID', 'LastSeen', 'Stats')
+
+# Attributes converted with `Channel._safe_float()`, by raw key
+FLOAT_FIELDS = {
+    'lat': 'Lat',
+    'lon': 'Lon',
+    'current_pm2_5': 'PM2_5Value',
+    'current_temp_f': 'temp_f',
+    'current_humidity': 'humidity',
+    'current_pressure': 'pressure',
+    'current_p_0_3_um': 'p_0_3_um',
+    'current_p_0_5_um': 'p_0_5_um',
+    'current_p_1_0_um': 'p_1_0_um',
+    'current_p_2_5_um': 'p_2_5_um',
+    'current_p_5_0_um': 'p_5_0_um',
+    'current_p_10_0_um': 'p_10_0_um',
+    'current_pm1_0_cf_1': 'pm1_0_cf_1',
+    'current_pm2_5_cf_1': 'pm2_5_cf_1',
+    'current_pm10_0_cf_1': 'pm10_0_cf_1',
+    'current_pm1_0_atm': 'pm1_0_atm',
+    'current_pm2_5_atm': 'pm2_5_atm',
+    'current_pm10_0_atm': 'pm10_0_atm',
+}
+
+# Attributes copied from the raw data without conversion, by raw key
+RAW_FIELDS = {
+    'identifier': 'ID',
+    'parent': 'ParentID',
+    'name': 'Label',
+    'location_type': 'DEVICE_LOCATIONTYPE',
+    'model': 'Type',
+    'adc': 'Adc',
+    'rssi': 'RSSI',
+    'age': 'AGE',  # Number of minutes old the data is
+    'brightness': 'DEVICE_BRIGHTNESS',
+    'hardware': 'DEVICE_HARDWAREDISCOVERED',
+    'version': 'Version',
+    'last_update_check': 'LastUpdateCheck',
+    'created': 'Created',
+    'uptime': 'Uptime',
+}
+
+# Attributes read from the parsed `Stats` JSON blob, by key
+STATS_FIELDS = {
+    'm10avg': 'v1',
+    'm30avg': 'v2',
+    'h1ravg': 'v3',
+    'h6ravg': 'v4',
+    'd1avg': 'v5',
+    'w1avg': 'v6',
+    'last2_modified': 'timeSinceModified',
+}
+
+
+def _thingspeak_ids(channel_data: dict) -> tuple:
+    """
+    ThingSpeak channel IDs and keys; if any are missing do not crash, just set all to None
+
+    Doing this prevents a crash until we actually access ThingSpeak data, which the user
+    may not do.
+    """
+    try:
+        return (channel_data['THINGSPEAK_PRIMARY_ID'],
+                channel_data['THINGSPEAK_PRIMARY_ID_READ_KEY'],
+                channel_data['THINGSPEAK_SECONDARY_ID'],
+                channel_data['THINGSPEAK_SECONDARY_ID_READ_KEY'])
+    except KeyError:
+        return None, None, None, None
+
+
+def _last_modified_stats(stats: Optional[dict]) -> Optional[datetime]:
+    """
+    Convert the statistics modification time from milliseconds
+    """
+    last_mod = stats.get('lastModified') if stats is not None else None
+    if last_mod is None:
+        return None
+    return datetime.utcfromtimestamp(int(last_mod) / 1000)
+
+
+# Attributes computed from the raw data or from other attributes
+DERIVED_FIELDS: Dict[str, Callable[[Any], Any]] = {
+    'type': lambda c: 'parent' if c.parent is None else 'child',
+    'current_temp_c': lambda c: (c.current_temp_f - 32) * (5 / 9)
+    if c.current_temp_f is not None else None,
+    'pm2_5stats': lambda c: json.loads(c.channel_data['Stats'])
+    if 'Stats' in c.channel_data else None,
+    'last_modified_stats': lambda c: _last_modified_stats(c.pm2_5stats),
+    'last_seen': lambda c: datetime.utcfromtimestamp(int(c.channel_data['LastSeen']))
+    if c.channel_data.get('LastSeen') is not None else None,
+    'hidden': lambda c: c.channel_data.get('Hidden') != 'false',
+    'flagged': lambda c: c.channel_data.get('Flag') == 1,
+    'downgraded': lambda c: c.channel_data.get('A_H') == 'true',
+    'is_owner': lambda c: bool(c.channel_data.get('isOwner')),
+}
+
+# Attributes set from `_thingspeak_ids()`, in the same order
+THINGSPEAK_FIELDS = ('tp_primary_channel', 'tp_primary_key',
+                     'tp_secondary_channel', 'tp_secondary_key')
+
+# Every parsed attribute, in an order where each one only depends on earlier ones
+FIELDS = tuple(FLOAT_FIELDS) + tuple(RAW_FIELDS) + tuple(DERIVED_FIELDS) + \
+    tuple(STATS_FIELDS) + THINGSPEAK_FIELDS
+_FIELD_SET = frozenset(FIELDS)
 
 
 class Channel():
     """
     Representation of sensor channel data
+
+    Attributes are stored in slots instead of a per-instance `__dict__`. If `compact`
+    is true, the raw `channel_data` is trimmed to `COMPACT_KEYS` once it is parsed.
     """
 
-    def __init__(self, channel_data: dict):
+    __slots__ = ('channel_data', 'transport', 'compact', 'store',
+                 '_thingspeak_primary', '_thingspeak_secondary') + FIELDS
+
+    # Largest difference in `created_at` between primary and secondary readings that are merged
+    merge_tolerance = pd.Timedelta(seconds=30)
+
+    # Meta
+    lat: Optional[float]
+    lon: Optional[float]
+    identifier: Optional[int]
+    parent: Optional[int]
+    type: str
+    name: Optional[str]
+    location_type: Optional[str]
+
+    # Data, possible TODO: abstract to class
+    current_pm2_5: Optional[float]
+    current_temp_f: Optional[float]
+    current_temp_c: Optional[float]
+    current_humidity: Optional[float]
+    current_pressure: Optional[float]
+    current_p_0_3_um: Optional[float]
+    current_p_0_5_um: Optional[float]
+    current_p_1_0_um: Optional[float]
+    current_p_2_5_um: Optional[float]
+    current_p_5_0_um: Optional[float]
+    current_p_10_0_um: Optional[float]
+    current_pm1_0_cf_1: Optional[float]
+    current_pm2_5_cf_1: Optional[float]
+    current_pm10_0_cf_1: Optional[float]
+    current_pm1_0_atm: Optional[float]
+    current_pm2_5_atm: Optional[float]
+    current_pm10_0_atm: Optional[float]
+
+    # Statistics
+    pm2_5stats: Optional[dict]
+    m10avg: Optional[float]
+    m30avg: Optional[float]
+    h1ravg: Optional[float]
+    h6ravg: Optional[float]
+    d1avg: Optional[float]
+    w1avg: Optional[float]
+    last_modified_stats: Optional[datetime]
+    last2_modified: Optional[int]
+
+    # ThingSpeak IDs
+    tp_primary_channel: Optional[str]
+    tp_primary_key: Optional[str]
+    tp_secondary_channel: Optional[str]
+    tp_secondary_key: Optional[str]
+
+    # Diagnostic
+    last_seen: Optional[datetime]
+    model: Optional[str]
+    adc: Optional[str]
+    rssi: Optional[str]
+    hidden: bool
+    flagged: bool
+    downgraded: bool
+    age: Optional[int]
+    brightness: Optional[str]
+    hardware: Optional[str]
+    version: Optional[str]
+    last_update_check: Optional[int]
+    created: Optional[int]
+    uptime: Optional[int]
+    is_owner: Optional[bool]
+
+    def __init__(self,
+                 channel_data: dict,
+                 transport: Optional[Transport] = None,
+                 compact: bool = False,
+                 *,
+                 store: Optional[HistoricalStore] = None):
+        self.channel_data = channel_data
+        self.transport: Transport = transport if transport is not None \
+            else Transport()
+        self.compact = compact
+        self.store = store
+        self._setup()
+
+    def update(self, channel_data: dict) -> None:
+        """
+        Replace the channel data in place and parse it again
+        """
         self.channel_data = channel_data
         self._setup()
 
+    @staticmethod
+    def data_changed(old_data: dict, new_data: dict) -> bool:
+        """
+        Whether `new_data` has different readings than `old_data`
+
+        Compares the last seen time and the raw statistics blob, which includes its
+        `lastModified` time, without parsing either.
+        """
+        return new_data.get('LastSeen') != old_data.get('LastSeen') \
+            or new_data.get('Stats') != old_data.get('Stats')
+
+    def is_changed(self, channel_data: dict) -> bool:
+        """
+        Whether `channel_data` has different readings than this channel
+        """
+        return self.data_changed(self.channel_data, channel_data)
+
     def _safe_float(self, key: str) -> Optional[float]:
         """
         Convert to float if the item exists, otherwise return none
@@ -42,116 +258,58 @@ class Channel():
     def _setup(self) -> None:
         """
         Initialize metadata and real data for a sensor; for detailed info see docs
+
+        Every attribute is parsed from the tables `LazyChannel._parse_field()` reads, in
+        the order of `FIELDS`, so derived attributes can use the ones before them.
         """
-        # Meta
-        self.lat: Optional[float] = self._safe_float('Lat')
-        self.lon: Optional[float] = self._safe_float('Lon')
-        self.identifier: Optional[int] = self.channel_data.get('ID')
-        self.parent: Optional[int] = self.channel_data.get('ParentID')
-        self.type: str = 'parent' if self.parent is None else 'child'
-        self.name: Optional[str] = self.channel_data.get('Label')
-        # pylint: disable=line-too-long
-        self.location_type: Optional[str] = self.channel_data.get(
-            'DEVICE_LOCATIONTYPE')
-
-        # Data, possible TODO: abstract to class
-        self.current_pm2_5: Optional[float] = self._safe_float('PM2_5Value')
-        self.current_temp_f: Optional[float] = self._safe_float('temp_f')
-        self.current_temp_c = (self.current_temp_f - 32) * (5 / 9) \
-            if self.current_temp_f is not None else None
-        self.current_humidity: Optional[float] = self._safe_float('humidity')
-        self.current_pressure: Optional[float] = self._safe_float('pressure')
-        self.current_p_0_3_um: Optional[float] = self._safe_float('p_0_3_um')
-        self.current_p_0_5_um: Optional[float] = self._safe_float('p_0_5_um')
-        self.current_p_1_0_um: Optional[float] = self._safe_float('p_1_0_um')
-        self.current_p_2_5_um: Optional[float] = self._safe_float('p_2_5_um')
-        self.current_p_5_0_um: Optional[float] = self._safe_float('p_5_0_um')
-        self.current_p_10_0_um: Optional[float] = self._safe_float('p_10_0_um')
-        self.current_pm1_0_cf_1: Optional[float] = self._safe_float(
-            'pm1_0_cf_1')
-        self.current_pm2_5_cf_1: Optional[float] = self._safe_float(
-            'pm2_5_cf_1')
-        self.current_pm10_0_cf_1: Optional[float] = self._safe_float(
-            'pm10_0_cf_1')
-        self.current_pm1_0_atm: Optional[float] = self._safe_float('pm1_0_atm')
-        self.current_pm2_5_atm: Optional[float] = self._safe_float('pm2_5_atm')
-        self.current_pm10_0_atm: Optional[float] = self._safe_float(
-            'pm10_0_atm')
-
-        # Statistics
-        self.pm2_5stats: Optional[dict] = json.loads(
-            self.channel_data['Stats']) if 'Stats' in self.channel_data else None
-        self.m10avg: Optional[float] = self.pm2_5stats.get(
-            'v1') if self.pm2_5stats else None
-        self.m30avg: Optional[float] = self.pm2_5stats.get(
-            'v2') if self.pm2_5stats else None
-        self.h1ravg: Optional[float] = self.pm2_5stats.get(
-            'v3') if self.pm2_5stats else None
-        self.h6ravg: Optional[float] = self.pm2_5stats.get(
-            'v4') if self.pm2_5stats else None
-        self.d1avg: Optional[float] = self.pm2_5stats.get(
-            'v5') if self.pm2_5stats else None
-        self.w1avg: Optional[float] = self.pm2_5stats.get(
-            'v6') if self.pm2_5stats else None
-        self.last_modified_stats: Optional[datetime] = None
-        last_mod = self.pm2_5stats.get('lastModified') \
-            if self.pm2_5stats is not None else None
-        if last_mod is not None:
-            self.last_modified_stats = datetime.utcfromtimestamp(
-                int(last_mod) / 1000)
-        self.last2_modified: Optional[int] = self.pm2_5stats.get(
-            'timeSinceModified') if self.pm2_5stats is not None else None
-
-        # ThingSpeak IDs, if these are missing do not crash, just set to None
-        try:
-            self.tp_primary_channel: Optional[str] = self.channel_data['THINGSPEAK_PRIMARY_ID']
-            self.tp_primary_key: Optional[str] = self.channel_data['THINGSPEAK_PRIMARY_ID_READ_KEY']
-            self.tp_secondary_channel: Optional[str] = self.channel_data['THINGSPEAK_SECONDARY_ID']
-            self.tp_secondary_key: Optional[str] = self.channel_data['THINGSPEAK_SECONDARY_ID_READ_KEY']
-            self.thingspeak_primary: Optional[thingspeak.Channel] = thingspeak.Channel(
+        # ThingSpeak clients are created the first time they are used
+        self._thingspeak_primary: Optional[thingspeak.Channel] = None
+        self._thingspeak_secondary: Optional[thingspeak.Channel] = None
+
+        channel_data = self.channel_data
+        for name, key in FLOAT_FIELDS.items():
+            setattr(self, name, self._safe_float(key))
+        for name, key in RAW_FIELDS.items():
+            setattr(self, name, channel_data.get(key))
+        for name, parse in DERIVED_FIELDS.items():
+            setattr(self, name, parse(self))
+        stats = self.pm2_5stats
+        for name, key in STATS_FIELDS.items():
+            setattr(self, name, stats.get(key) if stats else None)
+        for name, value in zip(THINGSPEAK_FIELDS, _thingspeak_ids(channel_data)):
+            setattr(self, name, value)
+
+        if self.compact:
+            # Everything else has been parsed, so drop the rest of the raw data
+            self.channel_data = {key: self.channel_data[key]
+                                 for key in COMPACT_KEYS if key in self.channel_data}
+
+    @property
+    def thingspeak_primary(self) -> Optional[thingspeak.Channel]:
+        """
+        ThingSpeak client for the primary field, or None if the channel has no ThingSpeak data
+        """
+        if self._thingspeak_primary is None and self.tp_primary_channel is not None:
+            self._thingspeak_primary = thingspeak.Channel(
                 id=self.tp_primary_channel, api_key=self.tp_primary_key)
-            self.thingspeak_secondary: Optional[thingspeak.Channel] = thingspeak.Channel(
+        return self._thingspeak_primary
+
+    @property
+    def thingspeak_secondary(self) -> Optional[thingspeak.Channel]:
+        """
+        ThingSpeak client for the secondary field, or None if the channel has no ThingSpeak data
+        """
+        if self._thingspeak_secondary is None and self.tp_secondary_channel is not None:
+            self._thingspeak_secondary = thingspeak.Channel(
                 id=self.tp_secondary_channel, api_key=self.tp_secondary_key)
-        except KeyError:
-            # Doing this prevents a crash until we actually access ThingSpeak data
-            #   which the user may not do
-            self.tp_primary_channel = None
-            self.tp_primary_key = None
-            self.tp_secondary_channel = None
-            self.tp_secondary_key = None
-            self.thingspeak_primary = None
-            self.thingspeak_secondary = None
-
-        # Diagnostic
-        last_seen = self.channel_data.get('LastSeen')
-        if last_seen is not None:
-            self.last_seen: Optional[datetime] = datetime.utcfromtimestamp(
-                int(last_seen))
-        else:
-            self.last_seen = last_seen
-        self.model: Optional[str] = self.channel_data.get('Type')
-        self.adc: Optional[str] = self.channel_data.get('Adc')
-        self.rssi: Optional[str] = self.channel_data.get('RSSI')
-        # pylint: disable=simplifiable-if-expression
-        self.hidden = False if self.channel_data.get(
-            'Hidden') == 'false' else True
-        # pylint: disable=simplifiable-if-expression
-        self.flagged = True if self.channel_data.get('Flag') == 1 else False
-        # pylint: disable=simplifiable-if-expression
-        self.downgraded = True if self.channel_data.get(
-            'A_H') == 'true' else False
-        # Number of minutes old the data is
-        self.age: Optional[int] = self.channel_data.get('AGE')
-        self.brightness: Optional[str] = self.channel_data.get(
-            'DEVICE_BRIGHTNESS')
-        self.hardware: Optional[str] = self.channel_data.get(
-            'DEVICE_HARDWAREDISCOVERED')
-        self.version: Optional[str] = self.channel_data.get('Version')
-        self.last_update_check: Optional[int] = self.channel_data.get(
-            'LastUpdateCheck')
-        self.created: Optional[int] = self.channel_data.get('Created')
-        self.uptime: Optional[int] = self.channel_data.get('Uptime')
-        self.is_owner: Optional[bool] = bool(self.channel_data.get('isOwner'))
+        return self._thingspeak_secondary
+
+    @property
+    def sensor_id(self) -> Optional[int]:
+        """
+        ID of the sensor the channel belongs to, which is the ID of its parent channel
+        """
+        return self.identifier if self.parent is None else self.parent
 
     @property
     def created_date(self):
@@ -160,14 +318,24 @@ class Channel():
 
         Useful for finding out the earliest data point for a given channel
         """
-        url = self._get_thingspeak_url(
+        response = self.transport.get(self._get_created_date_url())
+        return self._parse_created_date(response.content)
+
+    def _get_created_date_url(self) -> str:
+        """
+        Build the URL for the ThingSpeak channel metadata
+        """
+        return self._get_thingspeak_url(
             'primary', start=datetime(
                 1990, 1, 1), end=None, thingspeak_args={
                 'results': 1}, dataformat='json')
 
-        session = CachedSession(expire_after=timedelta(hours=1))
-        response = session.get(url)
-        data = json.loads(response.content)
+    @staticmethod
+    def _parse_created_date(content: bytes) -> datetime:
+        """
+        Read the channel creation date from ThingSpeak channel metadata
+        """
+        data = json.loads(content)
         created_at = datetime.strptime(
             data['channel']['created_at'],
             '%Y-%m-%dT%H:%M:%SZ')
@@ -179,13 +347,20 @@ class Channel():
             start: datetime,
             end: Optional[datetime] = None,
             thingspeak_args: Optional[Dict[str, Any]] = None,
-            dataformat: str = 'csv'):
+            *,
+            dataformat: str = 'csv',
+            columns: Optional[List[str]] = None):
         """
         Build the URL to fetch the thingspeak data
 
         `thingspeak_args` takes an optional list of additional arguments
         to send to the Thingspeak API.
         See here for more details: https://www.mathworks.com/help/thingspeak/readdata.html
+
+        If `columns` names a single column, only that ThingSpeak field is requested. Otherwise
+        every field of the feed is requested: ThingSpeak sends `created_at` and `entry_id`
+        with every field, so a request per column would repeat them in each response and
+        save little or no bandwidth over the whole feed, while making more requests.
         """
 
         if thingspeak_field not in {'primary', 'secondary'}:
@@ -217,22 +392,24 @@ class Channel():
             if key not in thingspeak_args:
                 thingspeak_args[key] = val
 
-        thingspeak_args['start'] = start.strftime("%Y-%m-%d 00:00:00")
+        thingspeak_args['start'] = start.strftime("%Y-%m-%d %H:%M:%S")
         if end:
-            thingspeak_args['end'] = end.strftime("%Y-%m-%d 00:00:00")
+            thingspeak_args['end'] = end.strftime("%Y-%m-%d %H:%M:%S")
 
-        base_url = THINGSPEAK_API_URL.format(
-            channel=channel, dataformat=dataformat)
+        if columns is not None and len(columns) == 1:
+            raw_name = next(raw for raw, name in self._get_columns(thingspeak_field).items()
+                            if name == columns[0])
+            base_url = THINGSPEAK_FIELD_URL.format(
+                channel=channel, field=raw_name[len('field'):], dataformat=dataformat)
+        else:
+            base_url = THINGSPEAK_API_URL.format(
+                channel=channel, dataformat=dataformat)
         return base_url + urlencode(thingspeak_args)
 
-    def _clean_data(self, thingspeak_field: str, data: pd.DataFrame):
+    def _get_columns(self, thingspeak_field: str) -> Dict[str, str]:
         """
-        Cleans up data from the thingspeak API
-
-        * Inserts the correct column names
-        * Sets the index to `entry_id` if it exists
+        Names of the ThingSpeak columns for a field of this channel, by raw column name
         """
-
         if thingspeak_field == 'primary':
             parent_cols = PARENT_PRIMARY_COLS
             child_cols = CHILD_PRIMARY_COLS
@@ -240,39 +417,454 @@ class Channel():
             parent_cols = PARENT_SECONDARY_COLS
             child_cols = CHILD_SECONDARY_COLS
 
-        columns = parent_cols if self.type == 'parent' else child_cols
+        return parent_cols if self.type == 'parent' else child_cols
 
-        data.rename(columns=columns, inplace=True)
-        data['created_at'] = pd.to_datetime(
-            data['created_at'], format='%Y-%m-%d %H:%M:%S %Z')
+    def _get_field_columns(self,
+                           fields: Optional[List[str]],
+                           thingspeak_fields: Tuple[str, ...] = ('primary', 'secondary')
+                           ) -> Dict[str, Optional[List[str]]]:
+        """
+        Columns to request from each of `thingspeak_fields` for the column names in `fields`
+
+        ThingSpeak fields without any of `fields` are left out, so they are not downloaded.
+        If `fields` is `None`, every column is requested, which is marked with `None`.
+        """
+        for thingspeak_field in thingspeak_fields:
+            if thingspeak_field not in {'primary', 'secondary'}:
+                # pylint: disable=line-too-long
+                raise ValueError(
+                    f'Invalid ThingSpeak key: {thingspeak_field}. Must be in {{"primary", "secondary"}}')
+        if fields is None:
+            return {thingspeak_field: None for thingspeak_field in thingspeak_fields}
+
+        # `created_at` and `entry_id` are always included
+        requested = [name for name in dict.fromkeys(fields)
+                     if name not in {'created_at', 'entry_id'}]
+        field_columns: Dict[str, Optional[List[str]]] = {}
+        known: List[str] = []
+        for thingspeak_field in thingspeak_fields:
+            names = [name for name in self._get_columns(thingspeak_field).values()
+                     if name not in {'created_at', 'entry_id'}]
+            known.extend(names)
+            columns = [name for name in requested if name in names]
+            if columns:
+                field_columns[thingspeak_field] = columns
 
+        unknown = [name for name in requested if name not in known]
+        if unknown or not field_columns:
+            raise ValueError(f'Invalid fields: {unknown or fields}. Must be in {known}')
+        return field_columns
+
+    @staticmethod
+    def _select_columns(data: pd.DataFrame, columns: Optional[List[str]]) -> pd.DataFrame:
+        """
+        Keep only `created_at` and `columns` of cleaned data, or every column if it is `None`
+        """
+        if columns is None:
+            return data
+        return data[['created_at'] + columns]
+
+    @staticmethod
+    def _get_resolution(resolution: Optional[Union[str, timedelta]],
+                        thingspeak_args: Optional[Dict[str, Any]]
+                        ) -> Tuple[Optional[pd.Timedelta], Optional[Dict[str, Any]]]:
+        """
+        Ask ThingSpeak to average data to `resolution`, if it is one of `THINGSPEAK_AVERAGES`
+
+        Returns the resolution that has to be resampled locally instead, or `None`, along
+        with the ThingSpeak arguments to send.
+        """
+        if resolution is None:
+            return None, thingspeak_args
         try:
-            data.index = data.pop('entry_id')
+            interval = pd.Timedelta(resolution)
+        except ValueError as err:
+            raise ValueError(
+                f'Invalid resolution: {resolution}. Must be a positive time interval') from err
+        if interval <= pd.Timedelta(0):
+            raise ValueError(
+                f'Invalid resolution: {resolution}. Must be a positive time interval')
+        aggregations = sorted({'average', 'median', 'sum', 'timescale'}.intersection(
+            thingspeak_args or {}))
+        if aggregations:
+            raise ValueError(
+                f'Invalid thingspeak_args: {aggregations} cannot be combined with resolution')
+        minutes = interval / pd.Timedelta(minutes=1)
+        if minutes in THINGSPEAK_AVERAGES:
+            return None, dict(thingspeak_args or {}, average=int(minutes))
+        return interval, thingspeak_args
+
+    @staticmethod
+    def _resample(data: pd.DataFrame, resolution: Optional[pd.Timedelta]) -> pd.DataFrame:
+        """
+        Average cleaned data over windows of `resolution`, labelled by their start
+
+        Windows start at midnight UTC, and windows without any readings are left out.
+        """
+        if resolution is None:
+            return data
+        return data.resample(resolution, on='created_at').mean().dropna(how='all').reset_index()
+
+    def _csv_options(self, thingspeak_field: str) -> Dict[str, Any]:
+        """
+        Options for `pd.read_csv()` that parse ThingSpeak data for a field with explicit types
+
+        Only known columns are parsed, and `created_at` is kept as text for `_clean_data()`.
+        """
+        columns = self._get_columns(thingspeak_field)
+        dtypes: Dict[str, Any] = {'created_at': str}
+        for raw_name, name in columns.items():
+            if name in COLUMN_DTYPES:
+                dtypes[raw_name] = COLUMN_DTYPES[name]
+        return {'usecols': columns.__contains__, 'dtype': dtypes}
+
+    @staticmethod
+    def _parse_created_at(created_at: pd.Series) -> pd.Series:
+        """
+        Parse ThingSpeak timestamps, which are in UTC unless another timezone was requested
+        """
+        if created_at.str.endswith(' UTC').all():
+            # Much faster than parsing the timezone name in every row
+            return pd.to_datetime(created_at.str.slice(0, 19),
+                                  format='%Y-%m-%d %H:%M:%S', utc=True)
+        return pd.to_datetime(created_at, format='%Y-%m-%d %H:%M:%S %Z')
+
+    def _clean_data(self, thingspeak_field: str, data: pd.DataFrame):
+        """
+        Cleans up data from the thingspeak API
+
+        * Inserts the correct column names
+        * Sets the index to `entry_id` if it exists
+        """
+        data.rename(columns=self._get_columns(thingspeak_field), inplace=True)
+        data['created_at'] = self._parse_created_at(data['created_at'])
+
+        try:
+            entry_id = data.pop('entry_id')
         except KeyError:
             # entry_id isn't always present. E.g. if you use
             # timescale='nonstandard'
-            pass
+            return data
+        # Averaged data has an empty entry_id
+        if len(entry_id) == 0 or entry_id.notna().any():
+            data.index = entry_id
         return data
 
+    def _read_csv(self, download: Tuple[str, str]) -> pd.DataFrame:
+        """
+        Download and parse the CSV data for a `(thingspeak_field, url)` pair
+        """
+        thingspeak_field, url = download
+        return self.transport.read_csv(url, **self._csv_options(thingspeak_field))
+
+    def _read_csvs(self,
+                   downloads: List[Tuple[str, str]],
+                   max_workers: int = 1) -> List[pd.DataFrame]:
+        """
+        Download each `(thingspeak_field, url)` pair, returning DataFrames in the same order
+
+        If `max_workers` is greater than 1, up to that many requests are made concurrently.
+        """
+        if max_workers < 1:
+            raise ValueError(
+                f'Invalid max_workers: {max_workers}. Must be at least 1')
+        if max_workers == 1 or len(downloads) <= 1:
+            return [self._read_csv(download) for download in downloads]
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(downloads))) as executor:
+            # `map` yields results in submission order, regardless of completion order
+            return list(executor.map(self._read_csv, downloads))
+
+    @staticmethod
+    def _get_weekly_windows(weeks_to_get: int, start_date: datetime) -> List[TimeRange]:
+        """
+        Start and end of each week up to weeks_to_get weeks in the past, most recent first
+        """
+        to_week = start_date - timedelta(weeks=1)
+        windows = []
+        for _ in range(weeks_to_get):
+            start_date = to_week  # DateTimes are immutable so this reference is not a problem
+            to_week = to_week - timedelta(weeks=1)
+            windows.append((to_week, start_date))
+        return windows
+
+    @staticmethod
+    def _get_range_windows(start_date: datetime,
+                           end_date: datetime,
+                           chunk: timedelta = timedelta(weeks=1)) -> List[TimeRange]:
+        """
+        Start and end of each `chunk` sized window from start_date to end_date, oldest first
+        """
+        windows = []
+        window_start = start_date
+        while window_start < end_date:
+            window_end = min(window_start + chunk, end_date)
+            windows.append((window_start, window_end))
+            window_start = window_end
+        return windows
+
+    def _plan_download(self,
+                       windows: List[TimeRange],
+                       thingspeak_args: Optional[Dict[str, Any]],
+                       field_columns: Dict[str, Optional[List[str]]]) -> ChunkedDownload:
+        """
+        Plan the download of each window for each ThingSpeak field in `field_columns`
+
+        Windows are rounded down to whole days, and split into ranges sized from the rows
+        ThingSpeak is expected to send each day before they are requested. A range with more
+        readings than ThingSpeak sends in one response is split again from their density.
+        """
+        days = [(floor_day(start), floor_day(end)) for start, end in windows]
+        return ChunkedDownload(
+            {thingspeak_field: days for thingspeak_field in field_columns},
+            lambda thingspeak_field, start, end: self._get_thingspeak_url(
+                thingspeak_field, start, end, thingspeak_args,
+                columns=field_columns[thingspeak_field]),
+            expected_rows_per_day(thingspeak_args))
+
+    def _download(self,
+                  windows: List[TimeRange],
+                  thingspeak_args: Optional[Dict[str, Any]],
+                  field_columns: Dict[str, Optional[List[str]]],
+                  max_workers: int = 1) -> Dict[str, List[pd.DataFrame]]:
+        """
+        Download the raw data for each window for each ThingSpeak field in `field_columns`
+
+        Each round of requests is made with up to `max_workers` at once, until no response
+        was truncated.
+        """
+        download = self._plan_download(windows, thingspeak_args, field_columns)
+        while not download.done:
+            chunks = download.take()
+            data = self._read_csvs([(chunk.thingspeak_field, url) for chunk, url in chunks],
+                                   max_workers)
+            for (chunk, _), chunk_data in zip(chunks, data):
+                download.receive(chunk, chunk_data)
+        return download.frames()
+
+    def _combine_weeks(self,
+                       thingspeak_field: str,
+                       weekly_data: List[pd.DataFrame],
+                       columns: Optional[List[str]] = None,
+                       resolution: Optional[pd.Timedelta] = None) -> pd.DataFrame:
+        """
+        Concatenate and clean the raw weekly DataFrames for a ThingSpeak field, oldest first
+
+        Rows sent for two adjacent ranges are only kept once.
+        """
+        data = self._clean_data(
+            thingspeak_field, pd.DataFrame(pd.concat(weekly_data, ignore_index=True)))
+        if data.index.name == 'entry_id':
+            data = data[~data.index.duplicated()]
+        # Weeks may be downloaded most recent first, but the data is returned oldest first
+        data = self._sort_by_time(data)
+        return self._resample(self._select_columns(data, columns), resolution)
+
+    def _combine_all_weeks(self,
+                           weekly_data: Dict[str, List[pd.DataFrame]],
+                           field_columns: Dict[str, Optional[List[str]]],
+                           resolution: Optional[pd.Timedelta] = None) -> pd.DataFrame:
+        """
+        Clean and merge the raw weekly DataFrames downloaded for each ThingSpeak field
+
+        Each ThingSpeak field is limited to its `field_columns` and resampled to `resolution`.
+        """
+        return self._merge_all_fields({
+            field: self._combine_weeks(field, data, field_columns[field], resolution)
+            for field, data in weekly_data.items()})
+
+    @staticmethod
+    def _sort_by_time(data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Sort cleaned data by `created_at`, without copying it if it is already sorted
+        """
+        if data['created_at'].is_monotonic_increasing:
+            return data
+        return data.sort_values('created_at', kind='stable')
+
+    def _merge_fields(self, primary: pd.DataFrame, secondary: pd.DataFrame) -> pd.DataFrame:
+        """
+        Combine cleaned primary and secondary data into a single DataFrame
+
+        The two feeds are not written at exactly the same time, so each primary reading
+        is matched with the nearest secondary reading within `merge_tolerance` in one
+        pass over both sorted feeds. Each secondary reading is only kept for the primary
+        reading nearest to it. Primary readings without a match keep missing secondary
+        values rather than being dropped.
+        """
+        secondary = self._sort_by_time(secondary).reset_index(drop=True)
+        secondary_columns = [column for column in secondary.columns if column != 'created_at']
+        merged = pd.merge_asof(
+            self._sort_by_time(primary).reset_index(drop=True),
+            secondary.assign(_secondary_row=secondary.index,
+                             _secondary_time=secondary['created_at']),
+            on='created_at', direction='nearest', tolerance=self.merge_tolerance)
+
+        # A secondary reading can be the nearest to several primary readings
+        matched = merged.pop('_secondary_row')
+        distance = (merged.pop('_secondary_time') - merged['created_at']).abs()
+        nearest = distance.groupby(matched).transform('idxmin')
+        repeated = matched.notna() & (nearest != merged.index)
+        if repeated.any():
+            merged.loc[repeated, secondary_columns] = None
+        return merged
+
+    def _merge_all_fields(self, frames: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        """
+        Combine the cleaned data of each ThingSpeak field that was downloaded
+        """
+        if len(frames) == 1:
+            return next(iter(frames.values()))
+        return self._merge_fields(frames['primary'], frames['secondary'])
+
+    def _uses_store(self, thingspeak_args: Optional[Dict[str, Any]]) -> bool:
+        """
+        Whether historical data is read through `store`
+
+        Data requested with `thingspeak_args`, including a `resolution` that ThingSpeak
+        averages, is never stored, since it may be averaged or rounded differently.
+        """
+        return self.store is not None and not thingspeak_args \
+            and self.identifier is not None
+
+    def _read_stored(self,
+                     thingspeak_field: str,
+                     windows: List[TimeRange],
+                     columns: Optional[List[str]] = None,
+                     resolution: Optional[pd.Timedelta] = None) -> pd.DataFrame:
+        """
+        Read `columns`, or every column, of each window from `store`, oldest
+        first, then resample them to `resolution`
+        """
+        store = cast(HistoricalStore, self.store)
+        identifier = cast(int, self.identifier)
+        data = pd.concat([store.read(identifier, thingspeak_field, start, end, columns)
+                          for start, end in sorted(windows)])
+        if 'created_at' not in data:
+            # Nothing has been stored for this channel, so build an empty DataFrame
+            data = self._select_columns(self._clean_data(thingspeak_field, pd.DataFrame(
+                columns=list(PARENT_PRIMARY_COLS))), columns)
+        return self._resample(data, resolution)
+
+    def _get_stored(self,
+                    thingspeak_field: str,
+                    windows: List[TimeRange],
+                    max_workers: int = 1,
+                    columns: Optional[List[str]] = None,
+                    resolution: Optional[pd.Timedelta] = None) -> pd.DataFrame:
+        """
+        Read each window from `store`, downloading only what it is missing
+
+        Windows are rounded down to whole days, like the dates sent to ThingSpeak. Every
+        column is downloaded and stored, but only `columns` are read back, if given, and
+        then resampled to `resolution`.
+        """
+        store = cast(HistoricalStore, self.store)
+        windows = [(floor_day(start), floor_day(end)) for start, end in windows]
+
+        def download(gaps: List[TimeRange]) -> pd.DataFrame:
+            gap_windows = [window for gap_start, gap_end in gaps
+                           for window in self._get_range_windows(gap_start, gap_end)]
+            data = self._download(gap_windows, None, {thingspeak_field: None}, max_workers)
+            return self._combine_weeks(thingspeak_field, data[thingspeak_field])
+
+        store.sync(cast(int, self.identifier), thingspeak_field,
+                   min(start for start, _ in windows),
+                   max(end for _, end in windows), download)
+        return self._read_stored(thingspeak_field, windows, columns, resolution)
+
+    def _plan_stored_download(self,
+                              start_date: datetime,
+                              end_date: datetime,
+                              thingspeak_fields: Tuple[str, ...]) -> ChunkedDownload:
+        """
+        Plan the download of every column of the days `store` is missing,
+        one week at a time, for each ThingSpeak field
+
+        The data is saved with `_store_download()` once it has been downloaded.
+        """
+        store = cast(HistoricalStore, self.store)
+        identifier = cast(int, self.identifier)
+        start, end = floor_day(start_date), floor_day(end_date)
+        return ChunkedDownload(
+            {thingspeak_field: [(floor_day(window_start), floor_day(window_end))
+                                for gap_start, gap_end in store.missing(
+                                    identifier, thingspeak_field, start, end)
+                                for window_start, window_end in self._get_range_windows(
+                                    gap_start, gap_end)]
+             for thingspeak_field in thingspeak_fields},
+            self._get_thingspeak_url, expected_rows_per_day(None))
+
+    def _store_download(self,
+                        start_date: datetime,
+                        end_date: datetime,
+                        field_columns: Dict[str, Optional[List[str]]],
+                        resolution: Optional[pd.Timedelta],
+                        weekly_data: Dict[str, List[pd.DataFrame]]) -> pd.DataFrame:
+        """
+        Save the data downloaded for `_plan_stored_download()` in `store`, then
+        read the fields in `field_columns` back from it
+        """
+        store = cast(HistoricalStore, self.store)
+        identifier = cast(int, self.identifier)
+        start, end = floor_day(start_date), floor_day(end_date)
+        for thingspeak_field, data in weekly_data.items():
+            gaps = store.missing(identifier, thingspeak_field, start, end)
+            # Nothing was downloaded if the field was already stored when it was planned
+            if data and gaps:
+                store.append(identifier, thingspeak_field,
+                             self._combine_weeks(thingspeak_field, data), gaps)
+        return self._merge_all_fields({
+            thingspeak_field: self._read_stored(thingspeak_field, [(start, end)], columns,
+                                                resolution)
+            for thingspeak_field, columns in field_columns.items()})
+
+    def _get_all_stored(self,
+                        windows: List[TimeRange],
+                        max_workers: int = 1,
+                        field_columns: Optional[Dict[str, Optional[List[str]]]] = None,
+                        resolution: Optional[pd.Timedelta] = None) -> pd.DataFrame:
+        """
+        Read the fields in `field_columns`, or both, for each window from `store`
+        """
+        field_columns = field_columns if field_columns is not None \
+            else self._get_field_columns(None)
+        return self._merge_all_fields({
+            field: self._get_stored(field, windows, max_workers, columns, resolution)
+            for field, columns in field_columns.items()})
+
     def get_all_historical(self,
                            weeks_to_get: int,
                            start_date: datetime = datetime.now(),
-                           thingspeak_args: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+                           thingspeak_args: Optional[Dict[str, Any]] = None,
+                           *,
+                           max_workers: int = 1,
+                           fields: Optional[List[str]] = None,
+                           resolution: Optional[Union[str, timedelta]] = None) -> pd.DataFrame:
         """
         Get all data (both primary and secondary) from the ThingSpeak API in weekly increments
 
+        If `max_workers` is greater than 1, the weeks for both fields are downloaded concurrently.
+        If `fields` is given, only those columns are kept, along with `created_at`.
+        If `resolution` is given, the data is averaged over windows of that length. The
+        `store` is used like in `get_historical()`.
         """
-
-        primary = self.get_historical(
-            weeks_to_get, 'primary', start_date, thingspeak_args)
-        secondary = self.get_historical(
-            weeks_to_get, 'secondary', start_date, thingspeak_args)
-        return pd.merge(primary, secondary, how='inner', on='created_at')
+        field_columns = self._get_field_columns(fields)
+        local_resolution, thingspeak_args = self._get_resolution(resolution, thingspeak_args)
+        if self._uses_store(thingspeak_args):
+            return self._get_all_stored(self._get_weekly_windows(weeks_to_get, start_date),
+                                        max_workers, field_columns, local_resolution)
+        windows = self._get_weekly_windows(weeks_to_get, start_date)
+        weekly_data = self._download(windows, thingspeak_args, field_columns, max_workers)
+        return self._combine_all_weeks(weekly_data, field_columns, local_resolution)
 
     def get_all_historical_between(self,
                                    start_date: datetime,
                                    end_date: datetime = datetime.now(),
-                                   thingspeak_args: Optional[Dict[str, Any]] = None
+                                   thingspeak_args: Optional[Dict[str, Any]] = None,
+                                   *,
+                                   max_workers: int = 1,
+                                   fields: Optional[List[str]] = None,
+                                   resolution: Optional[Union[str, timedelta]] = None
                                    ) -> pd.DataFrame:
         """
         Get all data (both primary and secondary) from the ThingSpeak API between two dates
@@ -281,56 +873,165 @@ class Channel():
         a long time to download. In these situations, get_historical (by week)
         may be a better option.
 
+        If `max_workers` is greater than 1, both fields are downloaded concurrently.
+        If `fields` is given, only those columns are kept, along with `created_at`.
+        If `resolution` is given, the data is averaged over windows of that length, and
+        downloaded one week at a time. The `store` is used like in `get_historical_between()`.
         """
-        primary = self.get_historical_between(
-            'primary', start_date, end_date, thingspeak_args)
-        secondary = self.get_historical_between(
-            'secondary', start_date, end_date, thingspeak_args)
-        return pd.merge(primary, secondary, how='inner', on='created_at')
+        field_columns = self._get_field_columns(fields)
+        local_resolution, thingspeak_args = self._get_resolution(resolution, thingspeak_args)
+        if self._uses_store(thingspeak_args):
+            return self._get_all_stored([(start_date, end_date)], max_workers,
+                                        field_columns, local_resolution)
+        windows = self._get_range_windows(start_date, end_date) if resolution is not None \
+            else [(start_date, end_date)]
+        weekly_data = self._download(windows, thingspeak_args, field_columns, max_workers)
+        return self._combine_all_weeks(weekly_data, field_columns, local_resolution)
 
     def get_historical_between(self,
                                thingspeak_field: str,
                                start_date: datetime,
                                end_date: datetime = datetime.now(),
-                               thingspeak_args=None) -> pd.DataFrame:
+                               thingspeak_args=None,
+                               *,
+                               fields: Optional[List[str]] = None,
+                               resolution: Optional[Union[str, timedelta]] = None
+                               ) -> pd.DataFrame:
         """
         Get data from the ThingSpeak API in one go between two dates.
 
         WARNING: For huge date ranges, this may be a large dataset, and take
-        a long time to download. In these situations, get_historical (by week)
-        may be a better option.
+        a long time to download. If ThingSpeak truncates the response, the rest of
+        the range is split into as few requests as its density allows. If the channel
+        has a `store`, only the days it is missing are downloaded, unless `thingspeak_args`
+        are given or ThingSpeak averages the `resolution`, which bypass the store. If `fields`
+        is given, only those columns are kept, along with `created_at`. If
+        `resolution` is given, the data is averaged over windows of that length, and
+        downloaded one week at a time.
         """
+        field_columns = self._get_field_columns(fields, (thingspeak_field,))
+        local_resolution, thingspeak_args = self._get_resolution(resolution, thingspeak_args)
+        if self._uses_store(thingspeak_args):
+            return self._get_stored(thingspeak_field, [(start_date, end_date)],
+                                    columns=field_columns[thingspeak_field],
+                                    resolution=local_resolution)
 
-        url = self._get_thingspeak_url(
-            thingspeak_field,
-            start_date,
-            end_date,
-            thingspeak_args)
-        return self._clean_data(thingspeak_field, pd.read_csv(url))
+        windows = self._get_range_windows(start_date, end_date) if resolution is not None \
+            else [(start_date, end_date)]
+        weekly_data = self._download(windows, thingspeak_args, field_columns)
+        return self._combine_all_weeks(weekly_data, field_columns, local_resolution)
 
     def get_historical(self,
                        weeks_to_get: int,
                        thingspeak_field: str,
                        start_date: datetime = datetime.now(),
-                       thingspeak_args: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+                       thingspeak_args: Optional[Dict[str, Any]] = None,
+                       *,
+                       max_workers: int = 1,
+                       fields: Optional[List[str]] = None,
+                       resolution: Optional[Union[str, timedelta]] = None) -> pd.DataFrame:
         """
         Get data from the ThingSpeak API one week at a time up to weeks_to_get weeks in the past.
+
+        If `max_workers` is greater than 1, up to that many weeks are downloaded concurrently.
+        The weeks are reassembled in the same order as a sequential download. Weeks with
+        more readings than ThingSpeak sends in one response are split further.
+
+        If the channel has a `store`, only the days it is missing are downloaded, unless
+        `thingspeak_args` are given or ThingSpeak averages the `resolution`, which bypass
+        the store. If `fields` is given, only those columns are kept, along with
+        `created_at`; a single column is downloaded on its own, but several columns are
+        taken from the whole feed. If `resolution` is given, the data is averaged over
+        windows of that length.
         """
-        to_week = start_date - timedelta(weeks=1)
-        weekly_data = []
-        while weeks_to_get > 0:
-            for _ in range(weeks_to_get):
-                start_date = to_week  # DateTimes are immutable so this reference is not a problem
-                to_week = to_week - timedelta(weeks=1)
-                url = self._get_thingspeak_url(
-                    thingspeak_field, to_week, start_date, thingspeak_args)
-                weekly_data.append(pd.read_csv(url))
-                weeks_to_get -= 1
-
-        weekly_data_df = pd.DataFrame(pd.concat(weekly_data))
+        field_columns = self._get_field_columns(fields, (thingspeak_field,))
+        local_resolution, thingspeak_args = self._get_resolution(resolution, thingspeak_args)
+        windows = self._get_weekly_windows(weeks_to_get, start_date)
+        if self._uses_store(thingspeak_args):
+            return self._get_stored(thingspeak_field, windows, max_workers,
+                                    field_columns[thingspeak_field], local_resolution)
+        weekly_data = self._download(windows, thingspeak_args, field_columns, max_workers)
 
         # Handle formatting the DataFrame column names
-        return self._clean_data(thingspeak_field, weekly_data_df)
+        return self._combine_all_weeks(weekly_data, field_columns, local_resolution)
+
+    def _iter_download(self,
+                       download: ChunkedDownload,
+                       thingspeak_field: str,
+                       columns: Optional[List[str]],
+                       max_workers: int,
+                       chronological: bool) -> Iterator[pd.DataFrame]:
+        """
+        Yield the cleaned data of each chunk of a download as it is received
+
+        New requests are only made as data is consumed, up to `max_workers` at once, so
+        later ranges are sized from the density of the data received so far.
+        """
+        jobs: Dict[Future, Chunk] = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            try:
+                while True:
+                    for chunk, url in download.take(max_workers - len(jobs)):
+                        jobs[executor.submit(self._read_csv, (thingspeak_field, url))] = chunk
+                    if not jobs:
+                        return
+                    finished, _ = wait(jobs, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        download.receive(jobs.pop(future), future.result())
+                    for chunk in download.pop_received(in_order=chronological):
+                        data = rows_in_range(chunk)
+                        if not data.empty:
+                            yield self._select_columns(
+                                self._clean_data(thingspeak_field, data.copy()), columns)
+            finally:
+                # Stop scheduling work if the caller stops early or a request failed
+                for future in jobs:
+                    future.cancel()
+
+    def iter_historical(self,
+                        thingspeak_field: str,
+                        start_date: datetime,
+                        end_date: Optional[datetime] = None,
+                        *,
+                        thingspeak_args: Optional[Dict[str, Any]] = None,
+                        max_workers: int = 1,
+                        fields: Optional[List[str]] = None,
+                        chronological: bool = True) -> Iterator[pd.DataFrame]:
+        """
+        Yield cleaned data from the ThingSpeak API between two dates, one range at a time
+
+        The range is downloaded one week at a time, split further if ThingSpeak truncates
+        a response, with at most `max_workers` requests at once, so only a few weeks are
+        held in memory. If `chronological` is true, data is yielded oldest first;
+        otherwise each range is yielded as soon as it is downloaded. Every row is yielded
+        once. The historical store is not used.
+        """
+        if max_workers < 1:
+            raise ValueError(
+                f'Invalid max_workers: {max_workers}. Must be at least 1')
+        end_date = end_date if end_date is not None else datetime.now()
+        field_columns = self._get_field_columns(fields, (thingspeak_field,))
+        download = self._plan_download(self._get_range_windows(start_date, end_date),
+                                       thingspeak_args, field_columns)
+        return self._iter_download(download, thingspeak_field, field_columns[thingspeak_field],
+                                   max_workers, chronological)
+
+    def open_historical(self,
+                        thingspeak_field: str,
+                        start_date: datetime,
+                        end_date: Optional[datetime] = None,
+                        columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Read data saved in `store` without downloading or parsing it
+
+        The stored files are memory-mapped, so only `columns` and the rows from
+        `start_date` up to `end_date`, or now, are read from disk.
+        """
+        if self.store is None:
+            raise ValueError(
+                'No historical store was given to this channel!')
+        return self.store.read(cast(int, self.identifier), thingspeak_field, start_date,
+                               end_date if end_date is not None else datetime.now(), columns)
 
     def as_dict(self) -> dict:
         """
@@ -411,3 +1112,69 @@ class Channel():
         """
         child_string = f', child of {self.parent}' if self.parent is not None else ''
         return f"Sensor {self.identifier}{child_string}"
+
+
+class LazyChannel(Channel):
+    """
+    Channel that parses each attribute in `FIELDS` the first time it is read
+
+    Creating a lazy channel does no parsing at all, and parsed attributes are cached in
+    the same slots as `Channel`. Lazy channels need the raw data, so they cannot be compact.
+    """
+
+    __slots__ = ()
+
+    def __init__(self,
+                 channel_data: dict,
+                 transport: Optional[Transport] = None,
+                 compact: bool = False,
+                 *,
+                 store: Optional[HistoricalStore] = None):
+        if compact:
+            raise ValueError(
+                'Lazy channels need the raw data, so they cannot be compact!')
+        super().__init__(channel_data, transport, store=store)
+
+    def update(self, channel_data: dict) -> None:
+        """
+        Replace the channel data in place, forgetting every parsed attribute
+        """
+        for name in FIELDS:
+            try:
+                delattr(self, name)
+            except AttributeError:
+                pass
+        super().update(channel_data)
+
+    def _setup(self) -> None:
+        """
+        Nothing is parsed until it is read
+        """
+        self._thingspeak_primary = None
+        self._thingspeak_secondary = None
+
+    def __getattr__(self, name: str) -> Any:
+        """
+        Parse an attribute that has not been parsed yet and cache it
+        """
+        # Only called when normal lookup fails, i.e. the slot is empty
+        if name not in _FIELD_SET:
+            raise AttributeError(
+                f"'{type(self).__name__}' object has no attribute '{name}'")
+        value = self._parse_field(name)
+        setattr(self, name, value)
+        return value
+
+    def _parse_field(self, name: str) -> Any:
+        """
+        Parse a single attribute from the raw channel data
+        """
+        if name in FLOAT_FIELDS:
+            return self._safe_float(FLOAT_FIELDS[name])
+        if name in RAW_FIELDS:
+            return self.channel_data.get(RAW_FIELDS[name])
+        if name in STATS_FIELDS:
+            return self.pm2_5stats.get(STATS_FIELDS[name]) if self.pm2_5stats else None
+        if name in THINGSPEAK_FIELDS:
+            return _thingspeak_ids(self.channel_data)[THINGSPEAK_FIELDS.index(name)]
+        return DERIVED_FIELDS[name](self)
@@ -0,0 +1,226 @@
+"""
+Splitting ThingSpeak downloads around the row limit of each response
+"""
+
+import math
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from .api_data import THINGSPEAK_ROW_LIMIT
+from .store import TimeRange
+
+# Fraction of the row limit that split ranges are sized to, leaving room for denser data
+FILL_FACTOR = 0.9
+
+# Time between the readings a sensor sends to ThingSpeak
+SENSOR_INTERVAL = timedelta(minutes=2)
+
+# ThingSpeak arguments that send one row per window of minutes instead of every reading
+AGGREGATIONS = ('average', 'median', 'sum', 'timescale')
+
+
+# pylint: disable=too-few-public-methods
+class Chunk():
+    """
+    A time range of a ThingSpeak field, and the raw data downloaded for it
+    """
+
+    __slots__ = ('thingspeak_field', 'start', 'end', 'data')
+
+    def __init__(self, thingspeak_field: str, start: datetime, end: datetime):
+        self.thingspeak_field = thingspeak_field
+        self.start = start
+        self.end = end
+        self.data: Optional[pd.DataFrame] = None
+
+
+def row_time(data: pd.DataFrame, position: int) -> datetime:
+    """
+    Time of a row of raw ThingSpeak data, in the timezone of the requested range
+    """
+    return datetime.strptime(data['created_at'].iloc[position][:19], '%Y-%m-%d %H:%M:%S')
+
+
+def rows_in_range(chunk: Chunk) -> pd.DataFrame:
+    """
+    Raw data of a chunk without rows at its end, which the next chunk also starts with
+    """
+    data = chunk.data if chunk.data is not None else pd.DataFrame()
+    if data.empty:
+        return data
+    # Fixed width timestamps sort the same as text
+    end = chunk.end.strftime('%Y-%m-%d %H:%M:%S')
+    return data[data['created_at'].str.slice(0, 19) < end]
+
+
+def expected_rows_per_day(thingspeak_args: Optional[Dict[str, Any]]) -> Optional[float]:
+    """
+    Rows ThingSpeak is expected to send for each day of a range requested with `thingspeak_args`
+
+    Every reading is sent unless ThingSpeak aggregates the data, which gives one row per
+    window. `None` is returned if the window is not known.
+    """
+    for key in AGGREGATIONS:
+        window = (thingspeak_args or {}).get(key)
+        if window in (None, ''):
+            continue
+        if window == 'daily':
+            return 1.0
+        try:
+            return timedelta(days=1) / timedelta(minutes=float(window))
+        except (TypeError, ValueError, ZeroDivisionError):
+            return None
+    return timedelta(days=1) / SENSOR_INTERVAL
+
+
+def row_density(data: pd.DataFrame) -> Optional[float]:
+    """
+    Rows per day of raw ThingSpeak data, or `None` if its rows do not span any time
+    """
+    if len(data) < 2:
+        return None
+    covered = (row_time(data, -1) - row_time(data, 0)) / timedelta(days=1)
+    return len(data) / covered if covered > 0 else None
+
+
+def split_range(chunk: Chunk, density: float) -> List[Chunk]:
+    """
+    Chunks covering a chunk, each expected to fill at most `FILL_FACTOR` of the row limit
+    at `density` rows per day
+    """
+    days = (chunk.end - chunk.start) / timedelta(days=1)
+    count = max(math.ceil(days * density / (THINGSPEAK_ROW_LIMIT * FILL_FACTOR)), 1)
+    size = timedelta(seconds=math.ceil((chunk.end - chunk.start).total_seconds() / count))
+    starts = [chunk.start + size * i for i in range(count)]
+    return [Chunk(chunk.thingspeak_field, start, min(start + size, chunk.end))
+            for start in starts if start < chunk.end]
+
+
+def split_truncated(chunk: Chunk) -> List[Chunk]:
+    """
+    Chunks covering the part of a chunk older than its data, if the response was truncated
+
+    ThingSpeak sends the most recent `THINGSPEAK_ROW_LIMIT` rows of a range that has
+    more, so the range before the first row is missing. It is split into chunks sized
+    from the density of the rows that were received.
+    """
+    data = chunk.data
+    if data is None or len(data) < THINGSPEAK_ROW_LIMIT:
+        return []
+    first = row_time(data, 0)
+    if first <= chunk.start:
+        return []
+    missing = Chunk(chunk.thingspeak_field, chunk.start, first)
+    density = row_density(data)
+    if density is None:
+        # Readings in the same second give no density, so halve the range instead
+        density = 2 * THINGSPEAK_ROW_LIMIT * FILL_FACTOR / \
+            ((first - chunk.start) / timedelta(days=1))
+    return split_range(missing, density)
+
+
+class ChunkedDownload():
+    """
+    Downloads of time ranges for each ThingSpeak field, split until no response is truncated
+
+    `get_url` builds the URL for a ThingSpeak field from a start and end time. Each
+    round of requests is taken with `take()` and its data handed back with `receive()`,
+    which splits the ranges that were truncated into new requests, until `done`. Rows
+    at the edges of ranges may be sent twice, and should be deduplicated by `entry_id`.
+
+    If `rows_per_day` is given, each window is split into chunks that fit the row limit
+    at that density when it is taken, so most ranges need a single round of requests.
+    The density is then updated from each chunk that is received, and used for the
+    windows that have not been taken yet.
+    """
+
+    def __init__(self,
+                 windows: Dict[str, List[TimeRange]],
+                 get_url: Callable[[str, datetime, datetime], str],
+                 rows_per_day: Optional[float] = None):
+        self._get_url = get_url
+        self.rows_per_day = rows_per_day
+        # Chunks of each window, oldest first, for each ThingSpeak field
+        self._windows = {thingspeak_field: [[Chunk(thingspeak_field, start, end)]
+                                            for start, end in field_windows]
+                         for thingspeak_field, field_windows in windows.items()}
+        # Whole windows that have not been split yet, with the chunks to request
+        self._unsized: List[List[Chunk]] = [
+            window for field_windows in self._windows.values() for window in field_windows]
+        self._untaken: List[Tuple[List[Chunk], Chunk]] = []
+        self._taken: Dict[int, Tuple[List[Chunk], Chunk]] = {}
+
+    @property
+    def done(self) -> bool:
+        """
+        Whether every chunk has been downloaded
+        """
+        return not self._unsized and not self._untaken and not self._taken
+
+    def _size(self, window: List[Chunk]) -> None:
+        """
+        Split a whole window into chunks that fit the row limit at `rows_per_day`
+        """
+        if self.rows_per_day is not None:
+            window[:] = split_range(window[0], self.rows_per_day)
+        self._untaken.extend((window, chunk) for chunk in window)
+
+    def take(self, limit: Optional[int] = None) -> List[Tuple[Chunk, str]]:
+        """
+        Each chunk that has not been requested yet, or the oldest `limit` of them, with its URL
+
+        Truncated ranges are taken before windows that have not been started.
+        """
+        taken: List[Tuple[Chunk, str]] = []
+        while limit is None or len(taken) < limit:
+            if not self._untaken and self._unsized:
+                self._size(self._unsized.pop(0))
+            if not self._untaken:
+                break
+            window, chunk = self._untaken.pop(0)
+            self._taken[id(chunk)] = (window, chunk)
+            taken.append((chunk, self._get_url(chunk.thingspeak_field, chunk.start, chunk.end)))
+        return taken
+
+    def receive(self, chunk: Chunk, data: pd.DataFrame) -> None:
+        """
+        Save the raw data downloaded for a chunk, splitting what is missing if it was truncated
+        """
+        window, chunk = self._taken.pop(id(chunk))
+        chunk.data = data
+        density = row_density(data)
+        if self.rows_per_day is not None and density is not None:
+            self.rows_per_day = density
+        missing = split_truncated(chunk)
+        position = window.index(chunk)
+        window[position:position] = missing
+        self._untaken[0:0] = [(window, missing_chunk) for missing_chunk in missing]
+
+    def pop_received(self, in_order: bool = False) -> List[Chunk]:
+        """
+        Remove and return the chunks whose data has been received
+
+        If `in_order` is true, a chunk is only returned once every earlier chunk of its
+        ThingSpeak field has been received, so chunks are returned oldest first and a
+        truncated chunk waits for the rest of its range.
+        """
+        popped: List[Chunk] = []
+        for field_windows in self._windows.values():
+            blocked = False
+            for window in field_windows:
+                kept: List[Chunk] = []
+                for chunk in window:
+                    blocked = blocked or (in_order and chunk.data is None)
+                    (kept if blocked or chunk.data is None else popped).append(chunk)
+                window[:] = kept
+        return popped
+
+    def frames(self) -> Dict[str, List[pd.DataFrame]]:
+        """
+        The raw data of each ThingSpeak field, in the order of its windows
+        """
+        return {thingspeak_field: [chunk.data for window in field_windows for chunk in window
+                                   if chunk.data is not None]
+                for thingspeak_field, field_windows in self._windows.items()}
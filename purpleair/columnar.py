@@ -0,0 +1,250 @@
+"""
+Columnar representation of sensor network data
+"""
+
+import json
+from collections.abc import Sequence
+from typing import Any, List, Optional, Type
+
+import pandas as pd
+
+from .channel import FLOAT_FIELDS, RAW_FIELDS, Channel
+from .sensor import Sensor
+from .store import HistoricalStore
+from .transport import Transport
+
+# Columns copied from the PurpleAir data without conversion
+RAW_COLUMNS = {('id' if field == 'identifier' else field): key
+               for field, key in RAW_FIELDS.items()}
+
+# Columns converted to floats, equivalent to `Channel._safe_float()`
+FLOAT_COLUMNS = {
+    'lat': 'Lat',
+    'lon': 'Lon',
+    'pm_2.5': 'PM2_5Value',
+    'temp_f': 'temp_f',
+    'humidity': 'humidity',
+    'pressure': 'pressure',
+    'p_0_3_um': 'p_0_3_um',
+    'p_0_5_um': 'p_0_5_um',
+    'p_1_0_um': 'p_1_0_um',
+    'p_2_5_um': 'p_2_5_um',
+    'p_5_0_um': 'p_5_0_um',
+    'p_10_0_um': 'p_10_0_um',
+    'pm1_0_cf_1': 'pm1_0_cf_1',
+    'pm2_5_cf_1': 'pm2_5_cf_1',
+    'pm10_0_cf_1': 'pm10_0_cf_1',
+    'pm1_0_atm': 'pm1_0_atm',
+    'pm2_5_atm': 'pm2_5_atm',
+    'pm10_0_atm': 'pm10_0_atm',
+}
+
+# Columns read from the parsed `Stats` JSON blob
+STATS_COLUMNS = {
+    '10min_avg': 'v1',
+    '30min_avg': 'v2',
+    '1hour_avg': 'v3',
+    '6hour_avg': 'v4',
+    '1day_avg': 'v5',
+    '1week_avg': 'v6',
+}
+
+# Same columns, in the same order, as `Channel.as_flat_dict()`
+FLAT_COLUMNS: List[str] = [
+    'id', 'parent', 'lat', 'lon', 'name', 'location_type',
+    'pm_2.5', 'temp_f', 'temp_c', 'humidity', 'pressure',
+    'p_0_3_um', 'p_0_5_um', 'p_1_0_um', 'p_2_5_um', 'p_5_0_um', 'p_10_0_um',
+    'pm1_0_cf_1', 'pm2_5_cf_1', 'pm10_0_cf_1',
+    'pm1_0_atm', 'pm2_5_atm', 'pm10_0_atm',
+    'last_seen', 'model', 'adc', 'rssi', 'hidden', 'flagged', 'downgraded',
+    'age', 'brightness', 'hardware', 'version', 'last_update_check',
+    'created', 'uptime', 'is_owner',
+    '10min_avg', '30min_avg', '1hour_avg', '6hour_avg', '1day_avg', '1week_avg',
+]
+
+# Identifier columns, which are nullable integers
+INTEGER_COLUMNS: List[str] = ['id', 'parent']
+
+# Columns that are not part of the flat dictionary but are needed by `Sensor.is_useful()`
+EXTRA_COLUMNS: List[str] = ['has_stats', 'last_modified_stats', 'last2_modified']
+
+
+# Raw keys read into the channel DataFrame, all others are never copied
+RAW_KEYS: List[str] = list(RAW_COLUMNS.values()) + list(FLOAT_COLUMNS.values()) + \
+    ['LastSeen', 'Hidden', 'Flag', 'A_H', 'isOwner', 'Stats']
+
+# Keys read from the decoded `Stats` JSON blob, all others are never copied
+STATS_KEYS: List[str] = list(STATS_COLUMNS.values()) + ['lastModified', 'timeSinceModified']
+
+
+def _to_float(column: pd.Series) -> pd.Series:
+    """
+    Convert a column to floats, setting values that cannot be converted to NaN
+    """
+    try:
+        # Parses exactly like `float()`, so values match `Channel._safe_float()`
+        return column.astype(float)
+    except (TypeError, ValueError):
+        return pd.to_numeric(column, errors='coerce').astype(float)
+
+
+def _frame(records: List[dict], index: List[int], keys: List[str]) -> pd.DataFrame:
+    """
+    DataFrame of `keys` of each record, with an empty column for keys that have no values
+    """
+    frame = pd.DataFrame(records, index=index, columns=keys)
+    for key in frame.columns[frame.isna().all()]:
+        frame[key] = pd.Series(None, index=frame.index, dtype=object)
+    return frame
+
+
+def _decode_stats(blobs: List[Any]) -> List[dict]:
+    """
+    Decode the `Stats` JSON blobs, with an empty dictionary for missing or empty blobs
+
+    The blobs are joined into a single JSON array, so they are decoded in one call. If any
+    blob is invalid, they are decoded one at a time instead, which raises the same error
+    as `Channel.pm2_5stats`.
+    """
+    present = [blob for blob in blobs if isinstance(blob, str) and blob]
+    try:
+        decoded = json.loads('[' + ','.join(present) + ']')
+    except ValueError:
+        decoded = []
+    if len(decoded) != len(present):
+        decoded = [json.loads(blob) for blob in present]
+    values = iter(decoded)
+    return [next(values) if isinstance(blob, str) and blob else {} for blob in blobs]
+
+
+def build_channel_frame(entries: List[Optional[dict]],
+                        stats: Optional[List[Optional[dict]]] = None) -> pd.DataFrame:
+    """
+    Build a DataFrame of channel data in a single vectorized pass over the raw PurpleAir data
+
+    Rows are positional: row `i` holds the data for `entries[i]`. Missing channels
+    (i.e. sensors without a child) are represented by empty rows. Only the keys in
+    `RAW_KEYS` and `STATS_KEYS` are copied out of the raw data. If the `Stats` blobs have
+    already been decoded, `stats` holds them in the same order as `entries`, and they are
+    not decoded again.
+    """
+    present = [i for i, entry in enumerate(entries) if entry is not None]
+    records: List[dict] = [entry for entry in entries if entry is not None]
+    raw = _frame(records, present, RAW_KEYS)
+
+    columns = {}
+    for column, key in RAW_COLUMNS.items():
+        columns[column] = raw[key]
+    for column, key in FLOAT_COLUMNS.items():
+        columns[column] = _to_float(raw[key])
+    columns['temp_c'] = (columns['temp_f'] - 32) * (5 / 9)
+
+    columns['last_seen'] = pd.to_datetime(pd.to_numeric(
+        raw['LastSeen'], errors='coerce'), unit='s')
+    columns['hidden'] = raw['Hidden'] != 'false'
+    columns['flagged'] = raw['Flag'] == 1
+    columns['downgraded'] = raw['A_H'] == 'true'
+    is_owner = raw['isOwner']
+    columns['is_owner'] = is_owner.map(bool).where(
+        is_owner.notna(), False).astype(bool)
+
+    stats_raw = raw['Stats']
+    decoded = _decode_stats(stats_raw.tolist()) if stats is None \
+        else [stats[i] or {} for i in present]
+    stats_frame = _frame(decoded, present, STATS_KEYS)
+    for column, key in STATS_COLUMNS.items():
+        columns[column] = stats_frame[key]
+    columns['has_stats'] = stats_raw.map(bool).where(
+        stats_raw.notna(), False).astype(bool)
+    columns['last_modified_stats'] = pd.to_datetime(pd.to_numeric(
+        stats_frame['lastModified'], errors='coerce'), unit='ms')
+    columns['last2_modified'] = stats_frame['timeSinceModified']
+
+    frame = pd.DataFrame(columns, index=raw.index)[
+        FLAT_COLUMNS + EXTRA_COLUMNS]
+    # Empty rows would make the identifiers floats, so they are nullable integers instead
+    frame = frame.reindex(range(len(entries)))
+    frame[INTEGER_COLUMNS] = frame[INTEGER_COLUMNS].astype('Int64')
+    return frame
+
+
+def channel_record(channel: Optional[Channel]) -> Optional[dict]:
+    """
+    Raw data that `build_channel_frame()` turns into the same row as a parsed channel
+
+    Compact channels only keep `COMPACT_KEYS` of their raw data, so the rest is rebuilt
+    from their attributes.
+    """
+    if channel is None:
+        return None
+    record = dict(channel.channel_data)
+    for name, key in FLOAT_FIELDS.items():
+        record[key] = getattr(channel, name)
+    for name, key in RAW_FIELDS.items():
+        record[key] = getattr(channel, name)
+    record['Hidden'] = 'true' if channel.hidden else 'false'
+    record['Flag'] = 1 if channel.flagged else None
+    record['A_H'] = 'true' if channel.downgraded else None
+    record['isOwner'] = channel.is_owner
+    return record
+
+
+def useful_mask(frame: pd.DataFrame) -> pd.Series:
+    """
+    Vectorized equivalent of `Sensor.is_useful()` over a parent channel DataFrame
+    """
+    required = ['lat', 'lon', 'pm_2.5', 'temp_f', 'humidity', 'pressure',
+                'last_modified_stats', 'last2_modified']
+    mask = frame[required].notna().all(axis=1)
+    for flag in ('hidden', 'flagged', 'downgraded'):
+        mask &= frame[flag].eq(False)
+    mask &= frame['has_stats'].eq(True)
+    return mask
+
+
+class SensorSequence(Sequence):
+    """
+    List-like view of paired channel data that only builds a `Sensor` when it is indexed
+    """
+
+    def __init__(self,
+                 data: List[List[dict]],
+                 transport: Optional[Transport] = None,
+                 sensors: Optional[List[Optional[Sensor]]] = None,
+                 sensor_class: Type[Sensor] = Sensor,
+                 *,
+                 store: Optional[HistoricalStore] = None):
+        self.data = data
+        self.transport = transport
+        self.store = store
+        self.sensor_class = sensor_class
+        self._sensors: List[Optional[Sensor]] = sensors if sensors is not None \
+            else [None] * len(data)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        sensor = self._sensors[index]
+        if sensor is None:
+            channels = self.data[index]
+            # channels[0] is always the parent sensor
+            sensor = self.sensor_class(channels[0]['ID'], json_data=channels,
+                                       transport=self.transport, store=self.store)
+            self._sensors[index] = sensor
+        return sensor
+
+    def built(self) -> List[Sensor]:
+        """
+        The sensors that have been built so far
+        """
+        return [s for s in self._sensors if s is not None]
+
+    def __repr__(self):
+        """
+        String representation of the class
+        """
+        built = sum(1 for s in self._sensors if s is not None)
+        return f"SensorSequence of {len(self):,} sensors ({built:,} built)"
@@ -0,0 +1,213 @@
+"""
+Reverse geocoding for sensor locations
+"""
+
+import abc
+import csv
+import os
+import sqlite3
+import threading
+import time
+from re import sub
+from typing import List, Optional
+
+import pandas as pd
+from geopy.geocoders import Nominatim
+
+from .spatial import SpatialIndex
+
+
+# pylint: disable=too-few-public-methods
+class Geocoder(abc.ABC):
+    """
+    Base class for reverse geocoders, which turn coordinates into a location string
+    """
+
+    @abc.abstractmethod
+    def reverse(self, lat: float, lon: float) -> Optional[str]:
+        """
+        Get the location at a point, or `None` if it cannot be found
+        """
+
+
+# pylint: disable=too-few-public-methods
+class NominatimGeocoder(Geocoder):
+    """
+    Online reverse geocoding with Nominatim, limited to one request per `min_delay` seconds
+
+    UA Rules: https://operations.osmfoundation.org/policies/nominatim/
+    """
+
+    def __init__(self, user_agent: Optional[str] = None, min_delay: float = 1.0):
+        self.geolocator = Nominatim(user_agent=user_agent if user_agent is not None
+                                    else self._generate_user_agent())
+        self.min_delay = min_delay
+        self._last_request = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _generate_user_agent() -> str:
+        """
+        We do not want to have every user use the same UA, so we generate one per-user here
+        """
+        root_ua = 'pypi_purple_air_api_'
+        try:
+            user_agent = os.getcwd()
+            return root_ua + sub(r'\/|\\| ', '', user_agent)
+        except OSError:
+            print(
+                'Unable to read current directory name to generate Nominatim user agent!')
+            return f'{root_ua}anonymous_github_com_reagentx_purple_air_api'
+
+    def reverse(self, lat: float, lon: float) -> Optional[str]:
+        with self._lock:
+            # Required by https://operations.osmfoundation.org/policies/nominatim/
+            wait = self._last_request + self.min_delay - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                location = self.geolocator.reverse(f'{lat}, {lon}')
+            finally:
+                self._last_request = time.monotonic()
+        return str(location) if location is not None else None
+
+
+class GazetteerGeocoder(Geocoder):
+    """
+    Offline reverse geocoding against a local table of named places
+
+    `places` must have `name`, `lat`, and `lon` columns; any `admin` and `country`
+    columns are appended to the name. A point resolves to the nearest place within
+    `max_km` kilometers.
+    """
+
+    def __init__(self, places: pd.DataFrame, max_km: float = 50.0):
+        missing = {'name', 'lat', 'lon'} - set(places.columns)
+        if missing:
+            raise ValueError(
+                f'Gazetteer is missing required columns: {sorted(missing)}')
+        self.places = places.reset_index(drop=True)
+        self.max_km = max_km
+        self.index = SpatialIndex(self.places['lat'], self.places['lon'])
+
+        parts = [self.places[column].fillna('').astype(str)
+                 for column in ('name', 'admin', 'country') if column in self.places]
+        self.labels: List[str] = [', '.join(p for p in row if p)
+                                  for row in zip(*parts)]
+
+    @classmethod
+    def from_csv(cls, path: str, max_km: float = 50.0) -> 'GazetteerGeocoder':
+        """
+        Load a gazetteer from a CSV file with `name`, `lat`, and `lon` columns
+        """
+        return cls(pd.read_csv(path), max_km)
+
+    @classmethod
+    def from_geonames(cls, path: str, max_km: float = 50.0) -> 'GazetteerGeocoder':
+        """
+        Load a GeoNames dump, such as `cities1000.txt`
+
+        Dumps can be downloaded from https://download.geonames.org/export/dump/
+        """
+        places = pd.read_csv(path, sep='\t', header=None, usecols=[1, 4, 5, 8, 10],
+                             names=['name', 'lat', 'lon', 'country', 'admin'],
+                             dtype={'country': str, 'admin': str},
+                             quoting=csv.QUOTE_NONE, keep_default_na=False)
+        return cls(places[['name', 'admin', 'country', 'lat', 'lon']], max_km)
+
+    def reverse(self, lat: float, lon: float) -> Optional[str]:
+        positions, _ = self.index.within_radius(lat, lon, self.max_km)
+        if len(positions) == 0:
+            return None
+        return self.labels[positions[0]]
+
+
+class LocationCache():
+    """
+    Persistent SQLite cache of locations keyed by coordinates rounded to `precision` digits
+
+    The default precision of 3 digits groups points about 100 meters apart.
+    """
+
+    def __init__(self, path: str = 'purpleair_locations.sqlite', precision: int = 3):
+        self.path = path
+        self.precision = precision
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS locations '
+                '(lat REAL, lon REAL, location TEXT, PRIMARY KEY (lat, lon))')
+
+    def _key(self, lat: float, lon: float) -> tuple:
+        """
+        Round coordinates to the cache precision
+        """
+        return round(lat, self.precision), round(lon, self.precision)
+
+    def get(self, lat: float, lon: float) -> Optional[str]:
+        """
+        Get a cached location, or `None` if there is none
+        """
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT location FROM locations WHERE lat = ? AND lon = ?',
+                self._key(lat, lon)).fetchone()
+        return row[0] if row is not None else None
+
+    def set(self, lat: float, lon: float, location: str) -> None:
+        """
+        Cache a location
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO locations VALUES (?, ?, ?)',
+                self._key(lat, lon) + (location,))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute('SELECT COUNT(*) FROM locations').fetchone()[0]
+
+    def close(self) -> None:
+        """
+        Close the database connection
+        """
+        self._connection.close()
+
+
+# pylint: disable=too-few-public-methods
+class CachedGeocoder(Geocoder):
+    """
+    Resolves locations from a `LocationCache` first, then from each backend in order
+
+    Locations found by a backend are saved to the cache, so repeated runs do not
+    query the backends again.
+    """
+
+    def __init__(self,
+                 backends: List[Geocoder],
+                 cache: Optional[LocationCache] = None):
+        self.backends = backends
+        self.cache = cache
+
+    def reverse(self, lat: float, lon: float) -> Optional[str]:
+        if self.cache is not None:
+            location = self.cache.get(lat, lon)
+            if location is not None:
+                return location
+        for backend in self.backends:
+            location = backend.reverse(lat, lon)
+            if location is not None:
+                if self.cache is not None:
+                    self.cache.set(lat, lon, location)
+                return location
+        return None
+
+
+def default_geocoder() -> Geocoder:
+    """
+    Create the geocoder used by sensors that are not given one
+
+    Locations are cached on disk and looked up with Nominatim on a cache miss.
+    """
+    return CachedGeocoder([NominatimGeocoder()], LocationCache())
@@ -0,0 +1,175 @@
+"""
+Counts and durations recorded by the client, such as request latency and parsing time
+"""
+
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+# Called with the kind of each value ('counter', 'gauge', or 'observation'), its name, and the value
+Sink = Callable[[str, str, float], None]
+
+
+class Summary():
+    """
+    Count, total, smallest, and largest of the values observed for a name
+    """
+
+    __slots__ = ('count', 'total', 'min', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = float('-inf')
+
+    def add(self, value: float) -> None:
+        """
+        Include another value in the summary
+        """
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def as_dict(self) -> Dict[str, float]:
+        """
+        The summary as a dictionary, including the mean
+        """
+        return {'count': self.count, 'total': self.total, 'min': self.min, 'max': self.max,
+                'mean': self.total / self.count if self.count else 0.0}
+
+
+class Metrics():
+    """
+    Thread-safe record of counters, gauges, and observations, such as durations in seconds
+
+    Every `Transport` has one, which the objects that use the transport record into.
+    Each value is also passed to every sink as it is recorded, to forward it elsewhere.
+    """
+
+    def __init__(self, sinks: Optional[List[Sink]] = None):
+        self.sinks: List[Sink] = list(sinks) if sinks is not None else []
+        self.counters: Dict[str, float] = {}
+        self.gauges: Dict[str, float] = {}
+        self.observations: Dict[str, Summary] = {}
+        self._lock = threading.Lock()
+
+    def _send(self, kind: str, name: str, value: float) -> None:
+        for sink in self.sinks:
+            sink(kind, name, value)
+
+    def increment(self, name: str, value: float = 1) -> None:
+        """
+        Add `value` to a counter
+        """
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+        self._send('counter', name, value)
+
+    def set(self, name: str, value: float) -> None:
+        """
+        Set a gauge to its current value
+        """
+        with self._lock:
+            self.gauges[name] = value
+        self._send('gauge', name, value)
+
+    def observe(self, name: str, value: float) -> None:
+        """
+        Record one value of a distribution, such as a duration or a number of rows
+        """
+        with self._lock:
+            if name not in self.observations:
+                self.observations[name] = Summary()
+            self.observations[name].add(value)
+        self._send('observation', name, value)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """
+        Observe how many seconds the block takes, even if it raises an exception
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def reset(self) -> None:
+        """
+        Forget everything recorded so far
+        """
+        with self._lock:
+            self.counters = {}
+            self.gauges = {}
+            self.observations = {}
+
+    def as_dict(self) -> Dict[str, Dict[str, object]]:
+        """
+        Everything recorded so far, with a summary of each observation
+        """
+        with self._lock:
+            return {'counters': dict(self.counters),
+                    'gauges': dict(self.gauges),
+                    'observations': {name: summary.as_dict()
+                                     for name, summary in self.observations.items()}}
+
+    def to_prometheus(self, prefix: str = 'purpleair') -> str:
+        """
+        Everything recorded so far in the Prometheus text format, with observations as summaries
+        """
+        lines: List[str] = []
+        with self._lock:
+            for name, value in sorted(self.counters.items()):
+                lines += [f'# TYPE {prefix}_{name}_total counter',
+                          f'{prefix}_{name}_total {value:g}']
+            for name, value in sorted(self.gauges.items()):
+                lines += [f'# TYPE {prefix}_{name} gauge', f'{prefix}_{name} {value:g}']
+            for name, summary in sorted(self.observations.items()):
+                lines += [f'# TYPE {prefix}_{name} summary',
+                          f'{prefix}_{name}_count {summary.count}',
+                          f'{prefix}_{name}_sum {summary.total:g}']
+        return '\n'.join(lines) + '\n'
+
+
+class StatsDSink():
+    """
+    Sink that sends each value to a StatsD server over UDP as it is recorded
+
+    Observations of durations, whose names end in `_seconds`, are sent as timings in
+    milliseconds, and other observations as histograms. Send errors are ignored.
+    """
+
+    def __init__(self, host: str = 'localhost', port: int = 8125, prefix: str = 'purpleair'):
+        self.address = (host, port)
+        self.prefix = prefix
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    @staticmethod
+    def format(prefix: str, kind: str, name: str, value: float) -> str:
+        """
+        A value in the StatsD line format
+        """
+        if kind == 'counter':
+            return f'{prefix}.{name}:{value:g}|c'
+        if kind == 'gauge':
+            return f'{prefix}.{name}:{value:g}|g'
+        if name.endswith('_seconds'):
+            return f'{prefix}.{name[:-len("_seconds")]}:{value * 1000:g}|ms'
+        return f'{prefix}.{name}:{value:g}|h'
+
+    def __call__(self, kind: str, name: str, value: float) -> None:
+        try:
+            self._socket.sendto(self.format(self.prefix, kind, name, value).encode(),
+                                self.address)
+        except OSError:
+            pass
+
+    def close(self) -> None:
+        """
+        Close the UDP socket
+        """
+        self._socket.close()
@@ -5,15 +5,38 @@ PurpleAir API Client Class
 
 import json
 import time
-from datetime import timedelta
+from datetime import datetime, timedelta
 from json.decoder import JSONDecodeError
-from typing import List, Optional, Union
+from typing import (Any, Dict, Iterable, Iterator, List, NamedTuple, Optional,
+                    Sequence, Tuple, Union, cast)
 
+import numpy as np
 import pandas as pd
-from requests_cache import CachedSession
 
-from .api_data import API_ROOT
+from .bulk import BulkDownloader
+from .channel import Channel
+from .columnar import (FLAT_COLUMNS, SensorSequence, build_channel_frame, channel_record,
+                       useful_mask)
+from .geocode import Geocoder, default_geocoder
+from .parallel import build_channel_frames
 from .sensor import Sensor
+from .snapshot import read_snapshot, write_snapshot
+from .sources import DataSource, FileSource, HTTPSource, MemorySource
+from .spatial import SpatialIndex
+from .store import HistoricalStore
+from .streaming import iter_results
+from .transport import Transport
+from .utils import without_gc
+
+
+class RefreshResult(NamedTuple):
+    """
+    Sensor IDs that changed during `SensorList.refresh()`
+    """
+    added: List[int]
+    removed: List[int]
+    updated: List[int]
+    unchanged: int
 
 
 class SensorList():
@@ -21,23 +44,189 @@ class SensorList():
     PurpleAir Sensor Network Representation
     """
 
-    def __init__(self, parse_location=False):
-        self.parse_location = parse_location
+    # Class used to build each sensor in the network
+    sensor_class = Sensor
+    # Networks with fewer sensors build their channel DataFrames in one process, since
+    #   starting the processes and copying the data to them takes longer than building them
+    parallel_cutoff = 5000
 
-        self.data = {}
+    def __init__(self,
+                 parse_location=False,
+                 *,
+                 columnar=False,
+                 transport: Optional[Transport] = None,
+                 geocoder: Optional[Geocoder] = None,
+                 streaming=False,
+                 compact=False,
+                 lazy=False,
+                 source: Optional[DataSource] = None,
+                 workers: int = 1,
+                 store: Optional[HistoricalStore] = None):
+        self._initialize(parse_location, columnar, transport, geocoder=geocoder,
+                         streaming=streaming, compact=compact, lazy=lazy, source=source,
+                         workers=workers, store=store)
         self.get_all_data()  # Populate `data`
+        self._generate()
+
+    @classmethod
+    def from_payload(cls, payload: Union[bytes, str], **options: Any) -> 'SensorList':
+        """
+        Build a network from a PurpleAir JSON payload that is already in memory
+
+        Other keyword arguments are passed to `SensorList()`.
+        """
+        return cls(source=MemorySource(payload), **options)
+
+    @classmethod
+    def from_file(cls, path: str, **options: Any) -> 'SensorList':
+        """
+        Build a network from a PurpleAir JSON payload saved to a file, which may be gzipped
+
+        Other keyword arguments are passed to `SensorList()`.
+        """
+        return cls(source=FileSource(path), **options)
+
+    def _initialize(self,
+                    parse_location: bool,
+                    columnar: bool,
+                    transport: Optional[Transport],
+                    *,
+                    geocoder: Optional[Geocoder] = None,
+                    streaming: bool = False,
+                    compact: bool = False,
+                    lazy: bool = False,
+                    source: Optional[DataSource] = None,
+                    workers: int = 1,
+                    store: Optional[HistoricalStore] = None) -> None:
+        """
+        Set up an empty network without fetching any data
 
-        self.all_sensors: List[Sensor] = []
-        self.generate_sensor_list()  # Populate `all_sensors`
+        Data is read from `source`, or from the PurpleAir API through the transport.
+        The channel DataFrames of networks of at least `parallel_cutoff` sensors are built
+        in `workers` processes. Every sensor reads its historical data through `store`,
+        if one is given.
+        """
+        if parse_location and columnar:
+            raise ValueError(
+                'Location parsing is not supported in columnar mode!')
+        if compact and columnar:
+            raise ValueError(
+                'Compact sensors are not supported in columnar mode!')
+        if lazy and columnar:
+            raise ValueError(
+                'Lazy sensors are not supported in columnar mode!')
+        if lazy and compact:
+            raise ValueError(
+                'Lazy sensors need the raw data, so they cannot be compact!')
+        if workers < 1:
+            raise ValueError(
+                f'Invalid number of workers: {workers}. Must be at least 1')
+        if workers > 1 and not columnar:
+            raise ValueError(
+                'Several workers are only supported in columnar mode!')
+        self.parse_location = parse_location
+        self.columnar = columnar
+        # Shared by every sensor, so locations are cached and rate limited once
+        self.geocoder: Optional[Geocoder] = geocoder if geocoder is not None or \
+            not parse_location else default_geocoder()
+        self.streaming = streaming
+        self.compact = compact
+        self.lazy = lazy
+        self.workers = workers
+        self.store = store
+        self.transport: Transport = transport if transport is not None \
+            else Transport()
+        self.source: DataSource = source if source is not None \
+            else HTTPSource(self.transport)
+
+        self.data: List[List[dict]] = []
+        self.all_sensors: Sequence[Sensor] = []
+        self.channel_frames: Dict[str, pd.DataFrame] = {}
+        self._sensor_masks: Dict[str, pd.Series] = {}
+        self._spatial_index: Optional[SpatialIndex] = None
+
+    def _generate(self) -> None:
+        """
+        Build the sensors, or the channel DataFrames in columnar mode, from `data`
+        """
+        if self.columnar:
+            self.generate_channel_frames()  # Populate `channel_frames`
+        else:
+            self.generate_sensor_list()  # Populate `all_sensors`
+            if self.compact:
+                self._compact()
+
+    def _compact(self) -> None:
+        """
+        Replace `data` with the sensors' trimmed data
+
+        The channel DataFrames are built from the parsed channels the first time they
+        are requested, see `_frame_data()`.
+        """
+        self.data = [cast(List[dict], s.data) for s in self.all_sensors]
+
+    def _frame_data(self, channel: str) -> List[Optional[dict]]:
+        """
+        Raw data of `channel` for every sensor, or None for sensors without that channel
+
+        Compact sensors no longer have all of their raw data, so it is rebuilt from their
+        parsed channels.
+        """
+        if self.compact:
+            return [channel_record(s.resolve_sensor_channel(channel)) for s in self.all_sensors]
+        return [s[0] for s in self.data] if channel == 'parent' \
+            else [s[1] if len(s) > 1 else None for s in self.data]
+
+    def _frame_stats(self, channel: str) -> Optional[List[Optional[dict]]]:
+        """
+        Decoded `Stats` of `channel` for every sensor, if the sensors have already decoded them
+
+        Columnar and lazy networks have not decoded them, so their blobs are decoded
+        together by `build_channel_frame()` instead.
+        """
+        if self.columnar or self.lazy:
+            return None
+        channels = [s.resolve_sensor_channel(channel) for s in self.all_sensors]
+        return [c.pm2_5stats if c is not None else None for c in channels]
+
+    def _is_parallel(self) -> bool:
+        """
+        Whether the channel DataFrames should be built in `workers` processes
+        """
+        return self.workers > 1 and bool(self.data) and len(self.data) >= self.parallel_cutoff
+
+    def _build_channel_frames(self) -> None:
+        """
+        Build both channel DataFrames if they have not been built yet, in `workers`
+        processes if the network is large enough
+        """
+        with self.transport.metrics.timer('channel_frames_seconds'):
+            if self._is_parallel() and not self.channel_frames:
+                self.channel_frames = build_channel_frames(self.data, self.workers)
+            for channel in ('parent', 'child'):
+                self.resolve_channel_frame(channel)
 
     def get_all_data(self) -> None:
         """
-        Get all data from the API
+        Get all data from the data source, which is the API unless another source was given
+
+        In streaming mode, sensors are paired as the payload is read instead of
+        after the whole payload is read into memory.
+        """
+        if self.streaming:
+            self.load_stream(self.source.stream())
+        else:
+            with self.transport.metrics.timer('network_read_seconds'):
+                content = self.source.read()
+            self.load_payload(content)
+
+    def load_payload(self, content: bytes) -> None:
+        """
+        Decode and validate a network payload, then populate `data` from it
         """
-        session = CachedSession(expire_after=timedelta(hours=1))
-        response = session.get(f'{API_ROOT}?q=""')
         try:
-            data = json.loads(response.content)
+            with self.transport.metrics.timer('json_decode_seconds'):
+                data = json.loads(content)
         except JSONDecodeError as err:
             raise ValueError(
                 'Invalid JSON data returned from network!') from err
@@ -49,12 +238,164 @@ class SensorList():
             raise ValueError(
                 f'No sensor data returned from PurpleAir: {error_message}')
 
-        self.parse_raw_result(data['results'])
+        with self.transport.metrics.timer('pairing_seconds'):
+            self.parse_raw_result(data['results'])
+        self.transport.metrics.set('network_sensors', len(self.data))
+        print(f"Initialized {len(self.data):,} sensors!")
+
+    def load_stream(self, chunks: Iterable[bytes]) -> None:
+        """
+        Incrementally decode a network payload from chunks of bytes, then populate `data`
+
+        Reading, decoding, and pairing happen together, so they are timed together.
+        """
+        with self.transport.metrics.timer('pairing_seconds'):
+            self.parse_raw_result(iter_results(chunks))
+        self.transport.metrics.set('network_sensors', len(self.data))
         print(f"Initialized {len(self.data):,} sensors!")
 
-    def parse_raw_result(self, flat_sensor_data: dict) -> None:
+    def _snapshot_options(self) -> Dict[str, bool]:
+        """
+        Options that change the parsed network, which a snapshot must have been saved with
+        """
+        return {'parse_location': self.parse_location, 'columnar': self.columnar,
+                'compact': self.compact, 'lazy': self.lazy, 'store': self.store is not None}
+
+    def save(self, path: str) -> None:
+        """
+        Save the parsed network to `path`, so `load()` can restore it without downloading
+        or parsing it again
+
+        Sensors, channel DataFrames, and locations are saved. The transport, geocoder, data
+        source, and store are not, and are replaced by the ones given to `load()`.
+        """
+        write_snapshot(path, {'options': self._snapshot_options()}, self,
+                       {'transport': self.transport, 'geocoder': self.geocoder,
+                        'source': self.source, 'store': self.store})
+
+    # pylint: disable=too-many-locals
+    @classmethod
+    def load(cls,
+             path: str,
+             max_age: Optional[timedelta] = None,
+             *,
+             parse_location=False,
+             columnar=False,
+             transport: Optional[Transport] = None,
+             geocoder: Optional[Geocoder] = None,
+             streaming=False,
+             compact=False,
+             lazy=False,
+             source: Optional[DataSource] = None,
+             workers: int = 1,
+             store: Optional[HistoricalStore] = None) -> 'SensorList':
+        """
+        Restore a network saved with `save()`, or get it from the API if the snapshot is unusable
+
+        The snapshot is used if it exists, was saved with the same options, and is not older
+        than `max_age`. Otherwise, the network is downloaded and parsed as usual, then saved
+        to `path` for next time. Snapshots are pickles, so only load snapshots you created.
+        """
+        network = cls.__new__(cls)
+        network._initialize(parse_location, columnar, transport, geocoder=geocoder,
+                            streaming=streaming, compact=compact, lazy=lazy, source=source,
+                            workers=workers, store=store)
+        options = network._snapshot_options()
+
+        def is_current(header: Dict[str, Any]) -> bool:
+            if header.get('options') != options:
+                return False
+            return max_age is None or time.time() - header['saved_at'] <= max_age.total_seconds()
+
+        saved = read_snapshot(path, {'transport': network.transport, 'geocoder': network.geocoder,
+                                     'source': network.source, 'store': store}, is_current)
+        if isinstance(saved, cls):
+            saved.streaming = streaming
+            saved.workers = workers
+            return saved
+
+        network.get_all_data()  # Populate `data`
+        network._generate()
+        network.save(path)
+        return network
+
+    def refresh(self) -> RefreshResult:
+        """
+        Get the current network data and update the existing sensors in place
+
+        Sensors are matched by parent ID. Only channels with new readings are parsed
+        again, new sensors are created, and sensors that left the network are removed.
+        The channel DataFrames are rebuilt from the new data.
+        """
+        built = self._built_sensors()
+        previous: Dict[int, List[dict]] = {s[0]['ID']: s for s in self.data}
+        self.get_all_data()  # Replace `data`
+        with self.transport.metrics.timer('refresh_update_seconds'):
+            return self._apply_refresh(built, previous)
+
+    def _built_sensors(self) -> Dict[int, Sensor]:
+        """
+        Map of sensor ID to every `Sensor` that has been built so far
+        """
+        return {s.identifier: s for s in (self.all_sensors.built()
+                                          if isinstance(self.all_sensors, SensorSequence)
+                                          else self.all_sensors)}
+
+    def _apply_refresh(self,
+                       built: Dict[int, Sensor],
+                       previous: Dict[int, List[dict]]) -> RefreshResult:
+        """
+        Update `built` sensors from the new `data`, given the `previous` data by sensor ID
+        """
+        added: List[int] = []
+        updated: List[int] = []
+        unchanged = 0
+        sensors: List[Optional[Sensor]] = []
+        for channels in self.data:
+            identifier = channels[0]['ID']
+            old_channels = previous.pop(identifier, None)
+            sensor = built.get(identifier)
+            if old_channels is None:
+                added.append(identifier)
+            elif len(old_channels) != len(channels) or any(
+                    Channel.data_changed(old, new) for old, new in zip(old_channels, channels)):
+                updated.append(identifier)
+            else:
+                unchanged += 1
+
+            if sensor is not None:
+                # Only channels with new readings are parsed again
+                sensor.update(channels)
+            elif not self.columnar:
+                sensor = self.sensor_class(identifier,
+                                           json_data=channels,
+                                           parse_location=self.parse_location,
+                                           transport=self.transport,
+                                           geocoder=self.geocoder,
+                                           compact=self.compact,
+                                           lazy=self.lazy,
+                                           store=self.store)
+            sensors.append(sensor)
+        removed = sorted(previous)
+
+        self.channel_frames = {}
+        self._sensor_masks = {}
+        self._spatial_index = None
+        if self.columnar:
+            self.all_sensors = SensorSequence(
+                self.data, self.transport, sensors, self.sensor_class, store=self.store)
+            self._build_channel_frames()
+        else:
+            self.all_sensors = [s for s in sensors if s is not None]
+            if self.compact:
+                self._compact()
+        return RefreshResult(added, removed, updated, unchanged)
+
+    def parse_raw_result(self, flat_sensor_data: Iterable[dict]) -> None:
         """
         O(2n) algorithm to build the network map
+
+        `flat_sensor_data` is only iterated once, so it can be a generator.
         """
         out_l: List[List[dict]] = []
 
@@ -96,19 +437,72 @@ class SensorList():
 
     def generate_sensor_list(self) -> None:
         """
-        Generator for Sensor objects, delated if `parse_location` is true per Nominatim policy
+        Generator for Sensor objects, delayed if `parse_location` is true and locations
+        are not cached, since Nominatim is limited to one request per second
         """
         if self.parse_location:
             # pylint: disable=line-too-long
-            print('Warning: location parsing enabled! This reduces sensor parsing speed to less than 1 per second.')
-        for sensor in self.data:
-            if self.parse_location:
-                # Required by https://operations.osmfoundation.org/policies/nominatim/
-                time.sleep(1)
-            # sensor[0] is always the parent sensor
-            self.all_sensors.append(Sensor(sensor[0]['ID'],
-                                           json_data=sensor,
-                                           parse_location=self.parse_location))
+            print('Warning: location parsing enabled! Locations that are not cached are looked up at less than 1 per second.')
+        all_sensors: List[Sensor] = []
+        with self.transport.metrics.timer('sensor_construction_seconds'), without_gc():
+            for sensor in self.data:
+                # sensor[0] is always the parent sensor
+                all_sensors.append(self.sensor_class(sensor[0]['ID'],
+                                                     json_data=sensor,
+                                                     parse_location=self.parse_location,
+                                                     transport=self.transport,
+                                                     geocoder=self.geocoder,
+                                                     compact=self.compact,
+                                                     lazy=self.lazy,
+                                                     store=self.store))
+        self.all_sensors = all_sensors
+
+    def generate_channel_frames(self) -> None:
+        """
+        Build parent and child channel DataFrames directly from the network data
+
+        `Sensor` objects are only created when `all_sensors` is indexed.
+        """
+        self.all_sensors = SensorSequence(
+            self.data, self.transport, sensor_class=self.sensor_class, store=self.store)
+        self._build_channel_frames()
+
+    def resolve_channel_frame(self, channel: str) -> pd.DataFrame:
+        """
+        Resolves a sensor channel string to the respective channel DataFrame
+
+        The DataFrame is built from the network data the first time it is requested
+        and reused for every filter after that.
+        """
+        if channel not in {'parent', 'child'}:
+            raise ValueError(
+                f'Invalid sensor channel: {channel}. Must be in {{"parent", "child"}}')
+        if channel not in self.channel_frames:
+            self.channel_frames[channel] = build_channel_frame(
+                self._frame_data(channel), self._frame_stats(channel))
+        return self.channel_frames[channel]
+
+    def sensor_mask(self, sensor_filter: str) -> pd.Series:
+        """
+        Boolean mask of the sensors that belong to `sensor_filter`
+
+        Sensor filters are evaluated against the parent channel, like the `Sensor`
+        methods they mirror. Masks are cached the same way as the channel DataFrames.
+        """
+        if sensor_filter not in self._sensor_masks:
+            try:
+                mask = {
+                    'all': lambda: pd.Series(True, index=range(len(self.data))),
+                    'outside': lambda: self.resolve_channel_frame(
+                        'parent')['location_type'] == 'outside',
+                    'useful': lambda: useful_mask(self.resolve_channel_frame('parent')),
+                    'family': lambda: pd.Series([len(s) > 1 and bool(s[1]) for s in self.data]),
+                }[sensor_filter]()
+            except KeyError as err:
+                raise KeyError(
+                    f'Invalid sensor filter supplied: {sensor_filter}') from err
+            self._sensor_masks[sensor_filter] = mask
+        return self._sensor_masks[sensor_filter]
 
     def filter_column(self,
                       channel: str,
@@ -122,26 +516,25 @@ class SensorList():
         # Check if there is no column passed
         if column is None:
             raise ValueError('No column name provided to filter on!')
-        out_l: List[dict] = []
-        for sensor in self.all_sensors:
-            sensor_data = sensor.as_flat_dict(channel)
-            if column not in sensor_data:
-                raise ValueError(
-                    f'Requested column {column} does not exist in sensor data!')
-            result = sensor_data.get(column)
-            if value_filter and result != value_filter:
-                continue
-            if value_filter and result == value_filter:
-                out_l.append(sensor_data)
-            elif result is not None:
-                # If we do not want to filter the values, we filter out `None`s
-                out_l.append(sensor_data)
+        frame = self.resolve_channel_frame(channel)
+        if column not in FLAT_COLUMNS:
+            raise ValueError(
+                f'Requested column {column} does not exist in sensor data!')
+        if value_filter:
+            try:
+                mask = frame[column] == value_filter
+            except TypeError:
+                # Comparing incompatible types, so nothing can match
+                mask = pd.Series(False, index=frame.index)
+        else:
+            # If we do not want to filter the values, we filter out `None`s
+            mask = frame[column].notna()
 
-        if len(out_l) == 0:
+        if not mask.any():
             # pylint: disable=line-too-long
             raise ValueError(
                 f'No data for filter set: Column {column}, value filter: {value_filter}')
-        return pd.DataFrame(out_l)
+        return frame.loc[mask, FLAT_COLUMNS]
 
     def to_dataframe(self,
                      sensor_filter: str,
@@ -155,31 +548,139 @@ class SensorList():
         We do not want to pre-calculate all of the possible filters just by creating an
         instance of this class.
 
-        Using lambdas here means instead of immediately generating and storing a result of
-        some code to the dictionary when we first construct it, we only store a function
-        that can generate the data we want.
+        Instead, each channel DataFrame is built once, the first time it is requested,
+        and every filter is a boolean mask over that DataFrame.
+        """
+        if sensor_filter == 'column':
+            sensor_data = self.filter_column(channel, column, value_filter)
+        else:
+            mask = self.sensor_mask(sensor_filter)
+            sensor_data = self.resolve_channel_frame(
+                channel).loc[mask, FLAT_COLUMNS]
+
+        return sensor_data.set_index('id')
 
-        The dictionary returns this function, which we immediately call. As a result we do
-        not create these data until we ask for them.
+    def _historical_channels(self, sensor_filter: str, channel: str) -> List[Channel]:
         """
-        try:
-            sensor_data: pd.DataFrame = {
-                'all': lambda: pd.DataFrame([s.as_flat_dict(channel)
-                                             for s in self.all_sensors]),
-                'outside': lambda: pd.DataFrame([s.as_flat_dict(channel)
-                                                 for s in [s for s in self.all_sensors
-                                                           if s.location_type == 'outside']]),
-                'useful': lambda: pd.DataFrame([s.as_flat_dict(channel)
-                                                for s in [s for s in self.all_sensors
-                                                          if s.is_useful()]]),
-                'family': lambda: pd.DataFrame([s.as_flat_dict(channel)
-                                                for s in [s for s in self.all_sensors
-                                                          if s.parent and s.child]]),
-                'column': lambda: self.filter_column(channel, column, value_filter)
-            }[sensor_filter]()
-        except KeyError as err:
-            raise KeyError(
-                f'Invalid sensor filter supplied: {sensor_filter}') from err
-
-        sensor_data.index = sensor_data.pop('id')
-        return sensor_data
+        The channels in `sensor_filter` that have ThingSpeak data
+        """
+        mask = self.sensor_mask(sensor_filter)
+        channels: List[Channel] = []
+        for index in mask[mask].index:
+            sensor_channel = self.all_sensors[index].resolve_sensor_channel(
+                channel)
+            # Skip missing children and channels without ThingSpeak data
+            if sensor_channel is not None and sensor_channel.tp_primary_channel is not None:
+                channels.append(sensor_channel)
+        return channels
+
+    def get_historical_bulk(self,
+                            sensor_filter: str,
+                            channel: str,
+                            start_date: datetime,
+                            end_date: Optional[datetime] = None,
+                            *,
+                            thingspeak_field: Optional[str] = None,
+                            thingspeak_args: Optional[Dict[str, Any]] = None,
+                            stream: bool = False,
+                            downloader: Optional[BulkDownloader] = None,
+                            fields: Optional[List[str]] = None,
+                            resolution: Optional[Union[str, timedelta]] = None
+                            ) -> Union[pd.DataFrame, Iterator[Tuple[Optional[int], pd.DataFrame]]]:
+        """
+        Get historical ThingSpeak data for every sensor in `sensor_filter` between two dates
+
+        All requests are scheduled through a single `BulkDownloader`. If `stream` is true,
+        this returns a generator of `(sensor_id, DataFrame)` pairs in the order the sensors
+        finish downloading; otherwise it returns one DataFrame indexed by sensor id.
+        Child channels are keyed by the ID of their sensor, which is the parent channel's ID.
+        If `fields` is given, only those columns are kept, along with `created_at`, and
+        if `resolution` is given, the data is averaged over windows of that length.
+        """
+        channels = self._historical_channels(sensor_filter, channel)
+        downloader = downloader if downloader is not None \
+            else BulkDownloader(transport=self.transport)
+        results = downloader.download(
+            channels, start_date, end_date, thingspeak_field=thingspeak_field,
+            thingspeak_args=thingspeak_args, fields=fields, resolution=resolution)
+        if stream:
+            return results
+
+        frames = dict(results)
+        if len(frames) == 0:
+            raise ValueError(
+                f'No sensors with ThingSpeak data for filter: {sensor_filter}')
+        return pd.concat(frames, names=['sensor_id'])
+
+    @property
+    def spatial_index(self) -> SpatialIndex:
+        """
+        Index of parent channel coordinates, built the first time a spatial query is made
+        """
+        if self._spatial_index is None:
+            frame = self.resolve_channel_frame('parent')
+            self._spatial_index = SpatialIndex(frame['lat'], frame['lon'])
+        return self._spatial_index
+
+    def _spatial_result(self,
+                        positions: np.ndarray,
+                        distances: Optional[np.ndarray],
+                        channel: str,
+                        as_sensors: bool) -> Union[pd.DataFrame, List[Sensor]]:
+        """
+        Convert positions found by the spatial index into sensors or a channel DataFrame
+        """
+        if as_sensors:
+            return [self.all_sensors[i] for i in positions]
+        sensor_data = self.resolve_channel_frame(channel).iloc[positions][FLAT_COLUMNS]
+        if distances is not None:
+            sensor_data = sensor_data.assign(distance_km=distances)
+        return sensor_data.set_index('id')
+
+    def nearest(self,
+                lat: float,
+                lon: float,
+                k: int = 1,
+                *,
+                sensor_filter: str = 'all',
+                channel: str = 'parent',
+                as_sensors: bool = False) -> Union[pd.DataFrame, List[Sensor]]:
+        """
+        The `k` sensors in `sensor_filter` nearest to a point, nearest first
+        """
+        mask = self.sensor_mask(sensor_filter).to_numpy()
+        positions, distances = self.spatial_index.nearest(lat, lon, k, mask)
+        return self._spatial_result(positions, distances, channel, as_sensors)
+
+    def within_radius(self,
+                      lat: float,
+                      lon: float,
+                      km: float,
+                      *,
+                      sensor_filter: str = 'all',
+                      channel: str = 'parent',
+                      as_sensors: bool = False) -> Union[pd.DataFrame, List[Sensor]]:
+        """
+        Every sensor in `sensor_filter` within `km` kilometers of a point, nearest first
+        """
+        mask = self.sensor_mask(sensor_filter).to_numpy()
+        positions, distances = self.spatial_index.within_radius(
+            lat, lon, km, mask)
+        return self._spatial_result(positions, distances, channel, as_sensors)
+
+    def within_bbox(self,
+                    south: float,
+                    west: float,
+                    north: float,
+                    east: float,
+                    *,
+                    sensor_filter: str = 'all',
+                    channel: str = 'parent',
+                    as_sensors: bool = False) -> Union[pd.DataFrame, List[Sensor]]:
+        """
+        Every sensor in `sensor_filter` inside a bounding box, in network order
+        """
+        mask = self.sensor_mask(sensor_filter).to_numpy()
+        positions = self.spatial_index.within_bbox(
+            south, west, north, east, mask)
+        return self._spatial_result(positions, None, channel, as_sensors)
@@ -0,0 +1,54 @@
+"""
+Building the channel DataFrames of the network in several processes
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+import pandas as pd
+
+from .columnar import build_channel_frame
+from .utils import without_gc
+
+
+def _shards(data: List[List[dict]], count: int) -> List[List[List[dict]]]:
+    """
+    Split `data` into at most `count` contiguous shards of nearly the same size
+    """
+    size = max(-(-len(data) // count), 1)
+    return [data[start:start + size] for start in range(0, len(data), size)]
+
+
+def _build_shard(data: List[List[dict]]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Build the parent and child channel DataFrames of a shard
+    """
+    return (build_channel_frame([s[0] for s in data]),
+            build_channel_frame([s[1] if len(s) > 1 else None for s in data]))
+
+
+def _concat_frames(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Join the channel DataFrames of each shard into one with the same types as a single frame
+    """
+    frame = pd.concat(frames, ignore_index=True)
+    # A column with no values in one shard is an object column there, but not in the others
+    mixed = [column for column in frame.columns
+             if len({str(shard[column].dtype) for shard in frames}) > 1]
+    if mixed:
+        frame[mixed] = frame[mixed].infer_objects()
+    return frame
+
+
+def build_channel_frames(data: List[List[dict]], workers: int) -> Dict[str, pd.DataFrame]:
+    """
+    Build the parent and child channel DataFrames of the paired network data in `workers`
+    processes, each given a contiguous shard
+
+    The DataFrames are equal to the ones `build_channel_frame()` builds in one process.
+    """
+    shards = _shards(data, workers)
+    with ProcessPoolExecutor(max_workers=len(shards)) as executor, without_gc():
+        results = list(executor.map(_build_shard, shards))
+    return {'parent': _concat_frames([parent for parent, _ in results]),
+            'child': _concat_frames([child for _, child in results])}
@@ -4,28 +4,53 @@ PurpleAir Sensor Client
 
 
 import json
-import os
-from datetime import timedelta
-from re import sub
-from typing import List, Optional
-
-from geopy.geocoders import Nominatim
-from requests_cache import CachedSession
+from typing import List, Optional, Tuple
 
 from .api_data import API_ROOT
-from .channel import Channel
+from .channel import Channel, LazyChannel
+from .geocode import Geocoder, default_geocoder
+from .store import HistoricalStore
+from .transport import Transport
 
 
 class Sensor():
     """
     Representation of a single PurpleAir sensor
+
+    If `compact` is true, both channels are compact and `data`, `parent_data`, and
+    `child_data` refer to their trimmed channel data. If `lazy` is true, both channels
+    are `LazyChannel`s, which parse each attribute the first time it is read. Historical
+    data of both channels is read through `store`, if one is given.
     """
 
+    __slots__ = (
+        'transport', 'geocoder', 'compact', 'lazy', 'data', 'parent_data', 'identifier',
+        'child_data', 'parse_location', 'thingspeak_data', 'parent', 'child',
+        'location_type', 'location', 'store',
+    )
+
+    # Class used to build the parent and child channels
+    channel_class = Channel
+    # Class used instead of `channel_class` for lazy sensors
+    lazy_channel_class = LazyChannel
+
     def __init__(
             self,
             identifier: int,
             json_data: Optional[list] = None,
-            parse_location=False):
+            parse_location=False,
+            *,
+            transport: Optional[Transport] = None,
+            geocoder: Optional[Geocoder] = None,
+            compact: bool = False,
+            lazy: bool = False,
+            store: Optional[HistoricalStore] = None):
+        self.transport: Transport = transport if transport is not None \
+            else Transport()
+        self.geocoder: Optional[Geocoder] = geocoder
+        self.store = store
+        self.compact = compact
+        self.lazy = lazy
         self.data: Optional[list] = json_data \
             if json_data is not None else self.get_data(identifier)
 
@@ -43,15 +68,77 @@ class Sensor():
             self.data) > 1 else None
         self.parse_location: bool = parse_location
         self.thingspeak_data: dict = {}
-        self.parent: Channel = Channel(channel_data=self.parent_data,)
-        self.child: Optional[Channel] = Channel(
-            channel_data=self.child_data) if self.child_data else None
+        channel_class = self._get_channel_class()
+        self.parent: Channel = channel_class(channel_data=self.parent_data,
+                                             transport=self.transport,
+                                             compact=compact,
+                                             store=store)
+        self.child: Optional[Channel] = channel_class(
+            channel_data=self.child_data,
+            transport=self.transport,
+            compact=compact,
+            store=store) if self.child_data else None
+        if compact:
+            self._use_channel_data()
         self.location_type: Optional[str] = self.parent.location_type
         # Parse the location (slow, so must be manually enabled)
         self.location: str = ''
         if self.parse_location:
             self.get_location()
 
+    def update(self, json_data: list) -> bool:
+        """
+        Update the sensor in place from newer network data, returning whether anything changed
+
+        Only channels with new readings are parsed again.
+        """
+        parent_data: dict = json_data[0]
+        child_data: Optional[dict] = json_data[1] if len(json_data) > 1 else None
+        changed = False
+
+        if self.parent.is_changed(parent_data):
+            lat_lon = (self.parent.lat, self.parent.lon)
+            self.parent.update(parent_data)
+            self.location_type = self.parent.location_type
+            if self.parse_location and lat_lon != (self.parent.lat, self.parent.lon):
+                self.get_location()
+            changed = True
+
+        if child_data is None:
+            changed = changed or self.child is not None
+            self.child = None
+        elif self.child is None:
+            self.child = self._get_channel_class()(channel_data=child_data,
+                                                   transport=self.transport,
+                                                   compact=self.compact,
+                                                   store=self.store)
+            changed = True
+        elif self.child.is_changed(child_data):
+            self.child.update(child_data)
+            changed = True
+
+        self.data = json_data
+        self.parent_data = parent_data
+        self.child_data = child_data
+        if self.compact:
+            self._use_channel_data()
+        return changed
+
+    def _get_channel_class(self) -> type:
+        """
+        Class used to build the channels of this sensor
+        """
+        return self.lazy_channel_class if self.lazy else self.channel_class
+
+    def _use_channel_data(self) -> None:
+        """
+        Point the sensor data at the channel data, so compact sensors keep no raw data
+        """
+        self.parent_data = self.parent.channel_data
+        self.child_data = self.child.channel_data if self.child else None
+        self.data = [self.parent_data] + \
+            ([self.child_data] if self.child_data is not None else [])
+
     @property
     def created_date(self):
         """Gets the date the sensor's first known active date
@@ -60,7 +147,6 @@ class Sensor():
         """
         return self.parent.created_date
 
-    # pylint: disable=no-self-use
     def get_data(self, identifier: int) -> Optional[list]:
         """
         Get new data if no data is provided
@@ -70,9 +156,22 @@ class Sensor():
             raise ValueError(f'Invalid sensor ID: {identifier}')
 
         # Fetch the JSON for parent and child sensors
-        session = CachedSession(expire_after=timedelta(hours=1))
-        response = session.get(f'{API_ROOT}?show={identifier}')
-        data = json.loads(response.content)
+        response = self.transport.get(f'{API_ROOT}?show={identifier}')
+        channel_data, parent_id = self.parse_results(
+            identifier, json.loads(response.content))
+        if parent_id is not None:
+            response = self.transport.get(f'{API_ROOT}?show={parent_id}')
+            channel_data = json.loads(response.content).get('results')
+        return channel_data
+
+    @staticmethod
+    def parse_results(identifier: int, data: dict) -> Tuple[Optional[list], Optional[int]]:
+        """
+        Validate the JSON returned for a sensor
+
+        Returns the channel data and, if a child sensor was requested, the ID of the
+        parent sensor that should be requested instead.
+        """
         channel_data: Optional[list] = data.get('results')
 
         # Handle various API problems
@@ -83,14 +182,12 @@ class Sensor():
             except IndexError:
                 raise IndexError from IndexError(
                     f'Parent sensor for {identifier} does not exist!')
-            response = session.get(f'{API_ROOT}?show={parent_id}')
-            data = json.loads(response.content)
-            channel_data = data.get('results')
-        elif channel_data and len(channel_data) > 2:
+            return None, parent_id
+        if channel_data and len(channel_data) > 2:
             print(json.dumps(data, indent=4))
             raise ValueError(
                 f'More than 2 channels found for {identifier}')
-        return channel_data
+        return channel_data, None
 
     def get_field(self, field: int) -> None:
         """
@@ -145,23 +242,18 @@ class Sensor():
 
     def get_location(self) -> None:
         """
-        Set the location for a Sensor using geopy
+        Set the location for a Sensor using its geocoder
 
-        UA Rules: https://operations.osmfoundation.org/policies/nominatim/
-        We do not want to have every user use the same UA, so we generate one per-user here
+        A sensor that was not given a geocoder creates one with `default_geocoder()`, which
+        caches locations on disk and only asks Nominatim about coordinates it has not seen.
         """
-        root_ua = 'pypi_purple_air_api_'
-        try:
-            user_agent = os.getcwd()
-            user_agent = root_ua + sub(r'\/|\\| ', '', user_agent)
-        except OSError:
-            print(
-                'Unable to read current directory name to generate Nominatim user agent!')
-            user_agent = f'{root_ua}anonymous_github_com_reagentx_purple_air_api'
-
-        geolocator = Nominatim(user_agent=user_agent)
-        location = geolocator.reverse(f'{self.parent.lat}, {self.parent.lon}')
-        self.location = str(location)
+        if self.parent.lat is None or self.parent.lon is None:
+            self.location = ''
+            return
+        if self.geocoder is None:
+            self.geocoder = default_geocoder()
+        location = self.geocoder.reverse(self.parent.lat, self.parent.lon)
+        self.location = location if location is not None else ''
 
     def as_dict(self) -> dict:
         """
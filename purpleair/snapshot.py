@@ -0,0 +1,97 @@
+"""
+Snapshots of parsed objects, so they can be restored without downloading or parsing them again
+
+Snapshots are pickles, so only load snapshots that you created.
+"""
+
+import copyreg
+import os
+import pickle  # nosec
+import time
+from typing import IO, Any, Callable, Dict, Optional
+
+from .utils import without_gc
+
+# Incremented whenever the saved classes change in a way older snapshots cannot be loaded
+SNAPSHOT_VERSION = 1
+
+
+def _shared(name: str) -> Any:
+    """
+    Placeholder saved instead of a shared object, replaced by `_Unpickler.find_class()`
+    """
+    raise pickle.UnpicklingError(f'Shared object {name} can only be loaded by read_snapshot()')
+
+
+def _reduce_shared(name: str) -> Callable[[Any], Any]:
+    """
+    Reducer that saves any object as a reference to the shared object `name`
+    """
+    return lambda _: (_shared, (name,))
+
+
+class _Unpickler(pickle.Unpickler):  # nosec
+    """
+    Unpickler that replaces each object saved by name with the `shared` object of that name
+    """
+
+    def __init__(self, file: IO[bytes], shared: Dict[str, Any]):
+        super().__init__(file)
+        self._shared = shared
+
+    def _get_shared(self, name: str) -> Any:
+        try:
+            return self._shared[name]
+        except KeyError as err:
+            raise pickle.UnpicklingError(f'Unknown shared object: {name}') from err
+
+    def find_class(self, module: str, name: str) -> Any:
+        if module == __name__ and name == '_shared':
+            return self._get_shared
+        return super().find_class(module, name)
+
+
+def write_snapshot(path: str, header: Dict[str, Any], obj: Any, shared: Dict[str, Any]) -> None:
+    """
+    Save `header` and then `obj` to `path`, replacing any previous snapshot at once
+
+    `shared` objects, such as the transport, are saved by name instead of being pickled,
+    and every object of the same type is treated as the same object. They must be given
+    again to `read_snapshot()`. The header also records `version` and `saved_at`, as
+    seconds since the epoch.
+    """
+    dispatch_table = copyreg.dispatch_table.copy()
+    for name, value in shared.items():
+        if value is not None:
+            dispatch_table[type(value)] = _reduce_shared(name)
+
+    # Unique per process, since several processes may save the same snapshot
+    temporary_path = f'{path}.{os.getpid()}.tmp'
+    with open(temporary_path, 'wb') as snapshot_file, without_gc():
+        pickle.dump(dict(header, version=SNAPSHOT_VERSION, saved_at=time.time()),
+                    snapshot_file, protocol=pickle.HIGHEST_PROTOCOL)
+        pickler = pickle.Pickler(snapshot_file, protocol=pickle.HIGHEST_PROTOCOL)
+        pickler.dispatch_table = dispatch_table  # type: ignore
+        pickler.dump(obj)
+    os.replace(temporary_path, path)
+
+
+def read_snapshot(path: str,
+                  shared: Dict[str, Any],
+                  is_current: Callable[[Dict[str, Any]], bool]) -> Optional[Any]:
+    """
+    Load the object saved in a snapshot, or `None` if it is missing, unreadable, or stale
+
+    Only the header is read unless it is from this `SNAPSHOT_VERSION` and `is_current(header)`.
+    """
+    try:
+        with open(path, 'rb') as snapshot_file:
+            header = pickle.load(snapshot_file)  # nosec
+            if not isinstance(header, dict) or header.get('version') != SNAPSHOT_VERSION \
+                    or not is_current(header):
+                return None
+            with without_gc():
+                return _Unpickler(snapshot_file, shared).load()  # nosec
+    # Snapshots of classes that have since changed may fail in other ways
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        return None
@@ -0,0 +1,98 @@
+"""
+Sources of the network data used to build a `SensorList`
+"""
+
+import abc
+import gzip
+from typing import Iterator, Optional, Union
+
+from .api_data import API_ROOT
+from .transport import Transport
+
+# First bytes of every gzip file
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+class DataSource(abc.ABC):
+    """
+    Source of a PurpleAir JSON payload for the whole network
+
+    Subclasses implement `read()`, and can implement `stream()` to avoid reading the
+    whole payload into memory.
+    """
+
+    @abc.abstractmethod
+    def read(self) -> bytes:
+        """
+        The whole payload
+        """
+
+    def stream(self, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """
+        The payload in chunks of up to `chunk_size` bytes
+        """
+        content = self.read()
+        for start in range(0, len(content), chunk_size):
+            yield content[start:start + chunk_size]
+
+
+class HTTPSource(DataSource):
+    """
+    The current network data from the PurpleAir API, requested through `transport`
+    """
+
+    def __init__(self, transport: Optional[Transport] = None, url: str = f'{API_ROOT}?q=""'):
+        self.transport: Transport = transport if transport is not None \
+            else Transport()
+        self.url = url
+
+    def read(self) -> bytes:
+        return self.transport.get(self.url).content
+
+    def stream(self, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        return self.transport.stream(self.url, chunk_size)
+
+
+class FileSource(DataSource):
+    """
+    A payload saved to a local file, which is decompressed if it is gzipped
+
+    The file is read again every time, so `SensorList.refresh()` sees changes to it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _is_gzipped(self) -> bool:
+        """
+        Whether the file starts with the gzip magic number
+        """
+        with open(self.path, 'rb') as payload_file:
+            return payload_file.read(len(GZIP_MAGIC)) == GZIP_MAGIC
+
+    def read(self) -> bytes:
+        if self._is_gzipped():
+            with gzip.open(self.path, 'rb') as payload_file:
+                return payload_file.read()
+        with open(self.path, 'rb') as payload_file:
+            return payload_file.read()
+
+    def stream(self, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        opener = gzip.open if self._is_gzipped() else open
+        with opener(self.path, 'rb') as payload_file:
+            chunk = payload_file.read(chunk_size)
+            while chunk:
+                yield chunk
+                chunk = payload_file.read(chunk_size)
+
+
+class MemorySource(DataSource):
+    """
+    A payload that is already in memory, such as one downloaded by another process
+    """
+
+    def __init__(self, payload: Union[bytes, str]):
+        self.payload = payload.encode() if isinstance(payload, str) else payload
+
+    def read(self) -> bytes:
+        return self.payload
@@ -0,0 +1,223 @@
+"""
+Spatial index for nearest-sensor, radius, and bounding-box queries
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Mean radius of the Earth, in kilometers
+EARTH_RADIUS_KM = 6371.0088
+
+# Kilometers per degree of latitude
+KM_PER_DEGREE = EARTH_RADIUS_KM * np.pi / 180
+
+# Half of the Earth's circumference, the largest possible distance between two points
+MAX_DISTANCE_KM = EARTH_RADIUS_KM * np.pi
+
+# Size of the grid cells coordinates are grouped into, in degrees of latitude and longitude
+CELL_DEGREES = 1.0
+
+# Number of grid cells from south to north and from west to east
+ROWS = int(round(180 / CELL_DEGREES))
+COLUMNS = int(round(360 / CELL_DEGREES))
+
+
+def haversine(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """
+    Great-circle distance in kilometers from one point to each of `lats` and `lons`
+    """
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + \
+        np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def _validate_point(lat: float, lon: float) -> None:
+    """
+    Raise a ValueError if a coordinate is not on the globe
+    """
+    if not -90 <= lat <= 90:
+        raise ValueError(f'Invalid latitude: {lat}. Must be between -90 and 90')
+    if not -180 <= lon <= 180:
+        raise ValueError(
+            f'Invalid longitude: {lon}. Must be between -180 and 180')
+
+
+def _ranges(starts: np.ndarray, stops: np.ndarray) -> np.ndarray:
+    """
+    Concatenation of `np.arange(start, stop)` for each pair of `starts` and `stops`
+    """
+    counts = stops - starts
+    offsets = np.cumsum(counts) - counts
+    return np.arange(int(counts.sum())) + np.repeat(starts - offsets, counts)
+
+
+def _cell_rows(south: float, north: float) -> np.ndarray:
+    """
+    Rows of grid cells that overlap the latitudes from `south` to `north`
+    """
+    first = int(np.clip((south + 90) // CELL_DEGREES, 0, ROWS - 1))
+    last = int(np.clip((north + 90) // CELL_DEGREES, 0, ROWS - 1))
+    return np.arange(first, last + 1)
+
+
+def _cells(rows: np.ndarray, columns: np.ndarray) -> np.ndarray:
+    """
+    Numbers of the grid cells in each of `rows` and `columns`
+    """
+    return (rows[:, None] * COLUMNS + columns[None, :]).ravel()
+
+
+def _cell_columns(west: float, east: float) -> np.ndarray:
+    """
+    Columns of grid cells that overlap the longitudes from `west` to `east`, crossing the
+    antimeridian if `west` is greater than `east`
+    """
+    first = int(np.clip((west + 180) // CELL_DEGREES, 0, COLUMNS - 1))
+    last = int(np.clip((east + 180) // CELL_DEGREES, 0, COLUMNS - 1))
+    if first <= last:
+        return np.arange(first, last + 1)
+    return np.concatenate([np.arange(first, COLUMNS), np.arange(0, last + 1)])
+
+
+class SpatialIndex():
+    """
+    Index of coordinates grouped into a grid of `CELL_DEGREES` cells of latitude and longitude
+
+    Queries find the cells that can contain a match with arithmetic on the query, and
+    only compute distances for the coordinates in those cells, instead of scanning every
+    coordinate. Results are positions into the original coordinate arrays; coordinates
+    that are missing are never returned.
+    """
+
+    def __init__(self, lat: pd.Series, lon: pd.Series):
+        lats = np.asarray(lat, dtype=float)
+        lons = np.asarray(lon, dtype=float)
+        if lats.shape != lons.shape:
+            raise ValueError(
+                f'Mismatched coordinates: {len(lats)} latitudes and {len(lons)} longitudes')
+        valid = np.flatnonzero(~(np.isnan(lats) | np.isnan(lons)))
+        rows = np.clip((lats[valid] + 90) // CELL_DEGREES, 0, ROWS - 1)
+        columns = np.clip((lons[valid] + 180) // CELL_DEGREES, 0, COLUMNS - 1)
+        cells = (rows * COLUMNS + columns).astype(np.int64)
+        order = np.argsort(cells, kind='stable')
+
+        self.positions: np.ndarray = valid[order]
+        self.lat: np.ndarray = lats[self.positions]
+        self.lon: np.ndarray = lons[self.positions]
+        # The slice of the sorted coordinates in each cell, by cell number
+        self.starts: np.ndarray = np.searchsorted(cells[order], np.arange(ROWS * COLUMNS))
+        self.stops: np.ndarray = np.append(self.starts[1:], len(self.positions))
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def _candidates(self, cells: np.ndarray, mask: Optional[np.ndarray]) -> np.ndarray:
+        """
+        Indices into the sorted coordinates of every coordinate in `cells` that `mask` allows
+        """
+        indices = _ranges(self.starts[cells], self.stops[cells])
+        if mask is not None:
+            indices = indices[mask[self.positions[indices]]]
+        return indices
+
+    @staticmethod
+    def _radius_cells(lat: float, lon: float, km: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Rows and columns of the grid cells that can hold coordinates within `km` of a point
+
+        The longitudes are those of the smallest box around the circle, which are all
+        longitudes if the circle contains a pole.
+        """
+        degrees = km / KM_PER_DEGREE
+        rows = _cell_rows(lat - degrees, lat + degrees)
+        if abs(lat) + degrees >= 90:
+            return rows, np.arange(COLUMNS)
+        spread = np.degrees(np.arcsin(np.sin(np.radians(degrees)) / np.cos(np.radians(lat))))
+        if spread >= 180:
+            return rows, np.arange(COLUMNS)
+        west = (lon - spread + 180) % 360 - 180
+        east = (lon + spread + 180) % 360 - 180
+        return rows, _cell_columns(west, east)
+
+    def within_radius(self,
+                      lat: float,
+                      lon: float,
+                      km: float,
+                      mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Positions and distances of every coordinate within `km` of a point, nearest first
+
+        If `mask` is given, only positions where `mask` is true are returned.
+        """
+        _validate_point(lat, lon)
+        if km < 0:
+            raise ValueError(f'Invalid radius: {km}. Must not be negative')
+        indices = self._candidates(_cells(*self._radius_cells(lat, lon, km)), mask)
+        distances = haversine(lat, lon, self.lat[indices], self.lon[indices])
+
+        keep = distances <= km
+        positions, distances = self.positions[indices[keep]], distances[keep]
+        order = np.argsort(distances, kind='stable')
+        return positions[order], distances[order]
+
+    def nearest(self,
+                lat: float,
+                lon: float,
+                k: int = 1,
+                mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Positions and distances of the `k` coordinates nearest to a point, nearest first
+
+        The search radius starts at the size of a cell and doubles until `k` coordinates
+        are within it. Distances are only computed once for each cell that is searched.
+        """
+        _validate_point(lat, lon)
+        if k < 1:
+            raise ValueError(f'Invalid k: {k}. Must be at least 1')
+        searched = np.zeros((ROWS, COLUMNS), dtype=bool)
+        indices = np.empty(0, dtype=np.int64)
+        distances = np.empty(0)
+        km = CELL_DEGREES * KM_PER_DEGREE
+        while True:
+            rows, columns = self._radius_cells(lat, lon, km)
+            block = np.ix_(rows, columns)
+            cells = _cells(rows, columns)[~searched[block].ravel()]
+            searched[block] = True
+            found = self._candidates(cells, mask)
+            indices = np.concatenate([indices, found])
+            distances = np.concatenate(
+                [distances, haversine(lat, lon, self.lat[found], self.lon[found])])
+            if np.count_nonzero(distances <= km) >= k or km >= MAX_DISTANCE_KM:
+                order = np.argsort(distances, kind='stable')[:k]
+                return self.positions[indices[order]], distances[order]
+            km = min(km * 2, MAX_DISTANCE_KM)
+
+    def within_bbox(self,
+                    south: float,
+                    west: float,
+                    north: float,
+                    east: float,
+                    mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Positions of every coordinate inside a bounding box, in their original order
+
+        A box with `west` greater than `east` crosses the antimeridian.
+        """
+        _validate_point(south, west)
+        _validate_point(north, east)
+        if south > north:
+            raise ValueError(
+                f'Invalid bounding box: south {south} is north of {north}')
+        indices = self._candidates(
+            _cells(_cell_rows(south, north), _cell_columns(west, east)), mask)
+        lats, lons = self.lat[indices], self.lon[indices]
+        keep = (lats >= south) & (lats <= north)
+        if west <= east:
+            keep &= (lons >= west) & (lons <= east)
+        else:
+            keep &= (lons >= west) | (lons <= east)
+        return np.sort(self.positions[indices[keep]])
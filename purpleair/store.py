@@ -0,0 +1,286 @@
+"""
+Persistent local store of historical ThingSpeak data
+
+Requires `pyarrow`, installed with `pip install purpleair[store]`.
+"""
+
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover
+    pa = None  # type: ignore
+
+# A time range, from `start` up to but not including `end`
+TimeRange = Tuple[datetime, datetime]
+
+# Format of the times in `coverage.json`
+COVERAGE_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
+
+
+def floor_day(date: datetime) -> datetime:
+    """
+    Midnight at the start of a date, the resolution of ThingSpeak start and end dates
+    """
+    return datetime(date.year, date.month, date.day)
+
+
+def merge_ranges(ranges: List[TimeRange]) -> List[TimeRange]:
+    """
+    Sort ranges and combine any that overlap or touch
+    """
+    merged: List[TimeRange] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def missing_ranges(covered: List[TimeRange], start: datetime, end: datetime) -> List[TimeRange]:
+    """
+    Parts of the range from `start` to `end` that are not in the merged `covered` ranges
+    """
+    gaps: List[TimeRange] = []
+    position = start
+    for covered_start, covered_end in covered:
+        if covered_end <= position:
+            continue
+        if covered_start >= end:
+            break
+        if covered_start > position:
+            gaps.append((position, covered_start))
+        position = max(position, covered_end)
+    if position < end:
+        gaps.append((position, end))
+    return gaps
+
+
+class HistoricalStore():
+    """
+    Cleaned historical channel data saved as Arrow IPC files under `root`
+
+    Data is partitioned by channel ID, ThingSpeak field, and month of `created_at`, in
+    `root/<channel>/<field>/<YYYY-MM>.arrow`. The time ranges that have been downloaded
+    are recorded next to the partitions in `coverage.json`, so ranges without any
+    readings are not downloaded again either. Times are naive UTC datetimes, like the
+    dates sent to ThingSpeak.
+    """
+
+    def __init__(self, root: str = 'purpleair_history'):
+        if pa is None:
+            raise ImportError(
+                'pyarrow is required for the historical store: pip install purpleair[store]')
+        self.root = root
+        self._lock = threading.Lock()
+
+    def _directory(self, channel_id: int, thingspeak_field: str) -> str:
+        """
+        Directory holding the partitions for one field of a channel
+        """
+        if thingspeak_field not in {'primary', 'secondary'}:
+            # pylint: disable=line-too-long
+            raise ValueError(
+                f'Invalid ThingSpeak key: {thingspeak_field}. Must be in {{"primary", "secondary"}}')
+        return os.path.join(self.root, str(int(channel_id)), thingspeak_field)
+
+    def _partition_path(self, channel_id: int, thingspeak_field: str, month: str) -> str:
+        """
+        Path to the partition for a month, formatted as `YYYY-MM`
+        """
+        return os.path.join(self._directory(channel_id, thingspeak_field), f'{month}.arrow')
+
+    def coverage(self, channel_id: int, thingspeak_field: str) -> List[TimeRange]:
+        """
+        Time ranges that have been downloaded for a field of a channel, in order
+        """
+        path = os.path.join(self._directory(
+            channel_id, thingspeak_field), 'coverage.json')
+        try:
+            with open(path, 'r', encoding='utf-8') as coverage_file:
+                ranges = json.load(coverage_file)
+        except FileNotFoundError:
+            return []
+        return [(datetime.strptime(start, COVERAGE_FORMAT),
+                 datetime.strptime(end, COVERAGE_FORMAT)) for start, end in ranges]
+
+    def _set_coverage(self,
+                      channel_id: int,
+                      thingspeak_field: str,
+                      ranges: List[TimeRange]) -> None:
+        """
+        Replace the downloaded time ranges for a field of a channel
+        """
+        path = os.path.join(self._directory(
+            channel_id, thingspeak_field), 'coverage.json')
+        temporary_path = f'{path}.tmp'
+        with open(temporary_path, 'w', encoding='utf-8') as coverage_file:
+            json.dump([[start.strftime(COVERAGE_FORMAT), end.strftime(COVERAGE_FORMAT)]
+                       for start, end in ranges], coverage_file)
+        os.replace(temporary_path, path)
+
+    def missing(self,
+                channel_id: int,
+                thingspeak_field: str,
+                start: datetime,
+                end: datetime) -> List[TimeRange]:
+        """
+        Parts of a time range that have not been downloaded yet
+        """
+        return missing_ranges(self.coverage(channel_id, thingspeak_field), start, end)
+
+    @staticmethod
+    def _open_partition(path: str) -> Optional['pa.Table']:
+        """
+        Memory-map a partition file without reading it, or `None` if it does not exist
+        """
+        if not os.path.exists(path):
+            return None
+        with pa.memory_map(path) as source:
+            # The table's buffers keep the mapping open once the file is closed
+            return pa.ipc.open_file(source).read_all()
+
+    def _read_partition(self, path: str) -> Optional[pd.DataFrame]:
+        """
+        Read a partition file, or `None` if it does not exist
+        """
+        table = self._open_partition(path)
+        return table.to_pandas() if table is not None else None
+
+    @staticmethod
+    def _write_partition(path: str, data: pd.DataFrame) -> None:
+        """
+        Replace a partition file, so readers never see a partially written file
+        """
+        table = pa.Table.from_pandas(data, preserve_index=True)
+        temporary_path = f'{path}.tmp'
+        with pa.OSFile(temporary_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(temporary_path, path)
+
+    def append(self,
+               channel_id: int,
+               thingspeak_field: str,
+               data: pd.DataFrame,
+               ranges: List[TimeRange]) -> None:
+        """
+        Save cleaned data downloaded for `ranges`, then mark those ranges as downloaded
+
+        Rows that are already stored are replaced, matched by their `entry_id` index.
+        Ranges are only marked up to the start of the current UTC day, so days that
+        may still get new readings are downloaded again.
+        """
+        today = floor_day(datetime.utcnow())
+        with self._lock:
+            os.makedirs(self._directory(
+                channel_id, thingspeak_field), exist_ok=True)
+            months = data['created_at'].dt.strftime('%Y-%m')
+            for month, rows in data.groupby(months, sort=False):
+                path = self._partition_path(
+                    channel_id, thingspeak_field, month)
+                existing = self._read_partition(path)
+                if existing is not None:
+                    rows = pd.concat([existing, rows])
+                    rows = rows[~rows.index.duplicated(keep='last')]
+                self._write_partition(
+                    path, rows.sort_values('created_at', kind='stable'))
+
+            completed = [(start, min(end, today))
+                         for start, end in ranges if start < today]
+            self._set_coverage(channel_id, thingspeak_field, merge_ranges(
+                self.coverage(channel_id, thingspeak_field) + completed))
+
+    @staticmethod
+    def _months(start: datetime, end: datetime) -> Iterable[str]:
+        """
+        Each month overlapping the range from `start` up to `end`, formatted as `YYYY-MM`
+        """
+        month = datetime(start.year, start.month, 1)
+        while month < end:
+            yield month.strftime('%Y-%m')
+            month = (month + timedelta(days=32)).replace(day=1)
+
+    @staticmethod
+    def _project(table: 'pa.Table', columns: Optional[List[str]]) -> 'pa.Table':
+        """
+        Keep only `columns` of a partition, along with `created_at` and the `entry_id` index
+        """
+        if columns is None:
+            return table
+        unknown = set(columns) - set(table.column_names)
+        if unknown:
+            raise ValueError(
+                f'Unknown columns: {sorted(unknown)}. Must be in {table.column_names}')
+        keep = set(columns) | {'created_at', 'entry_id'}
+        return table.select([name for name in table.column_names if name in keep])
+
+    def scan(self,
+             channel_id: int,
+             thingspeak_field: str,
+             start: datetime,
+             end: datetime,
+             columns: Optional[List[str]] = None) -> 'pa.Table':
+        """
+        Memory-map the stored data for a field of a channel from `start` up to `end`
+
+        Only the monthly partitions that overlap the range are opened. Each one is sliced
+        with a binary search on `created_at` and projected to `columns` without copying,
+        so only the pages that are used are read from disk. If no partition exists, the
+        table has no columns.
+        """
+        tables = []
+        bounds = [np.datetime64(start), np.datetime64(end)]
+        for month in self._months(start, end):
+            table = self._open_partition(self._partition_path(
+                channel_id, thingspeak_field, month))
+            if table is None:
+                continue
+            # Partitions are sorted by `created_at`
+            first, last = np.searchsorted(
+                table.column('created_at').to_numpy(), bounds)
+            tables.append(self._project(
+                table.slice(first, last - first), columns))
+        if not tables:
+            return pa.table({})
+        # Months may have been typed differently, e.g. integers and floats
+        return pa.concat_tables(tables, promote_options='permissive')
+
+    def read(self,
+             channel_id: int,
+             thingspeak_field: str,
+             start: datetime,
+             end: datetime,
+             columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Read the stored data for a field of a channel from `start` up to `end`
+
+        Uses `scan()`, so numeric columns of a single partition without missing values
+        share memory with the mapped file. If no partition exists, the DataFrame is
+        empty and has no columns.
+        """
+        return self.scan(channel_id, thingspeak_field, start, end, columns).to_pandas(
+            split_blocks=True)
+
+    def sync(self,
+             channel_id: int,
+             thingspeak_field: str,
+             start: datetime,
+             end: datetime,
+             download: Callable[[List[TimeRange]], pd.DataFrame]) -> None:
+        """
+        Download and save only the parts of a time range that are not stored yet
+
+        `download` is called with the missing ranges and must return their cleaned data.
+        """
+        gaps = self.missing(channel_id, thingspeak_field, start, end)
+        if gaps:
+            self.append(channel_id, thingspeak_field, download(gaps), gaps)
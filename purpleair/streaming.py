@@ -0,0 +1,139 @@
+"""
+Incremental parsing of the PurpleAir network payload
+"""
+
+import codecs
+import json
+import re
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+# Whitespace allowed between JSON tokens
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class _Scanner():
+    """
+    Decodes JSON values one at a time from a buffer that is refilled as it is consumed
+    """
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self._decoder = json.JSONDecoder()
+        self._exhausted = False
+        self.buffer = ''
+        self.position = 0
+
+    def fill(self) -> bool:
+        """
+        Append the next chunk to the buffer, dropping what has been consumed
+        """
+        if self._exhausted:
+            return False
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self._exhausted = True
+            text = self._text.decode(b'', final=True)
+        else:
+            text = self._text.decode(chunk)
+        self.buffer = self.buffer[self.position:] + text
+        self.position = 0
+        return True
+
+    def peek(self) -> str:
+        """
+        Skip whitespace and return the next character without consuming it
+        """
+        while True:
+            match = WHITESPACE.match(self.buffer, self.position)
+            self.position = match.end() if match is not None else self.position
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self.fill():
+                raise ValueError('Unexpected end of JSON data')
+
+    def expect(self, characters: str) -> str:
+        """
+        Consume the next character, which must be one of `characters`
+        """
+        character = self.peek()
+        if character not in characters:
+            raise ValueError(
+                f'Expected one of {characters!r} at position {self.position}, found {character!r}')
+        self.position += 1
+        return character
+
+    def value(self) -> Any:
+        """
+        Decode the next complete JSON value
+        """
+        self.peek()
+        while True:
+            try:
+                result, end = self._decoder.raw_decode(
+                    self.buffer, self.position)
+            except json.JSONDecodeError:
+                # The value may continue in the next chunk
+                if not self.fill():
+                    raise
+                continue
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self.buffer) and self.fill():
+                continue
+            self.position = end
+            return result
+
+
+def _iter_results(chunks: Iterable[bytes], metadata: Dict[str, Any]) -> Iterator[dict]:
+    """
+    Yield each entry in `results`, decoding one entry at a time
+    """
+    scanner = _Scanner(chunks)
+    # Every entry has the same keys, so they are shared like `json.loads()` does
+    keys: Dict[str, str] = {}
+    scanner.expect('{')
+    if scanner.peek() == '}':
+        return
+    while True:
+        key = scanner.value()
+        scanner.expect(':')
+        if key == 'results' and scanner.peek() == '[':
+            metadata['results'] = True
+            scanner.expect('[')
+            if scanner.peek() == ']':
+                scanner.expect(']')
+            else:
+                while True:
+                    entry = scanner.value()
+                    if isinstance(entry, dict):
+                        entry = {keys.setdefault(k, k): v for k, v in entry.items()}
+                    yield entry
+                    if scanner.expect(',]') == ']':
+                        break
+        else:
+            metadata[key] = scanner.value()
+        if scanner.expect(',}') == '}':
+            return
+
+
+def iter_results(chunks: Iterable[bytes],
+                 metadata: Optional[Dict[str, Any]] = None) -> Iterator[dict]:
+    """
+    Yield each sensor in the `results` array of a network payload as it is downloaded
+
+    Only one sensor is decoded at a time, with the C accelerated `json` decoder, so the
+    payload never has to be held in memory. Other top level values are stored in
+    `metadata`, if it is given.
+    """
+    metadata = metadata if metadata is not None else {}
+    try:
+        yield from _iter_results(chunks, metadata)
+    except ValueError as err:
+        raise ValueError('Invalid JSON data returned from network!') from err
+
+    # Handle rate limit or other error message
+    if 'results' not in metadata:
+        message = metadata.get('message')
+        error_message = message if message is not None else metadata
+        raise ValueError(
+            f'No sensor data returned from PurpleAir: {error_message}')
@@ -0,0 +1,134 @@
+"""
+Shared HTTP transport for the PurpleAir and ThingSpeak APIs
+"""
+
+import csv
+import io
+from datetime import timedelta
+from typing import Any, Iterator, Optional
+
+import pandas as pd
+from requests import Response, Session
+from requests.adapters import HTTPAdapter
+from requests_cache import CachedSession
+
+from .metrics import Metrics
+
+
+class Transport():
+    """
+    Pooled, cached HTTP session shared by `SensorList`, `Sensor`, and `Channel`
+
+    Connections are kept alive and reused across requests, and the response cache is
+    opened once instead of once per request. Extra keyword arguments, such as `backend`
+    or `cache_name`, are passed to `requests_cache.CachedSession`.
+
+    CSV data is parsed with the pandas `csv_engine`; `'pyarrow'` is faster, but requires
+    `pyarrow`.
+
+    Request latency, cache hits and misses, bytes downloaded, and CSV parsing are recorded
+    in `metrics`, along with the parsing done by every object that uses this transport.
+    """
+
+    def __init__(self,
+                 session: Optional[Session] = None,
+                 pool_size: int = 10,
+                 timeout: Optional[float] = 30.0,
+                 *,
+                 expire_after: timedelta = timedelta(hours=1),
+                 csv_engine: str = 'c',
+                 metrics: Optional[Metrics] = None,
+                 **cache_options: Any):
+        self.session: Session = session if session is not None else CachedSession(
+            expire_after=expire_after, **cache_options)
+        adapter = HTTPAdapter(pool_connections=pool_size,
+                              pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.timeout = timeout
+        self.csv_engine = csv_engine
+        self.metrics: Metrics = metrics if metrics is not None else Metrics()
+
+        # Streamed responses bypass the cache, which would read the whole body,
+        # but share the same connection pool
+        self.stream_session: Session = self.session
+        if isinstance(self.session, CachedSession):
+            self.stream_session = Session()
+            self.stream_session.mount('https://', adapter)
+            self.stream_session.mount('http://', adapter)
+
+    def get(self, url: str) -> Response:
+        """
+        Make a GET request using the shared session
+        """
+        with self.metrics.timer('http_request_seconds'):
+            response = self.session.get(url, timeout=self.timeout)
+        self._record_response(response.content, getattr(response, 'from_cache', None))
+        return response
+
+    def _record_response(self, content: bytes, from_cache: Optional[bool] = None) -> None:
+        """
+        Count a response, and whether it came from the cache if the session has one
+        """
+        self.metrics.increment('http_requests')
+        self.metrics.increment('http_bytes', len(content))
+        if from_cache is not None:
+            self.metrics.increment('http_cache_hits' if from_cache else 'http_cache_misses')
+
+    def stream(self, url: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """
+        Make an uncached GET request and yield the response body in chunks as it arrives
+        """
+        with self.metrics.timer('http_request_seconds'):
+            response = self.stream_session.get(
+                url, timeout=self.timeout, stream=True)
+        self.metrics.increment('http_requests')
+        try:
+            response.raise_for_status()
+            for chunk in response.iter_content(chunk_size):
+                self.metrics.increment('http_bytes', len(chunk))
+                yield chunk
+        finally:
+            response.close()
+
+    def read_csv(self, url: str, **kwargs: Any) -> pd.DataFrame:
+        """
+        Download CSV data into a DataFrame, raising `requests.HTTPError` for error responses
+        """
+        response = self.get(url)
+        response.raise_for_status()
+        return self._parse_csv(response.content, **kwargs)
+
+    def _parse_csv(self, content: bytes, **kwargs: Any) -> pd.DataFrame:
+        """
+        Parse CSV data with `csv_engine`, recording how long it takes and how many rows it has
+        """
+        with self.metrics.timer('csv_parse_seconds'):
+            data = parse_csv(content, self.csv_engine, **kwargs)
+        self.metrics.observe('csv_rows', len(data))
+        return data
+
+    def close(self) -> None:
+        """
+        Close all pooled connections
+        """
+        self.session.close()
+        self.stream_session.close()
+
+
+def parse_csv(content: bytes, engine: str = 'c', **kwargs: Any) -> pd.DataFrame:
+    """
+    Parse CSV data into a DataFrame with a pandas parser `engine`
+
+    The pyarrow engine does not accept a callable `usecols`, so it is resolved against
+    the header row, and types for columns that are not used are dropped.
+    """
+    usecols = kwargs.get('usecols')
+    if engine == 'pyarrow' and callable(usecols):
+        header = next(csv.reader([content.split(b'\n', 1)[0].decode('utf-8')]), [])
+        kwargs['usecols'] = [name for name in header if usecols(name)]
+        if isinstance(kwargs.get('dtype'), dict):
+            kwargs['dtype'] = {name: dtype for name, dtype in kwargs['dtype'].items()
+                               if name in kwargs['usecols']}
+    kwargs['engine'] = engine
+    return pd.read_csv(io.BytesIO(content), **kwargs)
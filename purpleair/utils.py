@@ -0,0 +1,22 @@
+"""
+Helpers shared by the modules that build many objects at once
+"""
+
+import gc
+from contextlib import contextmanager
+from typing import Iterator
+
+
+@contextmanager
+def without_gc() -> Iterator[None]:
+    """
+    Pause the cyclic garbage collector, which would otherwise run many times while the
+    objects of a large snapshot or network are created
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
@@ -0,0 +1,459 @@
+"""
+Benchmarks for network parsing, DataFrame conversion, and historical data ingestion
+
+Every stage runs through the public API against synthetic data, or against a recorded
+network payload scaled to the requested number of sensors, so no requests are made. Each
+stage reports its best time and its peak memory, and results can be saved as a baseline
+to compare against:
+
+    python scripts/benchmark.py --sensors 10000 100000 --years 1 3 --save baseline.json
+    python scripts/benchmark.py --sensors 10000 100000 --years 1 3 --compare baseline.json
+
+Columnar networks are also built with each number of `--workers`, to compare building the
+channel DataFrames in one process with building them in several.
+
+Stages that need a feature the checked out library does not have are skipped, so the same
+benchmark can be run against an older version to save a baseline.
+"""
+
+import argparse
+import gc
+import gzip
+import inspect
+import io
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, redirect_stdout
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+from requests import Response, Session
+
+# Import the package from this checkout, so the benchmark runs without installing it
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# pylint: disable=wrong-import-position
+from purpleair.channel import Channel
+from purpleair.network import SensorList
+
+try:
+    from purpleair.api_data import THINGSPEAK_ROW_LIMIT
+except ImportError:
+    # Older versions did not handle the row limit, which ThingSpeak still applies
+    THINGSPEAK_ROW_LIMIT = 8000
+try:
+    from purpleair.transport import Transport
+except ImportError:
+    # Older versions made requests without a transport
+    Transport = None  # type: ignore
+
+# Synthetic ThingSpeak readings are aligned to this time, one every `READING_INTERVAL`
+EPOCH = datetime(2015, 1, 1)
+READING_INTERVAL = timedelta(minutes=2)
+# Historical data is requested up to this date, so every run downloads the same readings
+END_DATE = datetime(2022, 1, 1)
+# Format of the `start` and `end` of ThingSpeak requests
+THINGSPEAK_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Filters timed with `SensorList.to_dataframe()`
+SENSOR_FILTERS = ('all', 'outside', 'useful', 'family')
+# `(column, value_filter)` pairs timed with `SensorList.filter_column()`
+COLUMN_FILTERS = (('pm_2.5', None), ('location_type', 'outside'))
+
+# Stage name mapped to `{'seconds': best time, 'peak_mib': peak memory}`
+Results = Dict[str, Dict[str, float]]
+
+
+def accepts(function: Callable, argument: str) -> bool:
+    """
+    Whether the checked out library's `function` takes `argument`
+    """
+    return argument in inspect.signature(function).parameters
+
+
+def synthetic_channel(rng: random.Random, identifier: int,
+                      parent: Optional[int] = None) -> dict:
+    """
+    Channel data with every key that is parsed, and plausible values
+    """
+    pm2_5 = rng.uniform(0, 80)
+    last_seen = int(END_DATE.timestamp()) - rng.randint(0, 3600)
+    entry = {
+        'ID': identifier, 'Label': f'Sensor {identifier}',
+        'DEVICE_LOCATIONTYPE': rng.choice(('outside', 'outside', 'inside')),
+        'THINGSPEAK_PRIMARY_ID': str(100000 + identifier), 'THINGSPEAK_PRIMARY_ID_READ_KEY': 'KEY',
+        'THINGSPEAK_SECONDARY_ID': str(500000 + identifier),
+        'THINGSPEAK_SECONDARY_ID_READ_KEY': 'KEY',
+        'Lat': round(rng.uniform(-50, 65), 6), 'Lon': round(rng.uniform(-160, 170), 6),
+        'PM2_5Value': f'{pm2_5:.2f}', 'LastSeen': last_seen, 'Type': 'PMS5003+PMS5003+BME280',
+        'Hidden': rng.choice(('false', 'false', 'false', 'true')), 'isOwner': 0,
+        'humidity': str(rng.randint(5, 95)), 'temp_f': str(rng.randint(20, 105)),
+        'pressure': f'{rng.uniform(950, 1030):.2f}', 'AGE': rng.randint(0, 60),
+        'DEVICE_BRIGHTNESS': '15', 'DEVICE_HARDWAREDISCOVERED': '2.0+BME280+PMSX003-B+PMSX003-A',
+        'Version': '6.01', 'LastUpdateCheck': last_seen - 900, 'Created': 1500000000,
+        'Uptime': str(rng.randint(0, 10 ** 6)), 'RSSI': str(rng.randint(-90, -30)), 'Adc': '0.0',
+        'Stats': json.dumps({
+            'v': pm2_5, 'v1': pm2_5, 'v2': pm2_5, 'v3': pm2_5, 'v4': pm2_5, 'v5': pm2_5,
+            'v6': pm2_5, 'pm': pm2_5, 'lastModified': last_seen * 1000,
+            'timeSinceModified': 120000}),
+    }
+    for key in ('p_0_3_um', 'p_0_5_um', 'p_1_0_um', 'p_2_5_um', 'p_5_0_um', 'p_10_0_um',
+                'pm1_0_cf_1', 'pm2_5_cf_1', 'pm10_0_cf_1', 'pm1_0_atm', 'pm2_5_atm',
+                'pm10_0_atm'):
+        entry[key] = f'{rng.uniform(0, 100):.2f}'
+    if rng.random() < 0.05:
+        entry['Flag'] = 1
+    if rng.random() < 0.02:
+        entry['A_H'] = 'true'
+    if parent is not None:
+        entry['ParentID'] = parent
+        del entry['DEVICE_LOCATIONTYPE']
+    return entry
+
+
+def synthetic_results(sensors: int, seed: int = 0) -> List[dict]:
+    """
+    Network results for `sensors` sensors, most of which have a child channel
+    """
+    rng = random.Random(seed)
+    results = []
+    for index in range(sensors):
+        identifier = 2 * index + 1
+        results.append(synthetic_channel(rng, identifier))
+        if rng.random() < 0.9:
+            results.append(synthetic_channel(rng, identifier + 1, parent=identifier))
+    return results
+
+
+def scale_results(results: List[dict], sensors: int) -> List[dict]:
+    """
+    Repeat the sensors of recorded network results, with new IDs, until there are `sensors`
+    """
+    parents = [entry for entry in results if 'ParentID' not in entry]
+    if not parents:
+        raise ValueError('The recorded payload has no parent channels!')
+    children = {entry['ParentID']: entry for entry in results if 'ParentID' in entry}
+    scaled = []
+    for index in range(sensors):
+        parent = parents[index % len(parents)]
+        identifier = 2 * index + 1
+        scaled.append(dict(parent, ID=identifier))
+        child = children.get(parent['ID'])
+        if child is not None:
+            scaled.append(dict(child, ID=identifier + 1, ParentID=identifier))
+    return scaled
+
+
+def read_payload(path: str) -> bytes:
+    """
+    Read a recorded network payload, which may be gzipped
+    """
+    with open(path, 'rb') as payload_file:
+        payload = payload_file.read()
+    return gzip.decompress(payload) if payload[:2] == b'\x1f\x8b' else payload
+
+
+def synthetic_csv(start: datetime,
+                  end: datetime,
+                  fields: List[int],
+                  row_limit: Optional[int] = None) -> bytes:
+    """
+    ThingSpeak CSV data for `fields` between `start` and `end`, keeping only the most
+    recent `row_limit` rows like ThingSpeak
+    """
+    interval = pd.Timedelta(READING_INTERVAL)
+    epoch = pd.Timestamp(EPOCH)
+    first = epoch + -(-(pd.Timestamp(start) - epoch) // interval) * interval
+    times = pd.date_range(first, end, freq=interval, inclusive='left')
+    if row_limit is not None:
+        times = times[-row_limit:]
+    entry_ids = np.asarray((times - epoch) // interval + 1)
+
+    data = pd.DataFrame({'created_at': times.strftime('%Y-%m-%d %H:%M:%S UTC'),
+                         'entry_id': entry_ids})
+    for field in fields:
+        data[f'field{field}'] = np.round(20 + 10 * np.sin(entry_ids / (100 + field)), 2)
+    return data.to_csv(index=False).encode()
+
+
+class SyntheticSession(Session):
+    """
+    Session that answers ThingSpeak requests with synthetic CSV data instead of making them
+
+    Responses are kept, so repeated requests take no time, like a warm response cache.
+    Each response has at most `row_limit` rows, the most recent ones, like ThingSpeak.
+    """
+
+    def __init__(self, row_limit: Optional[int] = THINGSPEAK_ROW_LIMIT) -> None:
+        super().__init__()
+        self.row_limit = row_limit
+        self.responses: Dict[str, bytes] = {}
+
+    def get(self, url, params=None, **kwargs):  # type: ignore
+        if url not in self.responses:
+            parsed_url = urlparse(url)
+            query = parse_qs(parsed_url.query)
+            start = datetime.strptime(query['start'][0], THINGSPEAK_TIME_FORMAT)
+            end = datetime.strptime(query['end'][0], THINGSPEAK_TIME_FORMAT) \
+                if 'end' in query else END_DATE
+            fields = [int(parsed_url.path.rsplit('/', 1)[1].split('.')[0])] \
+                if '/fields/' in parsed_url.path else list(range(1, 9))
+            self.responses[url] = synthetic_csv(start, end, fields, self.row_limit)
+        response = Response()
+        response.status_code = 200
+        response.url = url
+        # pylint: disable=protected-access
+        response._content = self.responses[url]
+        return response
+
+
+@contextmanager
+def serve_read_csv(session: SyntheticSession) -> Iterator[None]:
+    """
+    Answer ThingSpeak URLs passed to `pd.read_csv()` from `session`
+
+    Versions without a transport read historical data by passing its URL to pandas.
+    """
+    read_csv = pd.read_csv
+
+    def synthetic_read_csv(source: Any, *args: Any, **kwargs: Any) -> pd.DataFrame:
+        if isinstance(source, str) and source.startswith('https://thingspeak.com'):
+            source = io.BytesIO(session.get(source).content)
+        return read_csv(source, *args, **kwargs)
+
+    with mock.patch.object(pd, 'read_csv', synthetic_read_csv):
+        yield
+
+
+def synthetic_thingspeak_channel(session: SyntheticSession, csv_engine: str = 'c') -> Channel:
+    """
+    A channel whose historical data comes from `session`, through a transport if it takes one
+    """
+    channel_data = synthetic_channel(random.Random(0), 1)
+    if accepts(Channel.__init__, 'transport'):
+        return Channel(channel_data, transport=Transport(session=session, csv_engine=csv_engine))
+    return Channel(channel_data)
+
+
+def build_network(payload: bytes, **options: Any) -> SensorList:
+    """
+    Build a network from a payload without requesting it
+
+    Versions without `SensorList.from_payload()` are built from the decoded results.
+    """
+    if hasattr(SensorList, 'from_payload'):
+        return SensorList.from_payload(payload, **options)
+    network = SensorList.__new__(SensorList)
+    network.parse_location = False
+    network.all_sensors = []
+    network.parse_raw_result(json.loads(payload)['results'])
+    network.generate_sensor_list()
+    return network
+
+
+def measure(setup: Callable[[], Any],
+            stage: Callable[[Any], Any],
+            repeat: int,
+            warmup: bool = False) -> Dict[str, float]:
+    """
+    Best time of `stage(setup())` over `repeat` runs, and its peak memory in another run
+
+    `setup()` is not measured. Memory is traced in a separate run, since tracing slows
+    every allocation down. Anything the stage prints is discarded.
+    """
+    with redirect_stdout(io.StringIO()):
+        if warmup:
+            stage(setup())
+        times = []
+        for _ in range(repeat):
+            argument = setup()
+            gc.collect()
+            start = time.perf_counter()
+            stage(argument)
+            times.append(time.perf_counter() - start)
+            del argument
+
+        argument = setup()
+        gc.collect()
+        tracemalloc.start()
+        try:
+            stage(argument)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return {'seconds': min(times), 'peak_mib': peak / 2 ** 20}
+
+
+def network_stages(results: List[dict], repeat: int, workers: List[int]) -> Results:
+    """
+    Build a network from a payload in each mode, and in columnar mode with each number of
+    `workers`, then convert it to DataFrames
+    """
+    payload = json.dumps({'results': results}).encode()
+    # Nothing is requested, but a transport would open a response cache
+    shared: Dict[str, Any] = {'transport': Transport(session=SyntheticSession())} \
+        if accepts(SensorList.__init__, 'transport') else {}
+    label = f'[{sum(1 for entry in results if "ParentID" not in entry)} sensors]'
+    measured: Results = {}
+    modes = ['sensors'] + [mode for mode in ('columnar', 'compact', 'lazy')
+                           if accepts(SensorList.__init__, mode)]
+    for mode in modes:
+        options = {} if mode == 'sensors' else {mode: True}
+        measured[f'SensorList({mode}) {label}'] = measure(
+            partial(dict, options, **shared),
+            lambda options: build_network(payload, **options), repeat)
+    if 'columnar' in modes and accepts(SensorList.__init__, 'workers'):
+        for count in workers:
+            measured[f'SensorList(columnar, workers={count}) {label}'] = measure(
+                partial(dict, columnar=True, workers=count, **shared),
+                lambda options: build_network(payload, **options), repeat)
+
+    # Every conversion starts from a new network, like the first one after a refresh
+    new_network = partial(build_network, payload, **shared)
+    for sensor_filter in SENSOR_FILTERS:
+        measured[f'to_dataframe({sensor_filter}) {label}'] = measure(
+            new_network,
+            partial(SensorList.to_dataframe, sensor_filter=sensor_filter, channel='parent'),
+            repeat)
+    for column, value_filter in COLUMN_FILTERS:
+        measured[f'filter_column({column}={value_filter}) {label}'] = measure(
+            new_network, partial(SensorList.filter_column, channel='parent', column=column,
+                                 value_filter=value_filter),
+            repeat)
+    return measured
+
+
+def csv_stages(years: int, repeat: int) -> Results:
+    """
+    Parse and clean a ThingSpeak CSV with `years` of readings with each CSV engine
+    """
+    label = f'[{years} years]'
+    start_date = END_DATE - timedelta(weeks=52 * years)
+    measured: Results = {}
+
+    engines = ['c']
+    try:
+        import pyarrow  # pylint: disable=import-outside-toplevel,unused-import
+        if Transport is not None and accepts(Transport.__init__, 'csv_engine'):
+            engines.append('pyarrow')
+    except ImportError:
+        pass
+    for engine in engines:
+        # Every reading in one response, as if ThingSpeak had no row limit
+        session = SyntheticSession(row_limit=None)
+        channel = synthetic_thingspeak_channel(session, engine)
+        with serve_read_csv(session):
+            measured[f'get_historical_between({engine}) {label}'] = measure(
+                partial(str, 'primary'),
+                partial(channel.get_historical_between, start_date=start_date,
+                        end_date=END_DATE),
+                repeat, warmup=True)
+    return measured
+
+
+def historical_stages(years: int, repeat: int) -> Results:
+    """
+    Download `years` of readings one week at a time from a synthetic ThingSpeak
+    """
+    session = SyntheticSession()
+    channel = synthetic_thingspeak_channel(session)
+    weeks = 52 * years
+    label = f'[{years} years]'
+    measured: Results = {}
+    with serve_read_csv(session):
+        measured[f'get_historical {label}'] = measure(
+            lambda: None,
+            lambda _: channel.get_historical(weeks, 'primary', start_date=END_DATE),
+            repeat, warmup=True)
+        measured[f'get_all_historical {label}'] = measure(
+            lambda: None, lambda _: channel.get_all_historical(weeks, start_date=END_DATE),
+            repeat, warmup=True)
+    return measured
+
+
+def compare(measured: Results, baseline: Results, tolerance: float) -> List[str]:
+    """
+    Print each stage against the baseline, returning the stages that regressed
+
+    A stage regressed if its time or peak memory is more than `tolerance` above the baseline.
+    """
+    regressed = []
+    print(f'\n{"stage":<52} {"time":>8} {"memory":>8}')
+    for stage, result in measured.items():
+        if stage not in baseline:
+            print(f'{stage:<52} {"new":>8} {"new":>8}')
+            continue
+        time_ratio = result['seconds'] / max(baseline[stage]['seconds'], 1e-9)
+        memory_ratio = result['peak_mib'] / max(baseline[stage]['peak_mib'], 1e-9)
+        flag = ''
+        if time_ratio > 1 + tolerance or memory_ratio > 1 + tolerance:
+            regressed.append(stage)
+            flag = '  REGRESSED'
+        print(f'{stage:<52} {time_ratio:>7.2f}x {memory_ratio:>7.2f}x{flag}')
+    return regressed
+
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    """
+    Run the benchmarks, returning 1 if any stage regressed from the baseline
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n', maxsplit=1)[0].strip())
+    parser.add_argument('--sensors', type=int, nargs='+', default=[10000],
+                        help='network sizes to benchmark (default: 10000)')
+    parser.add_argument('--years', type=int, nargs='+', default=[1],
+                        help='years of historical data to benchmark (default: 1)')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4],
+                        help='worker processes to build columnar networks with (default: 1 4)')
+    parser.add_argument('--payload',
+                        help='recorded network payload, which may be gzipped, scaled to each size '
+                             'instead of synthetic sensors')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='runs of each stage, of which the fastest is kept (default: 3)')
+    parser.add_argument('--save', help='save the results as a baseline to this file')
+    parser.add_argument('--compare', help='compare the results against a saved baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='fraction a stage may be slower or use more memory than the '
+                             'baseline before it counts as a regression (default: 0.2)')
+    options = parser.parse_args(arguments)
+
+    recorded = json.loads(read_payload(options.payload))['results'] \
+        if options.payload else None
+    measured: Results = {}
+    for sensors in options.sensors:
+        results = scale_results(recorded, sensors) if recorded is not None \
+            else synthetic_results(sensors)
+        measured.update(network_stages(results, options.repeat, options.workers))
+    for years in options.years:
+        measured.update(csv_stages(years, options.repeat))
+        measured.update(historical_stages(years, options.repeat))
+
+    print(f'\n{"stage":<52} {"seconds":>8} {"peak MiB":>9}')
+    for stage, result in measured.items():
+        print(f'{stage:<52} {result["seconds"]:>8.3f} {result["peak_mib"]:>9.1f}')
+
+    if options.save:
+        with open(options.save, 'w', encoding='utf-8') as baseline_file:
+            json.dump({'python': platform.python_version(), 'pandas': pd.__version__,
+                       'platform': platform.platform(), 'stages': measured},
+                      baseline_file, indent=2)
+    if options.compare:
+        with open(options.compare, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)
+        regressed = compare(measured, baseline['stages'], options.tolerance)
+        if regressed:
+            print(f'\n{len(regressed)} stages regressed from {options.compare}')
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
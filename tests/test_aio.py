@@ -0,0 +1,150 @@
+import asyncio
+import json
+import unittest
+from datetime import datetime, timezone
+
+from purpleair import aio, sources
+
+from .test_transport import FakeSession
+
+SENSOR_DATA = {'results': [{'ID': 1, 'Label': 'Parent', 'Lat': 1.0, 'Lon': 2.0,
+                            'THINGSPEAK_PRIMARY_ID': '10',
+                            'THINGSPEAK_PRIMARY_ID_READ_KEY': 'key',
+                            'THINGSPEAK_SECONDARY_ID': '20',
+                            'THINGSPEAK_SECONDARY_ID_READ_KEY': 'key'},
+                           {'ID': 2, 'ParentID': 1, 'Label': 'Child', 'Lat': 1.0, 'Lon': 2.0}]}
+
+
+class FakeAsyncTransport(aio.AsyncTransport):
+    """
+    AsyncTransport that answers requests locally and records the peak concurrency
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(session=FakeSession(), **kwargs)
+        self.in_flight = 0
+        self.peak = 0
+        self.urls = []
+
+    async def _request(self, url, raise_for_status):
+        self.urls.append(url)
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if 'thingspeak' in url:
+            return FakeSession().get(url).content
+        return json.dumps(SENSOR_DATA).encode()
+
+
+class TestAsyncMethods(unittest.TestCase):
+    """
+    Tests for the async clients
+    """
+
+    def test_create_sensor(self):
+        """
+        Test that a sensor can be created from the event loop with async channels
+        """
+        transport = FakeAsyncTransport()
+        se = asyncio.run(aio.AsyncSensor.create(1, transport=transport))
+        self.assertEqual(se.identifier, 1)
+        self.assertIsInstance(se.parent, aio.AsyncChannel)
+        self.assertIsInstance(se.child, aio.AsyncChannel)
+        self.assertIs(se.parent.transport, transport)
+
+    def test_create_sensor_list(self):
+        """
+        Test that the network is requested from the event loop, or read from another source
+        """
+        transport = FakeAsyncTransport()
+        p = asyncio.run(aio.AsyncSensorList.create(transport=transport))
+        self.assertEqual(len(transport.urls), 1)
+        self.assertEqual(len(p.all_sensors), 1)
+
+        transport.urls.clear()
+        p = asyncio.run(aio.AsyncSensorList.create(
+            transport=transport, source=sources.MemorySource(json.dumps(SENSOR_DATA))))
+        self.assertEqual(transport.urls, [])
+        self.assertEqual(p.all_sensors[0].child.identifier, 2)
+
+    def test_session_per_loop(self):
+        """
+        Test that the session of a finished event loop is closed when another loop starts
+        """
+        transport = aio.AsyncTransport(session=FakeSession())
+        first = asyncio.run(transport._get_aio_session())
+        second = asyncio.run(transport._get_aio_session())
+        self.assertIsNot(first, second)
+        self.assertTrue(first.closed)
+        asyncio.run(transport.aclose())
+        self.assertTrue(second.closed)
+
+    def test_get_historical_concurrent(self):
+        """
+        Test that weekly downloads are limited to `max_workers` at once
+        """
+        transport = FakeAsyncTransport()
+        se = asyncio.run(aio.AsyncSensor.create(1, transport=transport))
+        df = asyncio.run(se.parent.get_historical(
+            weeks_to_get=4,
+            thingspeak_field='primary',
+            start_date=datetime(2020, 1, 29),
+            max_workers=2))
+        self.assertEqual(transport.peak, 2)
+        self.assertIn('created_at', df.columns)
+
+    def test_get_historical_fields(self):
+        """
+        Test that only the ThingSpeak fields holding the requested columns are downloaded
+        """
+        transport = FakeAsyncTransport()
+        se = asyncio.run(aio.AsyncSensor.create(1, transport=transport))
+        transport.urls.clear()
+        df = asyncio.run(se.parent.get_historical_range(
+            datetime(2020, 1, 1), datetime(2020, 1, 15), fields=['PM1.0 (CF=1) ug/m3']))
+        self.assertEqual(len(transport.urls), 2)
+        for url in transport.urls:
+            self.assertIn('/channels/10/fields/1.csv?', url)
+        self.assertEqual(list(df.columns), ['created_at', 'PM1.0 (CF=1) ug/m3'])
+        self.assertEqual(df['PM1.0 (CF=1) ug/m3'].dtype, 'float32')
+        with self.assertRaises(ValueError):
+            asyncio.run(se.parent.get_historical_range(
+                datetime(2020, 1, 1), datetime(2020, 1, 15), 'secondary',
+                fields=['PM1.0 (CF=1) ug/m3']))
+
+    def test_get_historical_resolution(self):
+        """
+        Test that ThingSpeak averages supported resolutions, and others are resampled locally
+        """
+        transport = FakeAsyncTransport()
+        se = asyncio.run(aio.AsyncSensor.create(1, transport=transport))
+        transport.urls.clear()
+        df = asyncio.run(se.parent.get_historical_range(
+            datetime(2020, 1, 1), datetime(2020, 1, 15), 'primary', resolution='1h'))
+        self.assertEqual(len(transport.urls), 2)
+        for url in transport.urls:
+            self.assertIn('average=60&', url)
+        # The same entry is sent for both weeks, and only kept once
+        self.assertEqual(len(df), 1)
+
+        transport.urls.clear()
+        df = asyncio.run(se.parent.get_historical_range(
+            datetime(2020, 1, 1), datetime(2020, 1, 15), 'primary', resolution='2h'))
+        for url in transport.urls:
+            self.assertIn('average=&', url)
+        self.assertEqual(list(df['created_at']), [datetime(2020, 1, 1, tzinfo=timezone.utc)])
+        self.assertEqual(df['PM1.0 (CF=1) ug/m3'][0], 2.5)
+        with self.assertRaises(ValueError):
+            asyncio.run(se.parent.get_historical_range(
+                datetime(2020, 1, 1), datetime(2020, 1, 15), resolution='-1h'))
+
+    def test_get_historical_bad_workers(self):
+        """
+        Test that we cannot download with fewer than one worker
+        """
+        se = asyncio.run(aio.AsyncSensor.create(
+            1, transport=FakeAsyncTransport()))
+        with self.assertRaises(ValueError):
+            asyncio.run(se.parent.get_historical(
+                1, 'primary', max_workers=0))
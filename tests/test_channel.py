@@ -1,6 +1,9 @@
+import tempfile
 import unittest
 
-from purpleair import sensor
+import pandas as pd
+
+from purpleair import channel, sensor, store
 from purpleair import api_data
 import datetime
 
@@ -17,6 +20,17 @@ class TestChannelMethods(unittest.TestCase):
         se = sensor.Sensor(2891)
         self.assertEqual(se.child.__repr__(), 'Sensor 2891, child of 2890')
 
+    def test_lazy_update(self):
+        """
+        Test that lazy channels forget parsed attributes when they are updated
+        """
+        se = sensor.Sensor(2891)
+        lazy = channel.LazyChannel(se.parent_data)
+        self.assertEqual(lazy.identifier, se.parent.identifier)
+        lazy.update(se.child_data)
+        self.assertEqual(lazy.identifier, se.child.identifier)
+        self.assertDictEqual(lazy.as_dict(), se.child.as_dict())
+
     def test_get_historical(self):
         """
         Test that we properly get a sensor's historical data
@@ -27,6 +41,92 @@ class TestChannelMethods(unittest.TestCase):
         se.child.get_historical(1, 'primary')
         se.child.get_historical(1, 'secondary')
 
+    def test_get_historical_concurrent(self):
+        """
+        Test that downloading weeks concurrently gives the same result as downloading them in order
+        """
+        se = sensor.Sensor(2891)
+        start_date = datetime.datetime(2021, 3, 1)
+        sequential = se.parent.get_historical(3, 'primary', start_date)
+        concurrent = se.parent.get_historical(
+            3, 'primary', start_date, max_workers=3)
+        self.assertTrue(sequential.equals(concurrent))
+        self.assertTrue(sequential['created_at'].is_monotonic_increasing)
+
+    def test_get_historical_stored(self):
+        """
+        Test that reading through a store gives the same result as a download, and is reused
+        """
+        start_date = datetime.datetime(2021, 3, 1)
+        downloaded = sensor.Sensor(2891).parent.get_historical(2, 'primary', start_date)
+        with tempfile.TemporaryDirectory() as directory:
+            history = store.HistoricalStore(directory)
+            se = sensor.Sensor(2891, store=history)
+            stored = se.parent.get_historical(2, 'primary', start_date)
+            self.assertEqual(history.missing(
+                se.parent.identifier, 'primary',
+                datetime.datetime(2021, 2, 8), datetime.datetime(2021, 2, 22)), [])
+            reread = se.parent.get_historical(2, 'primary', start_date)
+        self.assertTrue(downloaded.equals(stored))
+        self.assertTrue(stored.equals(reread))
+
+    def test_open_historical(self):
+        """
+        Test that stored data can be opened by column without downloading it again
+        """
+        start_date = datetime.datetime(2021, 2, 1)
+        end_date = datetime.datetime(2021, 2, 3)
+        with tempfile.TemporaryDirectory() as directory:
+            se = sensor.Sensor(2891, store=store.HistoricalStore(directory))
+            downloaded = se.parent.get_historical_between(
+                'primary', start_date, end_date)
+            opened = se.parent.open_historical(
+                'primary', start_date, end_date, ['Humidity_%'])
+        self.assertTrue(opened.equals(downloaded[['created_at', 'Humidity_%']]))
+        with self.assertRaises(ValueError):
+            sensor.Sensor(2891).parent.open_historical('primary', start_date, end_date)
+
+    def test_get_historical_types(self):
+        """
+        Test that historical data is parsed with explicit types
+        """
+        se = sensor.Sensor(2891)
+        df = se.parent.get_historical(1, 'primary')
+        self.assertEqual(str(df['created_at'].dt.tz), 'UTC')
+        self.assertEqual(df['PM2.5 (CF=ATM) ug/m3'].dtype, 'float32')
+        self.assertEqual(df['UptimeMinutes'].dtype, 'float64')
+
+    def test_get_historical_fields(self):
+        """
+        Test that only the requested columns are downloaded
+        """
+        se = sensor.Sensor(2891)
+        fields = ['PM2.5 (CF=ATM) ug/m3', 'Humidity_%']
+        df = se.parent.get_all_historical(1, fields=fields)
+        self.assertEqual(list(df.columns), ['created_at'] + fields)
+        df = se.parent.get_historical(1, 'secondary', fields=['0.3um/dl'])
+        self.assertEqual(list(df.columns), ['created_at', '0.3um/dl'])
+        with self.assertRaises(ValueError):
+            se.parent.get_historical(1, 'primary', fields=['0.3um/dl'])
+
+    def test_get_historical_resolution(self):
+        """
+        Test that historical data can be averaged by ThingSpeak or resampled locally
+        """
+        se = sensor.Sensor(2891)
+        for resolution in ('1h', '2h'):
+            df = se.parent.get_historical(1, 'primary', resolution=resolution)
+            self.assertTrue((df['created_at'].diff().dropna()
+                             >= datetime.timedelta(hours=int(resolution[0]))).all())
+
+    def test_get_historical_bad_workers(self):
+        """
+        Test that we cannot download with fewer than one worker
+        """
+        se = sensor.Sensor(2891)
+        with self.assertRaises(ValueError):
+            se.parent.get_historical(1, 'primary', max_workers=0)
+
     def columns_for_channel(self, channel_type):
         if channel_type == 'child':
             columns = set(api_data.CHILD_PRIMARY_COLS.values())
@@ -59,6 +159,28 @@ class TestChannelMethods(unittest.TestCase):
         for field in child_columns:
             self.assertTrue(field in child_results.columns)
 
+    def test_merge_fields(self):
+        """
+        Test that primary and secondary readings a few seconds apart are merged
+        """
+        ch = channel.Channel({'ID': 1, 'Label': 'Parent', 'Lat': 1.0, 'Lon': 2.0})
+        times = pd.date_range('2021-01-01', periods=4, freq='2min', tz='UTC')
+        primary = pd.DataFrame({'created_at': times, 'PM2.5 (CF=1) ug/m3': [1.0, 2.0, 3.0, 4.0]})
+        # The secondary feed is written later, out of order, and is missing a reading
+        secondary = pd.DataFrame({'created_at': times[[2, 0, 1]] + pd.Timedelta(seconds=3),
+                                  'Humidity_%': [30.0, 10.0, 20.0]})
+        merged = ch._merge_fields(primary, secondary)
+        self.assertEqual(list(merged['created_at']), list(times))
+        self.assertEqual(list(merged['Humidity_%'][:3]), [10.0, 20.0, 30.0])
+        self.assertTrue(pd.isna(merged['Humidity_%'][3]))
+
+        # A secondary reading is only merged with the primary reading nearest to it
+        close = pd.DataFrame({'created_at': [times[0], times[0] + pd.Timedelta(seconds=20)],
+                              'PM2.5 (CF=1) ug/m3': [1.0, 1.5]})
+        merged = ch._merge_fields(close, secondary)
+        self.assertEqual(merged['Humidity_%'][0], 10.0)
+        self.assertTrue(pd.isna(merged['Humidity_%'][1]))
+
     def test_get_historical_between(self):
         """
         Test getting the sensor's historical data between two dates
@@ -68,6 +190,19 @@ class TestChannelMethods(unittest.TestCase):
         start_date = datetime.datetime.today() - datetime.timedelta(weeks=1)
         se.parent.get_historical_between('primary', start_date)
 
+    def test_iter_historical(self):
+        """
+        Test that streamed chunks add up to the data downloaded in one go
+        """
+        se = sensor.Sensor(2891)
+        end_date = datetime.datetime.today()
+        start_date = end_date - datetime.timedelta(weeks=2)
+        chunks = list(se.parent.iter_historical('primary', start_date, end_date, max_workers=2))
+        streamed = pd.concat(chunks)
+        self.assertTrue(streamed['created_at'].is_monotonic_increasing)
+        self.assertTrue(streamed.equals(
+            se.parent.get_historical_between('primary', start_date, end_date)))
+
     def test_get_all_historical_between(self):
         """
         Test getting all the sensor's historical data (primary and secondary) between two dates
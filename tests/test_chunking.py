@@ -0,0 +1,136 @@
+import unittest
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from purpleair import chunking
+from purpleair.api_data import THINGSPEAK_ROW_LIMIT
+
+
+def make_raw(start, end, step=timedelta(minutes=2)):
+    """
+    Raw ThingSpeak data for a range, truncated to the most recent rows like ThingSpeak
+    """
+    times = pd.date_range(start, end, freq=step, inclusive='left')
+    data = pd.DataFrame({
+        'created_at': times.strftime('%Y-%m-%d %H:%M:%S UTC'),
+        'entry_id': (times - pd.Timestamp(2021, 1, 1)) // step,
+    })
+    return data.iloc[-THINGSPEAK_ROW_LIMIT:].reset_index(drop=True)
+
+
+class TestChunking(unittest.TestCase):
+    """
+    Tests for splitting downloads around the ThingSpeak row limit
+    """
+
+    def test_split_truncated(self):
+        """
+        Test that only truncated chunks are split, into chunks that fit the row limit
+        """
+        start, end = datetime(2021, 1, 1), datetime(2021, 2, 1)
+        chunk = chunking.Chunk('primary', start, end)
+        chunk.data = make_raw(start, end)
+        missing = chunking.split_truncated(chunk)
+        first = chunking.row_time(chunk.data, 0)
+        self.assertEqual(missing[0].start, start)
+        self.assertEqual(missing[-1].end, first)
+        for part in missing:
+            self.assertLess(len(make_raw(part.start, part.end)), THINGSPEAK_ROW_LIMIT)
+
+        chunk = chunking.Chunk('primary', start, start + timedelta(days=7))
+        chunk.data = make_raw(chunk.start, chunk.end)
+        self.assertEqual(chunking.split_truncated(chunk), [])
+
+    def test_chunked_download(self):
+        """
+        Test that truncated ranges are requested again until all of the data is downloaded
+        """
+        start, end = datetime(2021, 1, 1), datetime(2021, 3, 1)
+        download = chunking.ChunkedDownload(
+            {'primary': [(start, end)]}, lambda field, chunk_start, chunk_end: field)
+        requests = 0
+        while not download.done:
+            for chunk, url in download.take():
+                self.assertEqual(url, 'primary')
+                download.receive(chunk, make_raw(chunk.start, chunk.end))
+                requests += 1
+        self.assertEqual(requests, 6)
+
+        data = pd.concat(download.frames()['primary']).drop_duplicates('entry_id')
+        self.assertEqual(list(data['entry_id']), list(range(len(data))))
+        self.assertEqual(len(data), (end - start) // timedelta(minutes=2))
+
+    def test_pop_received_in_order(self):
+        """
+        Test that chunks are only returned oldest first once their ranges are complete
+        """
+        start, end = datetime(2021, 1, 1), datetime(2021, 2, 1)
+        windows = [(start, datetime(2021, 1, 8)), (datetime(2021, 1, 8), end)]
+        download = chunking.ChunkedDownload(
+            {'primary': windows}, lambda field, chunk_start, chunk_end: field)
+        first, last = [chunk for chunk, _ in download.take()]
+        download.receive(last, make_raw(last.start, last.end))
+        self.assertEqual(download.pop_received(in_order=True), [])
+        download.receive(first, make_raw(first.start, first.end))
+        self.assertEqual(download.pop_received(in_order=True), [first])
+
+        missing = [chunk for chunk, _ in download.take()]
+        self.assertTrue(missing)
+        self.assertEqual(download.pop_received(in_order=True), [])
+        for chunk in reversed(missing):
+            download.receive(chunk, make_raw(chunk.start, chunk.end))
+        self.assertEqual(download.pop_received(in_order=True), missing + [last])
+        self.assertTrue(download.done)
+
+    def test_sized_download(self):
+        """
+        Test that windows are split to fit the row limit before they are requested
+        """
+        start, end = datetime(2021, 1, 1), datetime(2021, 3, 1)
+        download = chunking.ChunkedDownload(
+            {'primary': [(start, end)]}, lambda field, chunk_start, chunk_end: field,
+            chunking.expected_rows_per_day(None))
+        chunks = [chunk for chunk, _ in download.take()]
+        self.assertEqual(len(chunks), 6)
+        self.assertEqual((chunks[0].start, chunks[-1].end), (start, end))
+        for chunk in chunks:
+            download.receive(chunk, make_raw(chunk.start, chunk.end))
+        self.assertTrue(download.done)
+
+        data = pd.concat(download.frames()['primary']).drop_duplicates('entry_id')
+        self.assertEqual(len(data), (end - start) // timedelta(minutes=2))
+
+    def test_density_from_previous_chunk(self):
+        """
+        Test that windows that are not taken yet are sized from the data received so far
+        """
+        windows = [(datetime(2021, 1, 1), datetime(2021, 1, 31)),
+                   (datetime(2021, 1, 31), datetime(2021, 3, 2))]
+        download = chunking.ChunkedDownload(
+            {'primary': windows}, lambda field, chunk_start, chunk_end: field,
+            chunking.expected_rows_per_day(None))
+        (first, _), = download.take(1)
+        self.assertEqual(first.end - first.start, timedelta(days=10))
+        download.receive(first, make_raw(first.start, first.end, timedelta(minutes=4)))
+        self.assertAlmostEqual(download.rows_per_day, 360, delta=1)
+        rest = [chunk for chunk, _ in download.take()]
+        self.assertEqual(len([chunk for chunk in rest if chunk.start >= windows[1][0]]), 2)
+
+    def test_expected_rows_per_day(self):
+        """
+        Test that aggregated data is expected to have one row per window
+        """
+        self.assertEqual(chunking.expected_rows_per_day(None), 720)
+        self.assertEqual(chunking.expected_rows_per_day({'average': 60}), 24)
+        self.assertEqual(chunking.expected_rows_per_day({'average': 'daily'}), 1)
+        self.assertIsNone(chunking.expected_rows_per_day({'timescale': 'nonstandard'}))
+
+    def test_rows_in_range(self):
+        """
+        Test that rows at the end of a chunk's range are dropped
+        """
+        start, end = datetime(2021, 1, 1), datetime(2021, 1, 2)
+        chunk = chunking.Chunk('primary', start, end)
+        chunk.data = make_raw(start, end + timedelta(minutes=4))
+        self.assertEqual(len(chunking.rows_in_range(chunk)), 720)
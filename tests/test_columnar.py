@@ -0,0 +1,66 @@
+import json
+import unittest
+
+import pandas as pd
+
+from purpleair import network
+
+from .test_parallel import make_data
+
+
+class TestColumnarMethods(unittest.TestCase):
+    """
+    Tests for the channel DataFrames built directly from the network data
+    """
+
+    def test_integer_ids(self):
+        """
+        Test that identifiers stay integers, with the same values as DataFrames of each Sensor
+        """
+        payload = json.dumps({'results': [c for s in make_data(6) for c in s]})
+        p = network.SensorList.from_payload(payload, columnar=True)
+        sensors = network.SensorList.from_payload(payload).all_sensors
+        filters = {'all': lambda s: True, 'family': lambda s: s.child is not None}
+        for sensor_filter, keep in filters.items():
+            for channel in ('parent', 'child'):
+                frame = p.to_dataframe(sensor_filter, channel)
+                expected = pd.DataFrame(
+                    [s.as_flat_dict(channel) for s in sensors if keep(s)]).set_index('id')
+                self.assertEqual(frame.index.dtype, 'Int64')
+                self.assertEqual(frame['parent'].dtype, 'Int64')
+                pd.testing.assert_index_equal(frame.index, expected.index.astype('Int64'))
+                pd.testing.assert_series_equal(
+                    frame['parent'].reset_index(drop=True),
+                    expected['parent'].astype('Int64').reset_index(drop=True))
+
+        # Without missing channels, the DataFrames of each Sensor have integer identifiers too
+        expected = pd.DataFrame([s.as_flat_dict('child') for s in sensors if s.child is not None])
+        self.assertTrue(pd.api.types.is_integer_dtype(expected['id']))
+        self.assertTrue(pd.api.types.is_integer_dtype(expected['parent']))
+
+    def test_compact_frames(self):
+        """
+        Test that compact networks build the same DataFrames from their parsed channels
+        """
+        payload = json.dumps({'results': [c for s in make_data(6) for c in s]})
+        p = network.SensorList.from_payload(payload)
+        compact = network.SensorList.from_payload(payload, compact=True)
+        self.assertDictEqual(compact.channel_frames, {})
+        for channel in ('parent', 'child'):
+            pd.testing.assert_frame_equal(compact.to_dataframe('all', channel),
+                                          p.to_dataframe('all', channel))
+        pd.testing.assert_frame_equal(compact.to_dataframe('useful', 'parent'),
+                                      p.to_dataframe('useful', 'parent'))
+
+    def test_parsed_sensor_frames(self):
+        """
+        Test that networks of parsed sensors, which reuse their decoded statistics, build the
+        same DataFrames as columnar networks
+        """
+        payload = json.dumps({'results': [c for s in make_data(6) for c in s]})
+        p = network.SensorList.from_payload(payload)
+        columnar = network.SensorList.from_payload(payload, columnar=True)
+        for sensor_filter in ('all', 'useful', 'family'):
+            for channel in ('parent', 'child'):
+                pd.testing.assert_frame_equal(p.to_dataframe(sensor_filter, channel),
+                                              columnar.to_dataframe(sensor_filter, channel))
@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from purpleair import geocode
+
+PLACES = pd.DataFrame({
+    'name': ['San Francisco', 'Oakland', 'Sydney'],
+    'admin': ['CA', 'CA', 'NSW'],
+    'country': ['US', 'US', 'AU'],
+    'lat': [37.77, 37.80, -33.87],
+    'lon': [-122.42, -122.27, 151.21],
+})
+
+
+class CountingGeocoder(geocode.Geocoder):
+    """
+    Geocoder that records how many times it was called
+    """
+
+    def __init__(self, location):
+        self.location = location
+        self.calls = 0
+
+    def reverse(self, lat, lon):
+        self.calls += 1
+        return self.location
+
+
+class TestGeocodeMethods(unittest.TestCase):
+    """
+    Tests for the geocoding backends and cache
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'locations.sqlite')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_gazetteer(self):
+        """
+        Test that the nearest place within range is used
+        """
+        gazetteer = geocode.GazetteerGeocoder(PLACES, max_km=20)
+        self.assertEqual(gazetteer.reverse(37.78, -122.41),
+                         'San Francisco, CA, US')
+        self.assertIsNone(gazetteer.reverse(0, 0))
+
+    def test_gazetteer_bad_columns(self):
+        """
+        Test that a gazetteer must have coordinates
+        """
+        with self.assertRaises(ValueError):
+            geocode.GazetteerGeocoder(PLACES[['name', 'lat']])
+
+    def test_cache_persists(self):
+        """
+        Test that cached locations are keyed by rounded coordinates and saved to disk
+        """
+        cache = geocode.LocationCache(self.path)
+        cache.set(37.77491, -122.41941, 'San Francisco')
+        cache.close()
+        cache = geocode.LocationCache(self.path)
+        self.assertEqual(cache.get(37.77489, -122.41939), 'San Francisco')
+        self.assertIsNone(cache.get(37.8, -122.4))
+        cache.close()
+
+    def test_cached_geocoder(self):
+        """
+        Test that backends are only queried on a cache miss, in order
+        """
+        missing = CountingGeocoder(None)
+        found = CountingGeocoder('Somewhere')
+        geocoder = geocode.CachedGeocoder(
+            [missing, found], geocode.LocationCache(self.path))
+        self.assertEqual(geocoder.reverse(1, 2), 'Somewhere')
+        self.assertEqual(geocoder.reverse(1, 2), 'Somewhere')
+        self.assertEqual((missing.calls, found.calls), (1, 1))
+        geocoder.cache.close()
+
+    def test_geocoder_is_abstract(self):
+        """
+        Test that a geocoder must implement `reverse()`
+        """
+        with self.assertRaises(TypeError):
+            geocode.Geocoder()  # pylint: disable=abstract-class-instantiated
@@ -0,0 +1,80 @@
+import socket
+import unittest
+
+from purpleair import metrics, network, transport
+
+from .test_sources import PAYLOAD
+from .test_transport import FakeSession
+
+
+class TestMetricsMethods(unittest.TestCase):
+    """
+    Tests for recording counts and durations
+    """
+
+    def test_record(self):
+        """
+        Test that values are summarized, exported, and passed to sinks
+        """
+        received = []
+        recorded = metrics.Metrics(sinks=[lambda *value: received.append(value)])
+        recorded.increment('http_requests')
+        recorded.increment('http_bytes', 100)
+        recorded.set('network_sensors', 5)
+        recorded.observe('csv_rows', 10)
+        recorded.observe('csv_rows', 30)
+        with recorded.timer('csv_parse_seconds'):
+            pass
+
+        exported = recorded.as_dict()
+        self.assertEqual(exported['counters'], {'http_requests': 1, 'http_bytes': 100})
+        self.assertEqual(exported['gauges'], {'network_sensors': 5})
+        self.assertEqual(exported['observations']['csv_rows'],
+                         {'count': 2, 'total': 40, 'min': 10, 'max': 30, 'mean': 20})
+        self.assertEqual(exported['observations']['csv_parse_seconds']['count'], 1)
+        self.assertEqual(received[:2], [('counter', 'http_requests', 1),
+                                        ('counter', 'http_bytes', 100)])
+        self.assertEqual(len(received), 6)
+
+        text = recorded.to_prometheus()
+        self.assertIn('purpleair_http_bytes_total 100\n', text)
+        self.assertIn('# TYPE purpleair_csv_rows summary\n', text)
+        self.assertIn('purpleair_csv_rows_sum 40\n', text)
+
+        recorded.reset()
+        self.assertEqual(recorded.as_dict()['counters'], {})
+
+    def test_statsd_sink(self):
+        """
+        Test that values are sent to StatsD in its line format
+        """
+        receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        receiver.bind(('127.0.0.1', 0))
+        receiver.settimeout(5)
+        sink = metrics.StatsDSink('127.0.0.1', receiver.getsockname()[1], prefix='pa')
+        try:
+            recorded = metrics.Metrics(sinks=[sink])
+            recorded.increment('http_requests')
+            recorded.observe('json_decode_seconds', 0.25)
+            recorded.observe('csv_rows', 8000)
+            lines = [receiver.recv(1024).decode() for _ in range(3)]
+        finally:
+            sink.close()
+            receiver.close()
+        self.assertEqual(lines, ['pa.http_requests:1|c', 'pa.json_decode:250|ms',
+                                 'pa.csv_rows:8000|h'])
+
+    def test_client_metrics(self):
+        """
+        Test that requests and network parsing are recorded in the transport's metrics
+        """
+        fake = transport.Transport(session=FakeSession())
+        fake.read_csv('https://thingspeak.com/channels/1/feed.csv')
+        p = network.SensorList.from_payload(PAYLOAD, transport=fake)
+        recorded = p.transport.metrics.as_dict()
+        self.assertEqual(recorded['counters']['http_requests'], 1)
+        self.assertEqual(recorded['observations']['csv_rows']['total'], 1)
+        self.assertEqual(recorded['gauges']['network_sensors'], 1)
+        for name in ('http_request_seconds', 'csv_parse_seconds', 'network_read_seconds',
+                     'json_decode_seconds', 'pairing_seconds', 'sensor_construction_seconds'):
+            self.assertEqual(recorded['observations'][name]['count'], 1, name)
@@ -0,0 +1,70 @@
+import json
+import unittest
+
+import pandas as pd
+
+from purpleair import network, parallel
+from purpleair.columnar import build_channel_frame
+
+from .test_aio import SENSOR_DATA
+
+
+def make_data(count):
+    """
+    Paired network data where only the last sensors have a child or statistics
+    """
+    parent, child = SENSOR_DATA['results']
+    data = []
+    for index in range(count):
+        identifier = 2 * index + 1
+        channels = [dict(parent, ID=identifier, PM2_5Value=str(index))]
+        if index >= count // 2:
+            channels[0]['Stats'] = json.dumps({'v1': index, 'lastModified': 1000 * index})
+            channels.append(dict(child, ID=identifier + 1, ParentID=identifier))
+        data.append(channels)
+    return data
+
+
+class SmallCutoffSensorList(network.SensorList):
+    """
+    SensorList that builds the channel DataFrames in parallel for any number of sensors
+    """
+
+    parallel_cutoff = 1
+
+
+class TestParallelMethods(unittest.TestCase):
+    """
+    Tests for building the channel DataFrames in several processes
+    """
+
+    def test_build_channel_frames(self):
+        """
+        Test that the DataFrames of each shard are joined into the same DataFrames
+        """
+        data = make_data(9)
+        frames = parallel.build_channel_frames(data, 3)
+        pd.testing.assert_frame_equal(
+            frames['parent'], build_channel_frame([s[0] for s in data]))
+        pd.testing.assert_frame_equal(
+            frames['child'], build_channel_frame([s[1] if len(s) > 1 else None for s in data]))
+
+    def test_workers(self):
+        """
+        Test that networks are built the same way in parallel, and stay serial below the cutoff
+        """
+        payload = json.dumps({'results': [c for s in make_data(6) for c in s]})
+        serial = network.SensorList.from_payload(payload, columnar=True)
+        p = SmallCutoffSensorList.from_payload(payload, columnar=True, workers=2)
+        self.assertTrue(p._is_parallel())
+        pd.testing.assert_frame_equal(p.to_dataframe('all', 'parent'),
+                                      serial.to_dataframe('all', 'parent'))
+        pd.testing.assert_frame_equal(p.to_dataframe('all', 'child'),
+                                      serial.to_dataframe('all', 'child'))
+
+        with self.assertRaises(ValueError):
+            network.SensorList.from_payload(payload, workers=0)
+        with self.assertRaises(ValueError):
+            network.SensorList.from_payload(payload, workers=2)
+        with self.assertRaises(ValueError):
+            network.SensorList.from_payload(payload, compact=True, workers=2)
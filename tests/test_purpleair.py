@@ -1,6 +1,11 @@
+import datetime
+import os
+import tempfile
 import unittest
 
-from purpleair import network
+from purpleair import bulk, channel, network, transport
+
+from .test_transport import FakeSession
 
 
 class TestPurpleAirMethods(unittest.TestCase):
@@ -47,6 +52,108 @@ class TestPurpleAirMethods(unittest.TestCase):
         p.to_dataframe('family', 'parent')
         p.to_dataframe('family', 'child')
 
+    def test_refresh(self):
+        """
+        Test that refreshing keeps existing sensor objects
+        """
+        p = network.SensorList()
+        first = p.all_sensors[0]
+        result = p.refresh()
+        self.assertIsInstance(result, network.RefreshResult)
+        self.assertEqual(
+            len(p.all_sensors),
+            len(result.added) + len(result.updated) + result.unchanged)
+        if first.identifier not in result.removed:
+            self.assertIn(first, p.all_sensors)
+
+    def test_streaming(self):
+        """
+        Test that streaming the network data finds the same sensors
+        """
+        p = network.SensorList(streaming=True)
+        self.assertGreater(len(p.all_sensors), 0)
+        self.assertTrue(all(s[0]['ID'] == sensor.identifier
+                            for s, sensor in zip(p.data, p.all_sensors)))
+
+    def test_compact(self):
+        """
+        Test that compact sensors give the same DataFrames without keeping the raw data
+        """
+        p = network.SensorList()
+        compact = network.SensorList(compact=True)
+        self.assertTrue(p.to_dataframe('useful', 'parent').equals(
+            compact.to_dataframe('useful', 'parent')))
+        self.assertLessEqual(set(compact.data[0][0]), set(channel.COMPACT_KEYS))
+
+    def test_compact_columnar(self):
+        """
+        Test that compact sensors cannot be used in columnar mode
+        """
+        with self.assertRaises(ValueError):
+            network.SensorList(compact=True, columnar=True)
+
+    def test_lazy(self):
+        """
+        Test that lazy sensors give the same DataFrames
+        """
+        p = network.SensorList()
+        lazy = network.SensorList(lazy=True)
+        self.assertTrue(p.to_dataframe('useful', 'parent').equals(
+            lazy.to_dataframe('useful', 'parent')))
+        with self.assertRaises(ValueError):
+            network.SensorList(lazy=True, compact=True)
+
+    def test_save_load(self):
+        """
+        Test that a saved network is restored without downloading it again
+        """
+        p = network.SensorList()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'network.snapshot')
+            p.save(path)
+            restored = network.SensorList.load(path, max_age=datetime.timedelta(hours=1))
+            self.assertTrue(p.to_dataframe('useful', 'parent').equals(
+                restored.to_dataframe('useful', 'parent')))
+            self.assertIs(restored.all_sensors[0].transport, restored.transport)
+            # Snapshots saved with other options are not used
+            columnar = network.SensorList.load(path, columnar=True)
+            self.assertTrue(columnar.columnar)
+
+    def test_to_dataframe_cached(self):
+        """
+        Test that channel data is built once and reused across filters
+        """
+        p = network.SensorList()
+        df_a = p.to_dataframe('all', 'parent')
+        frame = p.channel_frames['parent']
+        df_u = p.to_dataframe('useful', 'parent')
+        self.assertIs(p.channel_frames['parent'], frame)
+        self.assertLessEqual(len(df_u), len(df_a))
+        self.assertEqual(
+            len(df_u), sum(1 for s in p.all_sensors if s.is_useful()))
+
+    def test_nearest(self):
+        """
+        Test that nearby sensors are found nearest first
+        """
+        p = network.SensorList()
+        first = p.to_dataframe('useful', 'parent').iloc[0]
+        df = p.nearest(first['lat'], first['lon'], k=5, sensor_filter='useful')
+        self.assertEqual(len(df), 5)
+        self.assertEqual(df.iloc[0]['distance_km'], 0)
+        self.assertTrue(df['distance_km'].is_monotonic_increasing)
+
+    def test_within_radius(self):
+        """
+        Test that radius and bounding box queries agree with the sensor coordinates
+        """
+        p = network.SensorList()
+        sensors = p.within_radius(37.77, -122.42, 50, as_sensors=True)
+        self.assertTrue(all(37 < s.parent.lat < 39 for s in sensors))
+        df = p.within_bbox(37, -123, 38, -122)
+        self.assertTrue(df['lat'].between(37, 38).all())
+        self.assertTrue(df['lon'].between(-123, -122).all())
+
     def test_to_dataframe_cols(self):
         """
         Test that child and parent sensor dataframes contain the same data
@@ -57,6 +164,99 @@ class TestPurpleAirMethods(unittest.TestCase):
         self.assertListEqual(list(df_a.columns), list(df_b.columns))
 
 
+class TestPurpleAirBulkHistorical(unittest.TestCase):
+    """
+    Test that we can download historical data for many sensors at once
+    """
+
+    def test_get_historical_bulk(self):
+        """
+        Test that bulk data is indexed by sensor id
+        """
+        p = network.SensorList(columnar=True)
+        end_date = datetime.datetime.now()
+        start_date = end_date - datetime.timedelta(days=2)
+        df = p.get_historical_bulk('useful', 'parent', start_date, end_date,
+                                   thingspeak_field='primary')
+        self.assertEqual(df.index.names[0], 'sensor_id')
+
+    def test_get_historical_bulk_stream(self):
+        """
+        Test that streaming bulk data yields one DataFrame per sensor
+        """
+        p = network.SensorList(columnar=True)
+        end_date = datetime.datetime.now()
+        start_date = end_date - datetime.timedelta(days=1)
+        results = p.get_historical_bulk('useful', 'parent', start_date, end_date,
+                                        stream=True)
+        sensor_id, df = next(results)
+        self.assertIsInstance(sensor_id, int)
+        self.assertIn('created_at', df.columns)
+        results.close()
+
+    def test_get_historical_bulk_bad_dates(self):
+        """
+        Test that an empty date range fails
+        """
+        p = network.SensorList(columnar=True)
+        now = datetime.datetime.now()
+        with self.assertRaises(ValueError):
+            p.get_historical_bulk('useful', 'parent', now, now)
+        with self.assertRaises(ValueError):
+            p.get_historical_bulk('useful', 'parent', now, now, stream=True)
+
+    def test_bulk_download_child(self):
+        """
+        Test that child channels are keyed by their sensor, and bad arguments fail immediately
+        """
+        child = channel.Channel({'ID': 2, 'ParentID': 1,
+                                 'THINGSPEAK_PRIMARY_ID': '10',
+                                 'THINGSPEAK_PRIMARY_ID_READ_KEY': 'key'},
+                                transport=transport.Transport(session=FakeSession()))
+        downloader = bulk.BulkDownloader(transport=child.transport)
+        start_date = datetime.datetime(2020, 1, 1)
+        end_date = datetime.datetime(2020, 1, 3)
+        results = list(downloader.download([child], start_date, end_date,
+                                           thingspeak_field='primary'))
+        self.assertEqual([sensor_id for sensor_id, _ in results], [1])
+        with self.assertRaises(ValueError):
+            downloader.download([child], start_date, end_date, resolution='-1h')
+
+
+class TestPurpleAirColumnar(unittest.TestCase):
+    """
+    Test that the columnar SensorList matches the object SensorList
+    """
+
+    def test_setup_columnar(self):
+        """
+        Test that we can initialize a columnar SensorList and lazily build sensors
+        """
+        p = network.SensorList(columnar=True)
+        self.assertEqual(len(p.all_sensors), len(p.data))
+        self.assertEqual(p.all_sensors[0].identifier, p.data[0][0]['ID'])
+
+    def test_columnar_no_location(self):
+        """
+        Test that location parsing cannot be combined with columnar mode
+        """
+        with self.assertRaises(ValueError):
+            network.SensorList(parse_location=True, columnar=True)
+
+    def test_columnar_to_dataframe(self):
+        """
+        Test that columnar DataFrames have the same shape as object DataFrames
+        """
+        p = network.SensorList()
+        c = network.SensorList(columnar=True)
+        for sensor_filter in ('all', 'outside', 'useful', 'family'):
+            for channel in ('parent', 'child'):
+                df_p = p.to_dataframe(sensor_filter, channel)
+                df_c = c.to_dataframe(sensor_filter, channel)
+                self.assertListEqual(list(df_p.columns), list(df_c.columns))
+                self.assertEqual(len(df_p), len(df_c))
+
+
 class TestPurpleAirColumnFilters(unittest.TestCase):
     """
     Test that we can initialize the PurpleAir network
@@ -1,6 +1,6 @@
 import unittest
 
-from purpleair import sensor
+from purpleair import channel, sensor
 
 
 class TestSensorMethods(unittest.TestCase):
@@ -49,6 +49,37 @@ class TestSensorMethods(unittest.TestCase):
         with self.assertRaises(ValueError):
             se = sensor.Sensor('1', {'parent': 1})
 
+    def test_create_sensor_compact(self):
+        """
+        Test that compact sensors keep the same parsed data without the raw data
+        """
+        se = sensor.Sensor(2891)
+        compact = sensor.Sensor(2891, json_data=se.data, compact=True)
+        self.assertDictEqual(se.as_dict(), compact.as_dict())
+        self.assertEqual(se.is_useful(), compact.is_useful())
+        self.assertLessEqual(set(compact.parent_data), set(channel.COMPACT_KEYS))
+        self.assertIs(compact.data[0], compact.parent.channel_data)
+        self.assertEqual(compact.parent.thingspeak_primary.id,
+                         se.parent.tp_primary_channel)
+
+    def test_create_sensor_lazy(self):
+        """
+        Test that lazy sensors parse the same data when it is read
+        """
+        se = sensor.Sensor(2891)
+        lazy = sensor.Sensor(2891, json_data=se.data, lazy=True)
+        self.assertIsInstance(lazy.parent, channel.LazyChannel)
+        self.assertDictEqual(se.as_dict(), lazy.as_dict())
+        self.assertEqual(se.is_useful(), lazy.is_useful())
+
+    def test_create_sensor_lazy_compact(self):
+        """
+        Test that lazy sensors cannot be compact
+        """
+        se = sensor.Sensor(2891)
+        with self.assertRaises(ValueError):
+            sensor.Sensor(2891, json_data=se.data, lazy=True, compact=True)
+
     def test_create_sensor_no_location(self):
         """
         Test that we can initialize a sensor without location enabled
@@ -0,0 +1,60 @@
+import os
+import tempfile
+import unittest
+
+from purpleair import snapshot
+
+
+class Shared():
+    """
+    Object that cannot be pickled, like a transport
+    """
+
+    def __reduce__(self):
+        raise TypeError('Shared objects cannot be pickled')
+
+
+class TestSnapshotMethods(unittest.TestCase):
+    """
+    Tests for saving and restoring snapshots
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'snapshot')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_shared_objects_replaced(self):
+        """
+        Test that shared objects are saved by name and replaced when the snapshot is read
+        """
+        saved = Shared()
+        snapshot.write_snapshot(self.path, {'options': 1}, {'a': [saved, saved], 'b': 2},
+                                {'transport': saved})
+        loaded = Shared()
+        restored = snapshot.read_snapshot(self.path, {'transport': loaded}, lambda _: True)
+        self.assertEqual(restored['b'], 2)
+        self.assertIs(restored['a'][0], loaded)
+        self.assertIs(restored['a'][1], loaded)
+
+    def test_stale_snapshots_ignored(self):
+        """
+        Test that missing, rejected, and corrupt snapshots are not loaded
+        """
+        self.assertIsNone(snapshot.read_snapshot(self.path, {}, lambda _: True))
+        snapshot.write_snapshot(self.path, {'options': 1}, [1, 2, 3], {})
+        headers = []
+
+        def is_current(header):
+            headers.append(header)
+            return header['options'] == 2
+
+        self.assertIsNone(snapshot.read_snapshot(self.path, {}, is_current))
+        self.assertEqual(headers[0]['version'], snapshot.SNAPSHOT_VERSION)
+        self.assertIn('saved_at', headers[0])
+
+        with open(self.path, 'wb') as snapshot_file:
+            snapshot_file.write(b'not a snapshot')
+        self.assertIsNone(snapshot.read_snapshot(self.path, {}, lambda _: True))
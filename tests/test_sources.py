@@ -0,0 +1,74 @@
+import gzip
+import json
+import os
+import tempfile
+import unittest
+
+from purpleair import network, sources
+
+from .test_aio import SENSOR_DATA
+
+PAYLOAD = json.dumps(SENSOR_DATA).encode()
+
+
+class TestSourcesMethods(unittest.TestCase):
+    """
+    Tests for reading the network data from sources other than the API
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name, content):
+        """
+        Write a file in the temporary directory, returning its path
+        """
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'wb') as payload_file:
+            payload_file.write(content)
+        return path
+
+    def test_file_source(self):
+        """
+        Test that plain and gzipped files are read whole and in chunks
+        """
+        for content in (PAYLOAD, gzip.compress(PAYLOAD)):
+            source = sources.FileSource(self.write('network.json', content))
+            self.assertEqual(source.read(), PAYLOAD)
+            chunks = list(source.stream(chunk_size=10))
+            self.assertEqual(b''.join(chunks), PAYLOAD)
+            self.assertTrue(all(len(chunk) <= 10 for chunk in chunks))
+
+    def test_memory_source(self):
+        """
+        Test that text payloads are encoded and streamed in chunks
+        """
+        source = sources.MemorySource(PAYLOAD.decode())
+        self.assertEqual(source.read(), PAYLOAD)
+        self.assertEqual(b''.join(source.stream(chunk_size=7)), PAYLOAD)
+
+    def test_source_is_abstract(self):
+        """
+        Test that a data source must implement `read()`
+        """
+        with self.assertRaises(TypeError):
+            sources.DataSource()  # pylint: disable=abstract-class-instantiated
+
+    def test_from_payload(self):
+        """
+        Test that a network can be built from a payload or a file without the API
+        """
+        p = network.SensorList.from_payload(PAYLOAD)
+        self.assertEqual([s.identifier for s in p.all_sensors], [1])
+        self.assertIsNotNone(p.all_sensors[0].child)
+
+        path = self.write('network.json.gz', gzip.compress(PAYLOAD))
+        streamed = network.SensorList.from_file(path, streaming=True, columnar=True)
+        self.assertTrue(p.to_dataframe('all', 'parent').equals(
+            streamed.to_dataframe('all', 'parent')))
+
+        with self.assertRaises(ValueError):
+            network.SensorList.from_payload(b'{"message": "Rate limited"}')
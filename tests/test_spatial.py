@@ -0,0 +1,114 @@
+import unittest
+
+import numpy as np
+
+from purpleair.spatial import SpatialIndex, haversine
+
+LATS = [37.77, 37.80, np.nan, 40.71, -33.87, 37.76]
+LONS = [-122.42, -122.27, -122.00, -74.01, 151.21, -122.45]
+
+
+class TestSpatialIndexMethods(unittest.TestCase):
+    """
+    Tests for the grid spatial index
+    """
+
+    def test_haversine(self):
+        """
+        Test the distance between San Francisco and New York
+        """
+        distance = haversine(37.77, -122.42, np.array([40.71]), np.array([-74.01]))
+        self.assertAlmostEqual(distance[0], 4130, delta=10)
+
+    def test_missing_coordinates_skipped(self):
+        """
+        Test that coordinates with missing values are not indexed
+        """
+        index = SpatialIndex(LATS, LONS)
+        self.assertEqual(len(index), 5)
+
+    def test_nearest(self):
+        """
+        Test that the nearest coordinates are returned nearest first
+        """
+        index = SpatialIndex(LATS, LONS)
+        positions, distances = index.nearest(37.77, -122.42, k=3)
+        self.assertListEqual(list(positions), [0, 5, 1])
+        self.assertTrue(all(np.diff(distances) >= 0))
+
+    def test_nearest_far_away(self):
+        """
+        Test that the search radius grows until enough coordinates are found
+        """
+        index = SpatialIndex(LATS, LONS)
+        positions, _ = index.nearest(-33.87, 151.21, k=5)
+        self.assertEqual(len(positions), 5)
+        self.assertEqual(positions[0], 4)
+
+    def test_nearest_mask(self):
+        """
+        Test that masked coordinates are never returned
+        """
+        index = SpatialIndex(LATS, LONS)
+        mask = np.array([False, True, True, True, True, True])
+        positions, _ = index.nearest(37.77, -122.42, k=1, mask=mask)
+        self.assertListEqual(list(positions), [5])
+
+    def test_within_radius(self):
+        """
+        Test that only coordinates inside the radius are returned
+        """
+        index = SpatialIndex(LATS, LONS)
+        positions, distances = index.within_radius(37.77, -122.42, 20)
+        self.assertSetEqual(set(positions), {0, 1, 5})
+        self.assertTrue(all(distances <= 20))
+
+    def test_within_bbox(self):
+        """
+        Test bounding boxes, including boxes that cross the antimeridian
+        """
+        index = SpatialIndex(LATS, LONS)
+        self.assertListEqual(
+            list(index.within_bbox(37, -123, 38, -122)), [0, 1, 5])
+        self.assertListEqual(
+            list(index.within_bbox(-40, 150, 45, -125)), [4])
+
+    def test_antimeridian_and_poles(self):
+        """
+        Test that queries find coordinates in cells on the other side of the antimeridian
+        or of a pole
+        """
+        index = SpatialIndex([0.0, 0.0, 89.9, 89.9], [179.95, -179.95, 0.0, 180.0])
+        positions, _ = index.within_radius(0.0, 179.99, 20)
+        self.assertSetEqual(set(positions), {0, 1})
+        positions, _ = index.nearest(89.95, 90.0, k=2)
+        self.assertSetEqual(set(positions), {2, 3})
+
+    def test_matches_brute_force(self):
+        """
+        Test that queries give the same results as measuring every distance
+        """
+        rng = np.random.default_rng(0)
+        lats = rng.uniform(-90, 90, 2000)
+        lons = rng.uniform(-180, 180, 2000)
+        index = SpatialIndex(lats, lons)
+        for lat, lon in zip(rng.uniform(-90, 90, 50), rng.uniform(-180, 180, 50)):
+            distances = haversine(lat, lon, lats, lons)
+            _, found = index.nearest(lat, lon, k=7)
+            np.testing.assert_allclose(found, np.sort(distances)[:7])
+            positions, _ = index.within_radius(lat, lon, 1500)
+            self.assertSetEqual(set(positions), set(np.flatnonzero(distances <= 1500)))
+
+    def test_bad_queries(self):
+        """
+        Test that invalid queries raise ValueError
+        """
+        index = SpatialIndex(LATS, LONS)
+        with self.assertRaises(ValueError):
+            index.nearest(91, 0)
+        with self.assertRaises(ValueError):
+            index.nearest(0, 0, k=0)
+        with self.assertRaises(ValueError):
+            index.within_radius(0, 0, -1)
+        with self.assertRaises(ValueError):
+            index.within_bbox(10, 0, 0, 10)
@@ -0,0 +1,198 @@
+import asyncio
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from purpleair import aio, bulk, channel, store, transport
+
+from .test_aio import SENSOR_DATA, FakeAsyncTransport
+from .test_transport import FakeSession
+
+
+def make_data(start, periods, first_entry=1):
+    """
+    Cleaned data with a reading every two minutes
+    """
+    data = pd.DataFrame({
+        'created_at': pd.date_range(start, periods=periods, freq='2min', tz='UTC'),
+        'PM2.5 (CF=1) ug/m3': [float(i) for i in range(periods)],
+    })
+    data.index = pd.Index(range(first_entry, first_entry + periods), name='entry_id')
+    return data
+
+
+class TestRanges(unittest.TestCase):
+    """
+    Tests for the time range helpers
+    """
+
+    def test_merge_ranges(self):
+        """
+        Test that overlapping and touching ranges are combined
+        """
+        day = datetime(2021, 1, 1)
+        ranges = [(day + timedelta(days=4), day + timedelta(days=5)),
+                  (day, day + timedelta(days=2)),
+                  (day + timedelta(days=2), day + timedelta(days=3))]
+        self.assertEqual(store.merge_ranges(ranges),
+                         [(day, day + timedelta(days=3)),
+                          (day + timedelta(days=4), day + timedelta(days=5))])
+
+    def test_missing_ranges(self):
+        """
+        Test that only the parts of a range that are not covered are missing
+        """
+        day = datetime(2021, 1, 1)
+        covered = [(day + timedelta(days=1), day + timedelta(days=2)),
+                   (day + timedelta(days=3), day + timedelta(days=4))]
+        self.assertEqual(store.missing_ranges(covered, day, day + timedelta(days=5)),
+                         [(day, day + timedelta(days=1)),
+                          (day + timedelta(days=2), day + timedelta(days=3)),
+                          (day + timedelta(days=4), day + timedelta(days=5))])
+        self.assertEqual(store.missing_ranges(
+            covered, day + timedelta(days=1), day + timedelta(days=2)), [])
+
+
+@unittest.skipIf(store.pa is None, 'pyarrow is not installed')
+class TestHistoricalStore(unittest.TestCase):
+    """
+    Tests for the partitioned historical store
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = store.HistoricalStore(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_read_across_months(self):
+        """
+        Test that data saved across month partitions is read back for a range
+        """
+        data = make_data('2021-01-31 23:00', 60)
+        self.store.append(1, 'primary', data,
+                          [(datetime(2021, 1, 31), datetime(2021, 2, 2))])
+        read = self.store.read(1, 'primary', datetime(2021, 1, 31), datetime(2021, 2, 2))
+        self.assertTrue(read.equals(data))
+        read = self.store.read(1, 'primary', datetime(2021, 2, 1), datetime(2021, 2, 2))
+        self.assertEqual(len(read), 30)
+        self.assertTrue(self.store.read(2, 'primary', datetime(2021, 1, 1),
+                                        datetime(2021, 3, 1)).empty)
+
+    def test_append_replaces_rows(self):
+        """
+        Test that rows downloaded again replace the stored rows with the same entry_id
+        """
+        first = make_data('2021-01-01', 10)
+        second = make_data('2021-01-01 00:10', 10, first_entry=6)
+        second['PM2.5 (CF=1) ug/m3'] += 100
+        day = [(datetime(2021, 1, 1), datetime(2021, 1, 2))]
+        self.store.append(1, 'primary', first, day)
+        self.store.append(1, 'primary', second, day)
+        read = self.store.read(1, 'primary', *day[0])
+        self.assertEqual(list(read.index), list(range(1, 16)))
+        self.assertEqual(read.loc[6, 'PM2.5 (CF=1) ug/m3'], 100)
+
+    def test_sync_downloads_gaps(self):
+        """
+        Test that only missing ranges are downloaded, and the current day never counts as stored
+        """
+        requested = []
+
+        def download(gaps):
+            requested.extend(gaps)
+            return make_data(gaps[0][0], 1)
+
+        day = datetime(2021, 1, 1)
+        self.store.sync(1, 'secondary', day + timedelta(days=2), day + timedelta(days=3),
+                        download)
+        self.store.sync(1, 'secondary', day, day + timedelta(days=4), download)
+        self.assertEqual(requested, [(day + timedelta(days=2), day + timedelta(days=3)),
+                                     (day, day + timedelta(days=2)),
+                                     (day + timedelta(days=3), day + timedelta(days=4))])
+        self.assertEqual(self.store.coverage(1, 'secondary'),
+                         [(day, day + timedelta(days=4))])
+
+        today = store.floor_day(datetime.utcnow())
+        self.store.sync(1, 'primary', today - timedelta(days=1), today + timedelta(days=1),
+                        download)
+        self.assertEqual(self.store.missing(1, 'primary', today - timedelta(days=1),
+                                            today + timedelta(days=1)),
+                         [(today, today + timedelta(days=1))])
+
+    def test_scan_projects_and_slices(self):
+        """
+        Test that a scan only keeps the requested rows and columns, without copying them
+        """
+        data = make_data('2021-01-01', 100)
+        data['Humidity_%'] = 50.0
+        self.store.append(1, 'primary', data,
+                          [(datetime(2021, 1, 1), datetime(2021, 1, 2))])
+        start, end = datetime(2021, 1, 1, 0, 20), datetime(2021, 1, 1, 1)
+        table = self.store.scan(1, 'primary', start, end, ['Humidity_%'])
+        self.assertEqual(table.column_names, ['created_at', 'Humidity_%', 'entry_id'])
+        self.assertEqual(table.num_rows, 20)
+
+        frame = table.to_pandas(split_blocks=True)
+        self.assertTrue(np.shares_memory(frame['Humidity_%'].to_numpy(),
+                                         table.column('Humidity_%').chunk(0).to_numpy()))
+
+        read = self.store.read(1, 'primary', start, end, ['Humidity_%'])
+        self.assertTrue(read.equals(data.loc[11:30, ['created_at', 'Humidity_%']]))
+        with self.assertRaises(ValueError):
+            self.store.read(1, 'primary', start, end, ['Missing'])
+
+    def test_bad_field(self):
+        """
+        Test that only primary and secondary fields can be stored
+        """
+        with self.assertRaises(ValueError):
+            self.store.coverage(1, 'tertiary')
+
+
+@unittest.skipIf(store.pa is None, 'pyarrow is not installed')
+class TestStoredDownloads(unittest.TestCase):
+    """
+    Tests for bulk and asynchronous downloads through a store
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = store.HistoricalStore(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_bulk_download(self):
+        """
+        Test that bulk downloads only request the days that are not stored
+        """
+        session = FakeSession()
+        parent = channel.Channel(SENSOR_DATA['results'][0],
+                                 transport=transport.Transport(session=session),
+                                 store=self.store)
+        downloader = bulk.BulkDownloader(transport=parent.transport)
+        start_date, end_date = datetime(2020, 1, 1), datetime(2020, 1, 3)
+        first = dict(downloader.download([parent], start_date, end_date))
+        self.assertEqual(len(session.urls), 2)
+        second = dict(downloader.download([parent], start_date, end_date))
+        self.assertEqual(len(session.urls), 2)
+        pd.testing.assert_frame_equal(first[1], second[1])
+
+    def test_async_download(self):
+        """
+        Test that asynchronous channels only request the days that are not stored
+        """
+        fake = FakeAsyncTransport()
+        se = asyncio.run(aio.AsyncSensor.create(1, transport=fake, store=self.store))
+        fake.urls.clear()
+        start_date, end_date = datetime(2020, 1, 1), datetime(2020, 1, 3)
+        first = asyncio.run(se.parent.get_historical_between('primary', start_date, end_date))
+        self.assertEqual(len(fake.urls), 1)
+        second = asyncio.run(se.parent.get_historical_range(start_date, end_date, 'primary'))
+        self.assertEqual(len(fake.urls), 1)
+        pd.testing.assert_frame_equal(first, second)
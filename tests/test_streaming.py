@@ -0,0 +1,56 @@
+import json
+import unittest
+
+from purpleair.streaming import iter_results
+
+PAYLOAD = {
+    'mapVersion': '0.1',
+    'results': [{'ID': 1, 'Label': 'Parent', 'Lat': 37.7, 'Stats': '{"v": 1.5}'},
+                {'ID': 2, 'ParentID': 1, 'Label': 'Child é', 'Lat': 37.7}],
+    'count': 12345,
+}
+
+
+def chunk(data: bytes, size: int):
+    """
+    Split bytes into chunks of `size` bytes
+    """
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class TestStreamingMethods(unittest.TestCase):
+    """
+    Tests for incremental payload parsing
+    """
+
+    def test_iter_results(self):
+        """
+        Test that entries match `json.loads()` no matter where the chunks are split
+        """
+        data = json.dumps(PAYLOAD, indent=2).encode()
+        for size in (1, 3, 16, len(data)):
+            metadata = {}
+            results = list(iter_results(chunk(data, size), metadata))
+            self.assertListEqual(results, PAYLOAD['results'])
+            self.assertEqual(metadata['count'], 12345)
+
+    def test_iter_results_empty(self):
+        """
+        Test that an empty network is not an error
+        """
+        self.assertListEqual(list(iter_results([b'{"results": []}'])), [])
+
+    def test_iter_results_error_message(self):
+        """
+        Test that API error messages are raised once the payload is read
+        """
+        with self.assertRaisesRegex(ValueError, 'rate limited'):
+            list(iter_results([b'{"message": "rate limited"}']))
+
+    def test_iter_results_invalid(self):
+        """
+        Test that truncated or invalid payloads raise ValueError
+        """
+        for data in (b'{"results": [{"ID": 1}', b'<html>', b''):
+            with self.assertRaises(ValueError):
+                list(iter_results(chunk(data, 4)))
@@ -0,0 +1,125 @@
+import importlib.util
+import unittest
+
+from purpleair import sensor, transport
+
+
+class FakeResponse():
+    """
+    Minimal stand-in for `requests.Response`
+    """
+
+    def __init__(self, content: bytes):
+        self.content = content
+
+    def raise_for_status(self):
+        """
+        Fake responses never fail
+        """
+
+    def iter_content(self, chunk_size):
+        return [self.content[i:i + chunk_size]
+                for i in range(0, len(self.content), chunk_size)]
+
+    def close(self):
+        pass
+
+
+class FakeSession():
+    """
+    Minimal stand-in for `requests.Session` that records requests
+    """
+
+    def __init__(self):
+        self.urls = []
+        self.mounted = []
+
+    def mount(self, prefix, adapter):
+        self.mounted.append((prefix, adapter))
+
+    def get(self, url, timeout=None, stream=False):
+        self.urls.append((url, timeout))
+        return FakeResponse(b'created_at,entry_id,field1\n2020-01-01 00:00:00 UTC,1,2.5\n')
+
+    def close(self):
+        pass
+
+
+class TestTransportMethods(unittest.TestCase):
+    """
+    Tests for the shared Transport
+    """
+
+    def test_sensor_creates_transport(self):
+        """
+        Test that a sensor without a transport creates one and passes it to both channels
+        """
+        data = [{'ID': 1}, {'ID': 2, 'ParentID': 1}]
+        se = sensor.Sensor(1, json_data=data)
+        self.assertIsInstance(se.transport, transport.Transport)
+        self.assertIs(se.parent.transport, se.transport)
+        self.assertIs(se.child.transport, se.transport)
+        self.assertIsNot(sensor.Sensor(1, json_data=data).transport, se.transport)
+
+    def test_pool_adapter_mounted(self):
+        """
+        Test that pooled adapters are mounted for http and https
+        """
+        session = FakeSession()
+        transport.Transport(session=session, pool_size=4)
+        prefixes = {prefix for prefix, _ in session.mounted}
+        self.assertSetEqual(prefixes, {'http://', 'https://'})
+        self.assertEqual(session.mounted[0][1]._pool_maxsize, 4)
+
+    def test_read_csv(self):
+        """
+        Test that CSV data is read through the shared session with the timeout
+        """
+        session = FakeSession()
+        shared = transport.Transport(session=session, timeout=5)
+        df = shared.read_csv('https://thingspeak.com/channels/1/feed.csv')
+        self.assertEqual(len(df), 1)
+        self.assertEqual(session.urls[0][1], 5)
+
+    def test_read_csv_engines(self):
+        """
+        Test that both CSV engines keep only the used columns with the given types
+        """
+        engines = ['c']
+        if importlib.util.find_spec('pyarrow') is not None:
+            engines.append('pyarrow')
+        options = {'usecols': {'created_at', 'field1', 'field2'}.__contains__,
+                   'dtype': {'created_at': str, 'field1': 'float32', 'field2': 'float32'}}
+        for engine in engines:
+            shared = transport.Transport(session=FakeSession(), csv_engine=engine)
+            df = shared.read_csv('https://thingspeak.com/channels/1/feed.csv', **options)
+            self.assertListEqual(list(df.columns), ['created_at', 'field1'])
+            self.assertEqual(df['field1'].dtype, 'float32')
+
+    def test_stream(self):
+        """
+        Test that streamed responses are yielded in chunks
+        """
+        shared = transport.Transport(session=FakeSession())
+        chunks = list(shared.stream('https://www.purpleair.com/json', chunk_size=8))
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(len(c) <= 8 for c in chunks))
+
+    def test_stream_bypasses_cache(self):
+        """
+        Test that a cached session streams through an uncached session with the same pool
+        """
+        shared = transport.Transport(backend='memory')
+        self.assertIsNot(shared.stream_session, shared.session)
+        self.assertIs(shared.stream_session.get_adapter('https://'),
+                      shared.session.get_adapter('https://'))
+
+    def test_sensor_shares_transport(self):
+        """
+        Test that a sensor passes its transport to both channels
+        """
+        shared = transport.Transport(session=FakeSession())
+        se = sensor.Sensor(1, json_data=[{'ID': 1}, {'ID': 2, 'ParentID': 1}],
+                           transport=shared)
+        self.assertIs(se.parent.transport, shared)
+        self.assertIs(se.child.transport, shared)